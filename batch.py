@@ -0,0 +1,177 @@
+import csv
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from calculator import Calculator
+from formula_engine import get_engine
+
+CHUNK_SIZE = 5000
+
+
+def read_chunks(reader, chunk_size):
+    """Читает строки CSV порциями, чтобы не держать весь файл в памяти"""
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_column(cells):
+    """
+    Числа столбца одним массивом: nan - пустая ячейка или ячейка, которая не
+    является числом (единицы измерения, обозначение постоянной). Возвращает
+    (значения, маска пустых ячеек)
+    """
+    empty = np.array([not cell for cell in cells], dtype=bool)
+    try:
+        values = np.array([cell or "nan" for cell in cells], dtype=float)
+    except ValueError:
+        values = np.array([to_number(cell) for cell in cells], dtype=float)
+    return values, empty
+
+
+def to_number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return math.nan
+
+
+def process_chunk(formula_name, header, rows):
+    """
+    Считает одну порцию строк: в каждой строке заполняется единственная пустая
+    переменная. Строки из одних чисел решаются векторно, по группам с одной и
+    той же искомой; строки с единицами измерения, постоянными или ошибками
+    ввода - по одной, через Calculator. Возвращает список пар (строка, ошибка или None)
+    """
+    formula_info = get_engine().definitions[formula_name]
+    formula_data = {formula_name: formula_info}
+    columns = {name: header.index(name) for name in formula_info["variables"]}
+    calculator = Calculator()
+
+    # короткие строки дополняем пустыми значениями
+    rows = [row + [""] * (len(header) - len(row)) if len(row) < len(header) else row
+            for row in rows]
+    errors = [None] * len(rows)
+    values, empty = {}, {}
+    for name, index in columns.items():
+        values[name], empty[name] = parse_column([row[index].strip() for row in rows])
+
+    # векторно считаются строки, где все ячейки - конечные числа, кроме одной пустой
+    numeric = np.ones(len(rows), dtype=bool)
+    missing = np.zeros(len(rows), dtype=int)
+    for name in columns:
+        numeric &= np.isfinite(values[name]) | empty[name]
+        missing += empty[name]
+    numeric &= missing == 1
+    for target, index in columns.items():
+        group = np.flatnonzero(numeric & empty[target])
+        if not len(group):
+            continue
+        known = {name: values[name][group] for name in columns if name != target}
+        result, valid = calculator.solve_batch(formula_name, target, **known)
+        for row, value, ok in zip(group.tolist(), result.tolist(), valid.tolist()):
+            if ok:
+                rows[row][index] = repr(value)
+            else:
+                errors[row] = "Не удалось вычислить результат"
+
+    for row in np.flatnonzero(~numeric).tolist():
+        input_values = {name: rows[row][index] for name, index in columns.items()}
+        calculation_result = calculator.calculate(formula_data, input_values)
+        if calculation_result["success"]:
+            if "unit" in calculation_result:
+                # в пустой ячейке была указана единица результата
+                value = f'{calculation_result["display_result"]!r} {calculation_result["unit"]}'
+            else:
+                value = repr(calculation_result["result"])
+            rows[row][columns[calculation_result["target_variable"]]] = value
+        else:
+            errors[row] = calculation_result["error"]
+    return list(zip(rows, errors))
+
+
+def run_batch(formula_name, input_path, output_path, errors_path=None,
+              chunk_size=CHUNK_SIZE, workers=None):
+    """
+    Пакетный расчет CSV-файла. Порядок строк на выходе совпадает с входом,
+    ошибки пишутся в отдельный файл (номер строки, текст ошибки).
+    Возвращает (число строк, число ошибок)
+    """
+    formula_info = get_engine().definitions.get(formula_name)
+    if formula_info is None:
+        raise ValueError(f"Неизвестная формула: {formula_name}")
+    if errors_path is None:
+        errors_path = os.path.splitext(output_path)[0] + ".errors.csv"
+    workers = workers or os.cpu_count() or 1
+
+    with open(input_path, newline="", encoding="utf-8-sig") as src, \
+            open(output_path, "w", newline="", encoding="utf-8") as dst, \
+            open(errors_path, "w", newline="", encoding="utf-8") as err:
+        reader = csv.reader(src)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("Входной файл пуст")
+        missing = [name for name in formula_info["variables"] if name not in header]
+        if missing:
+            raise ValueError(f"В файле нет столбцов: {', '.join(missing)}")
+
+        writer = csv.writer(dst)
+        error_writer = csv.writer(err)
+        writer.writerow(header)
+        error_writer.writerow(["строка", "ошибка"])
+        counters = {"rows": 0, "errors": 0}
+
+        def write_results(results):
+            writer.writerows(row for row, _ in results)
+            # +1 за заголовок, нумерация строк файла с единицы
+            for number, (_, error) in enumerate(results, counters["rows"] + 2):
+                if error is not None:
+                    counters["errors"] += 1
+                    error_writer.writerow([number, error])
+            counters["rows"] += len(results)
+
+        chunks = read_chunks(reader, chunk_size)
+        if workers == 1:
+            for chunk in chunks:
+                write_results(process_chunk(formula_name, header, chunk))
+        else:
+            # в работе держим ограниченное число порций - память не растет с размером файла
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(process_chunk, formula_name, header, chunk))
+                    if len(pending) >= workers * 2:
+                        write_results(pending.popleft().result())
+                while pending:
+                    write_results(pending.popleft().result())
+
+    return counters["rows"], counters["errors"]
+
+
+def add_arguments(subparsers):
+    """Регистрирует команду batch в разборщике аргументов командной строки"""
+    parser = subparsers.add_parser(
+        "batch", help="пакетный расчет CSV-файла без графического интерфейса")
+    parser.add_argument("--formula", required=True, help="название формулы")
+    parser.add_argument("input", help="входной CSV-файл")
+    parser.add_argument("output", help="выходной CSV-файл")
+    parser.add_argument("--errors", help="файл для ошибок (по умолчанию <output>.errors.csv)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="число строк в одной порции")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="число процессов (по умолчанию - все ядра)")
+    parser.set_defaults(handler=run_from_args)
+
+
+def run_from_args(args):
+    rows, errors = run_batch(args.formula, args.input, args.output, args.errors,
+                             args.chunk_size, args.workers)
+    print(f"Обработано строк: {rows}, ошибок: {errors}")
+    return 0
@@ -0,0 +1,307 @@
+import fnmatch
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# версия формата файла результатов
+RESULTS_VERSION = 1
+
+# размеры БД истории для замеров (--quick - только первый)
+HISTORY_SIZES = (10_000, 100_000, 1_000_000)
+
+# допустимое замедление относительно базового замера, %
+DEFAULT_THRESHOLD = 20.0
+
+# разница меньше этой не считается замедлением (шум таймера), мс
+MIN_DELTA_MS = 0.05
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+# строка отчета о запуске: "   412.3  первый кадр"
+FIRST_FRAME = re.compile(r"^\s*([\d.]+)\s+первый кадр\s*$", re.MULTILINE)
+
+
+class BenchmarkResults:
+    """Замеры по метрикам: {метрика: {"ms": медиана, "min": минимум, "runs": прогонов}}"""
+
+    def __init__(self, verbose=True):
+        self.metrics = {}
+        self.verbose = verbose
+
+    def measure(self, name, func, repeat=5, number=1):
+        """Время одного вызова func (мс): number вызовов подряд, repeat повторов"""
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            times.append((time.perf_counter() - start) * 1000 / number)
+        self.add(name, times)
+
+    def add(self, name, times):
+        self.metrics[name] = {"ms": statistics.median(times), "min": min(times), "runs": len(times)}
+        if self.verbose:
+            print(f"{self.metrics[name]['ms']:12.3f} мс  {name}", file=sys.stderr)
+
+    def to_json(self):
+        import numpy
+        from PyQt6.QtCore import PYQT_VERSION_STR
+        return {
+            "version": RESULTS_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "numpy": numpy.__version__,
+                "pyqt": PYQT_VERSION_STR,
+            },
+            "metrics": self.metrics,
+        }
+
+
+def bench_calculator(results, repeat):
+    """Calculator.calculate для каждой формулы и каждой искомой переменной (без кэша)"""
+    from calculator import Calculator
+    from const.formulas import CATEGORIES
+
+    calculator = Calculator()
+    cases = {}
+    for category, formulas in CATEGORIES.items():
+        for formula_name, formula_info in formulas.items():
+            for target in formula_info["variables"]:
+                input_values = {var_name: "" if var_name == target else "2"
+                                for var_name in formula_info["variables"]}
+                cases.setdefault(category, []).append(({formula_name: formula_info}, input_values))
+
+    def run(category_cases):
+        for formula_data, input_values in category_cases:
+            calculator.calculate(formula_data, input_values)
+
+    # первый проход: загрузка каталога и компиляция решений
+    all_cases = [case for category_cases in cases.values() for case in category_cases]
+    results.measure("calculate/first_pass", lambda: run(all_cases), repeat=1)
+    results.measure("calculate/all", lambda: run(all_cases), repeat=repeat)
+    for category, category_cases in cases.items():
+        results.measure(f"calculate/{category}", lambda: run(category_cases), repeat=repeat)
+
+
+def fill_history(db, size, chunk_size=10_000):
+    """Заполняет БД истории записями за последний месяц"""
+    from classes.historyDB import insert_records
+    from const.formulas import CATEGORIES
+
+    formulas = [(formula_name, list(formula_info["variables"]))
+                for formulas in CATEGORIES.values() for formula_name, formula_info in formulas.items()]
+    now = int(time.time())
+    for start in range(0, size, chunk_size):
+        records = []
+        for i in range(start, min(start + chunk_size, size)):
+            formula_name, variables = formulas[i % len(formulas)]
+            inputs = [(var_name, float(i % 1000 + n)) for n, var_name in enumerate(variables)]
+            records.append((formula_name, variables[0], inputs, inputs[0][1], now - i * 2))
+        with db.conn:
+            insert_records(db.conn, records, db.formula_ids)
+
+
+def bench_history(results, sizes, directory, repeat):
+    """HistoryDB.add_calculation, get_history и открытие HistoryDialog при разном размере истории"""
+    from classes.dialogs import HistoryDialog
+    from classes.historyDB import HistoryDB
+
+    for size in sizes:
+        path = os.path.join(directory, f"history_{size}.db")
+        db = HistoryDB(path)
+        fill_history(db, size)
+        inputs = {"U": "12", "R": "100 Ом", "I": "0.12"}
+        results.measure(f"history/{size}/add_calculation",
+                        lambda: db.add_calculation("Закон Ома", inputs, 0.12, "I"),
+                        repeat=repeat, number=20)
+        results.measure(f"history/{size}/get_history", db.get_history,
+                        repeat=repeat if size <= 100_000 else 1)
+
+        def open_dialog():
+            dialog = HistoryDialog(db)
+            dialog.deleteLater()
+        results.measure(f"history/{size}/dialog", open_dialog, repeat=repeat)
+        db.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def bench_gui(results, app, repeat):
+    """Выбор формулы, смена темы, справочники постоянных и единиц"""
+    from classes.dialogs import ConstantsDialog, UnitsDialog
+    from classes.mainClass import PhysicsCalculator
+    from const.formulas import CATEGORIES
+    from styles import STYLESHEETS
+
+    window = PhysicsCalculator()
+    window.show()
+    app.processEvents()
+    formula_names = [formula_name for formulas in CATEGORIES.values() for formula_name in formulas]
+
+    def select_all():
+        for formula_name in formula_names:
+            window.on_formula_selected(formula_name)
+        app.processEvents()
+
+    # первый выбор создает формы ввода, повторный только переключает их
+    results.measure("gui/on_formula_selected/first_pass", select_all, repeat=1)
+    results.measure("gui/on_formula_selected", select_all, repeat=repeat)
+    for theme_name in STYLESHEETS:
+        def apply_theme():
+            window.apply_theme(theme_name)
+            app.processEvents()
+        results.measure(f"gui/apply_theme/{theme_name}", apply_theme, repeat=repeat)
+
+    for name, dialog_class in (("constants_dialog", ConstantsDialog), ("units_dialog", UnitsDialog)):
+        def open_dialog():
+            dialog = dialog_class()
+            dialog.deleteLater()
+        results.measure(f"gui/{name}", open_dialog, repeat=repeat)
+    window.close()
+    app.processEvents()
+
+
+def bench_startup(results, directory, repeat):
+    """Время до первого кадра PhysicsCalculator в отдельном процессе (холодный запуск)"""
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    times = []
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, MAIN_SCRIPT, "--startup-report"], cwd=directory,
+                                 env=env, capture_output=True, text=True, timeout=120)
+        match = FIRST_FRAME.search(process.stderr)
+        if match is None:
+            raise ValueError(f"не удалось измерить время запуска: {process.stderr.strip()[-500:]}")
+        times.append(float(match.group(1)))
+    results.add("startup/first_paint", times)
+
+
+def run_benchmarks(sizes=HISTORY_SIZES, repeat=5, verbose=True):
+    """
+    Все замеры без дисплея (платформа Qt offscreen). История, тема и БД окна
+    создаются во временной папке, файлы пользователя не затрагиваются
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    results = BenchmarkResults(verbose)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="physics-bench-") as directory:
+        os.chdir(directory)
+        try:
+            bench_startup(results, directory, repeat=3)
+            bench_calculator(results, repeat)
+            bench_gui(results, app, repeat)
+            bench_history(results, sizes, directory, repeat)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, thresholds=None):
+    """
+    Сравнение замеров с базовыми. thresholds - допустимое замедление (%) для
+    отдельных метрик, ключи - шаблоны вида "history/1000000/*".
+    Возвращает строки (метрика, было, стало, изменение %, состояние)
+    """
+    rows = []
+    for name, base in baseline["metrics"].items():
+        metric = current["metrics"].get(name)
+        if metric is None:
+            rows.append((name, base["ms"], None, None, "нет в замере"))
+            continue
+        limit = threshold
+        for pattern, value in (thresholds or {}).items():
+            if fnmatch.fnmatchcase(name, pattern):
+                limit = value
+        change = (metric["ms"] / base["ms"] - 1) * 100 if base["ms"] else 0.0
+        regressed = change > limit and metric["ms"] - base["ms"] > MIN_DELTA_MS
+        rows.append((name, base["ms"], metric["ms"], change, "замедление" if regressed else "ok"))
+    for name, metric in current["metrics"].items():
+        if name not in baseline["metrics"]:
+            rows.append((name, None, metric["ms"], None, "новая"))
+    return rows
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as file:
+        try:
+            results = json.load(file)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from None
+    if not isinstance(results, dict) or results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path}: неподдерживаемый формат результатов")
+    return results
+
+
+def add_arguments(subparsers):
+    """Регистрирует команду bench (run и compare) в разборщике аргументов командной строки"""
+    parser = subparsers.add_parser("bench", help="замеры производительности")
+    commands = parser.add_subparsers(dest="bench_command", required=True)
+
+    run_parser = commands.add_parser("run", help="выполнить замеры и записать результаты в JSON")
+    run_parser.add_argument("-o", "--output", default="bench.json", help="файл результатов")
+    run_parser.add_argument("--quick", action="store_true",
+                            help=f"только история из {HISTORY_SIZES[0]} записей и меньше повторов")
+    run_parser.add_argument("--sizes", help="размеры истории через запятую: 10000,100000")
+    run_parser.add_argument("--repeat", type=int, default=5, help="число повторов замера")
+    run_parser.set_defaults(handler=run_from_args)
+
+    compare_parser = commands.add_parser(
+        "compare", help="сравнить с базовым замером (код возврата 1 при замедлении)")
+    compare_parser.add_argument("baseline", help="базовые результаты (JSON)")
+    compare_parser.add_argument("current", help="новые результаты (JSON)")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="допустимое замедление, %% (по умолчанию %(default)s)")
+    compare_parser.add_argument("--metric", action="append", default=[], metavar="ШАБЛОН=%",
+                                help="порог для отдельных метрик: \"history/1000000/*=50\"")
+    compare_parser.set_defaults(handler=compare_from_args)
+
+
+def run_from_args(args):
+    if args.sizes:
+        try:
+            sizes = tuple(int(size) for size in args.sizes.split(","))
+        except ValueError:
+            raise ValueError(f"Некорректные размеры истории: {args.sizes}") from None
+    else:
+        sizes = HISTORY_SIZES[:1] if args.quick else HISTORY_SIZES
+    repeat = min(args.repeat, 3) if args.quick else args.repeat
+    results = run_benchmarks(sizes, repeat)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results.to_json(), file, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}: {len(results.metrics)} метрик")
+    return 0
+
+
+def compare_from_args(args):
+    thresholds = {}
+    for item in args.metric:
+        pattern, _, value = item.rpartition("=")
+        try:
+            if not pattern:
+                raise ValueError
+            thresholds[pattern] = float(value)
+        except ValueError:
+            raise ValueError(f"Порог метрики задается как шаблон=процент: {item}") from None
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold, thresholds)
+    regressions = 0
+    for name, base, value, change, status in rows:
+        base_text = f"{base:.3f}" if base is not None else "-"
+        value_text = f"{value:.3f}" if value is not None else "-"
+        change_text = f"{change:+.1f}%" if change is not None else ""
+        print(f"{name:45} {base_text:>12} {value_text:>12} {change_text:>9}  {status}")
+        regressions += status == "замедление"
+    if regressions:
+        print(f"Замедление по {regressions} метрикам", file=sys.stderr)
+        return 1
+    return 0
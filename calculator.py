@@ -1,7 +1,17 @@
-import math
+import argparse
+import sys
+import unicodedata
+import numpy as np
+from constants import constant_value
+from formula_engine import get_engine
+from units import conversion, convert, is_difference, parse_value, split_quantity
 
 
 class Calculator:
+    def __init__(self, cache=None):
+        # необязательный кэш результатов (ResultCache), можно разделять между потоками
+        self.cache = cache
+
     def calculate(self, formula_data, input_values):
         """
         Универсальный калькулятор для физических формул
@@ -15,21 +25,41 @@ class Calculator:
             # проверяем и преобразуем введенные значения
             calculated_vars = {}
             missing_vars = []
+            display_unit = None
 
-            for var_name in variables.keys():
+            for var_name, var_info in variables.items():
                 value = input_values.get(var_name, '').strip()
-                if value:
+                # обозначение постоянной из справочника (g, c, k_B) заменяется ее значением
+                constant = constant_value(value, var_info) if value else None
+                if constant is not None:
+                    calculated_vars[var_name] = constant
+                    continue
+                number, unit = split_quantity(value)
+                if number:
                     try:
-                        # заменяем запятые на точки и преобразуем в число
-                        cleaned_value = value.replace(',', '.')
-                        calculated_vars[var_name] = float(cleaned_value)
-                    except ValueError:
+                        # число с единицей измерения переводим в единицы формулы
+                        calculated_vars[var_name] = parse_value(value, var_info)
+                    except ValueError as e:
+                        error = f"Некорректное значение для {var_name}"
+                        if unit:
+                            error += f": {e}"
                         return {
                             "success": False,
-                            "error": f"Некорректное значение для {var_name}",
+                            "error": error,
                             "result": None
                         }
                 else:
+                    # в поле искомой величины можно указать единицу результата
+                    if unit:
+                        try:
+                            conversion(var_info['unit'], unit, is_difference(var_info))
+                        except ValueError as e:
+                            return {
+                                "success": False,
+                                "error": f"Некорректное значение для {var_name}: {e}",
+                                "result": None
+                            }
+                        display_unit = unit
                     missing_vars.append(var_name)
 
             # проверяем что заполнены все переменные кроме одной (которую вычисляем)
@@ -44,8 +74,13 @@ class Calculator:
             target_var = missing_vars[0]
 
             # вычисляем результат в зависимости от формулы
-            result = self.solve_formula(
-                formula_name, calculated_vars, target_var)
+            if self.cache is not None:
+                key = self.cache.make_key(formula_name, target_var, calculated_vars)
+                result = self.cache.get_or_compute(
+                    key, lambda: self.solve_formula(formula_name, calculated_vars, target_var))
+            else:
+                result = self.solve_formula(
+                    formula_name, calculated_vars, target_var)
 
             if result is None:
                 return {
@@ -54,12 +89,20 @@ class Calculator:
                     "result": None
                 }
 
-            return {
+            calculation_result = {
                 "success": True,
                 "result": result,
                 "target_variable": target_var,
+                # введенные значения числами в единицах формулы (для истории)
+                "values": calculated_vars,
                 "error": None
             }
+            if display_unit is not None:
+                calculation_result["unit"] = display_unit
+                calculation_result["display_result"] = convert(
+                    result, variables[target_var]['unit'], display_unit,
+                    is_difference(variables[target_var]))
+            return calculation_result
 
         except Exception as e:
             return {
@@ -70,168 +113,71 @@ class Calculator:
 
     def solve_formula(self, formula_name, known_vars, target_var):
         """
-        Решает конкретную формулу
+        Решает конкретную формулу с помощью скомпилированного решения из движка формул
         """
         try:
-            if formula_name == "Второй закон Ньютона":
-                if known_vars.get("m", 1) <= 0:
-                    return None
-                if target_var == "F":
-                    return known_vars["m"] * known_vars["a"]
-                elif target_var == "m":
-                    return known_vars["F"] / known_vars["a"]
-                elif target_var == "a":
-                    return known_vars["F"] / known_vars["m"]
-
-            elif formula_name == "Кинетическая энергия":
-                if (known_vars.get("Eₖ", 0) < 0 or
-                    known_vars.get("m", 1) <= 0 or
-                        (target_var != "Eₖ" and known_vars.get("Eₖ", 1) == 0)):
-                    return None
-                if target_var == "Eₖ":
-                    return (known_vars["m"] * known_vars["v"] ** 2) / 2
-                elif target_var == "m":
-                    return (2 * known_vars["Eₖ"]) / (known_vars["v"] ** 2)
-                elif target_var == "v":
-                    return math.sqrt((2 * known_vars["Eₖ"]) / known_vars["m"])
-
-            elif formula_name == "Потенциальная энергия":
-                if (known_vars.get("Eₚ", 0) < 0 or
-                    known_vars.get("m", 1) <= 0 or
-                    known_vars.get("g", 1) <= 0 or
-                    known_vars.get("h", 0) < 0 or
-                        (target_var != "Eₚ" and known_vars.get("h", 1) == 0)):
-                    return None
-                if target_var == "Eₚ":
-                    return known_vars["m"] * known_vars["g"] * known_vars["h"]
-                elif target_var == "m":
-                    return known_vars["Eₚ"] / (known_vars["g"] * known_vars["h"])
-                elif target_var == "g":
-                    return known_vars["Eₚ"] / (known_vars["m"] * known_vars["h"])
-                elif target_var == "h":
-                    return known_vars["Eₚ"] / (known_vars["m"] * known_vars["g"])
-
-            elif formula_name == "Импульс":
-                if known_vars.get("m", 1) <= 0:
-                    return None
-                if target_var == "p":
-                    return known_vars["m"] * known_vars["v"]
-                elif target_var == "m":
-                    return known_vars["p"] / known_vars["v"]
-                elif target_var == "v":
-                    return known_vars["p"] / known_vars["m"]
-
-            elif formula_name == "Закон Ома":
-                if known_vars.get("R", 1) <= 0:
-                    return None
-                if target_var == "I":
-                    return known_vars["U"] / known_vars["R"]
-                elif target_var == "U":
-                    return known_vars["I"] * known_vars["R"]
-                elif target_var == "R":
-                    return known_vars["U"] / known_vars["I"]
-
-            elif formula_name == "Мощность тока":
-                if known_vars.get("P", 0) < 0:
-                    return None
-                if target_var == "P":
-                    return known_vars["U"] * known_vars["I"]
-                elif target_var == "U":
-                    return known_vars["P"] / known_vars["I"]
-                elif target_var == "I":
-                    return known_vars["P"] / known_vars["U"]
-
-            elif formula_name == "Энергия конденсатора":
-                if (known_vars.get("W", 0) < 0 or
-                    known_vars.get("C", 1) <= 0 or
-                        (target_var != "W" and known_vars.get("W", 1) == 0)):
-                    return None
-                if target_var == 'W':
-                    return (known_vars['C'] * known_vars['U'] ** 2) / 2
-                elif target_var == 'C':
-                    return (2 * known_vars['W']) / (known_vars['U'] ** 2)
-                elif target_var == 'U':
-                    return math.sqrt((2 * known_vars['W']) / known_vars['C'])
-
-            elif formula_name == 'КПД тепловой машины':
-                if (known_vars.get("η", 0) < 0 or
-                    known_vars.get("Q₁", 1) <= 0 or
-                    known_vars.get("Q₂", 0) < 0 or
-                        known_vars.get("η", 101) > 100):
-                    return None
-                if target_var == 'η':
-                    return ((known_vars['Q₁'] - known_vars['Q₂']) / known_vars['Q₁']) * 100
-                elif target_var == 'Q₂':
-                    return known_vars['Q₁'] - ((known_vars['η'] / 100) * known_vars['Q₁'])
-                elif target_var == 'Q₁':
-                    return known_vars['Q₂'] / (1 - (known_vars['η'] / 100))
-
-            elif formula_name == 'Удельная теплота':
-                if (known_vars.get("Q", 0) < 0 or
-                    known_vars.get("c", 1) <= 0 or
-                        known_vars.get("m", 1) <= 0):
-                    return None
-                if target_var == 'Q':
-                    return known_vars['c'] * known_vars['m'] * known_vars['ΔT']
-                elif target_var == 'c':
-                    return known_vars['Q'] / (known_vars['m'] * known_vars['ΔT'])
-                elif target_var == 'm':
-                    return known_vars['Q'] / (known_vars['c'] * known_vars['ΔT'])
-                elif target_var == 'ΔT':
-                    return known_vars['Q'] / (known_vars['c'] * known_vars['m'])
-
-            elif formula_name == 'Закон преломления':
-                sin_a = math.sin(math.radians(known_vars.get('α', 0)))
-                sin_b = math.sin(math.radians(known_vars.get('β', 0)))
-                n1 = known_vars.get('n₁', 0)
-                n2 = known_vars.get('n₂', 0)
-
-                if target_var == 'n₁':
-                    return (n2 * sin_b) / sin_a
-                elif target_var == 'n₂':
-                    return (n1 * sin_a) / sin_b
-                elif target_var == 'α':
-                    return math.degrees(math.asin((n2 * sin_b) / n1))
-                elif target_var == 'β':
-                    return math.degrees(math.asin((n1 * sin_a) / n2))
-
-            elif formula_name == 'Формула тонкой линзы':
-                if target_var == 'F':
-                    return (known_vars['d'] * known_vars['f']) / (known_vars['d'] + known_vars['f'])
-                elif target_var == 'd':
-                    return (known_vars['F'] * known_vars['f']) / (known_vars['f'] - known_vars['F'])
-                elif target_var == 'f':
-                    return (known_vars['F'] * known_vars['d']) / (known_vars['d'] - known_vars['F'])
-
-            elif formula_name == 'Расход жидкости':
-
-                if (known_vars.get("Q", 0) < 0 or
-                    known_vars.get("S", 1) <= 0 or
-                        known_vars.get("v", 0) < 0):
-                    return None
-                if target_var == 'Q':
-                    return known_vars['S'] * known_vars['v']
-                elif target_var == 'S':
-                    return known_vars['Q'] / known_vars['v']
-                elif target_var == 'v':
-                    return known_vars['Q'] / known_vars['S']
-
-            elif formula_name == 'Сила Архимеда':
-                if (known_vars.get("F", 0) < 0 or
-                    known_vars.get("ρ", 1) <= 0 or
-                    known_vars.get("g", 1) <= 0 or
-                        known_vars.get("V", 0) < 0):
-                    return None
-                if target_var == 'F':
-                    return known_vars['ρ'] * known_vars['g'] * known_vars['V']
-                elif target_var == 'ρ':
-                    return known_vars['F'] / (known_vars['g'] * known_vars['V'])
-                elif target_var == 'g':
-                    return known_vars['F'] / (known_vars['ρ'] * known_vars['V'])
-                elif target_var == 'V':
-                    return known_vars['F'] / (known_vars['ρ'] * known_vars['g'])
-
-            return None
+            return get_engine().solve(formula_name, known_vars, target_var)
 
         except Exception:
             return None
+
+    def solve_batch(self, formula_name, target_var, **columns):
+        """
+        Векторное решение формулы для массивов известных переменных.
+        Возвращает массив результатов и маску строк, для которых решение корректно
+        (ограничения те же, что и в solve_formula)
+        """
+        solver = get_engine().get_solver(formula_name, target_var)
+        if solver is None:
+            raise ValueError(
+                f"Неизвестная формула или переменная: {formula_name}, {target_var}")
+
+        # имена вида Q₁ в именованных аргументах Python превращаются в Q1
+        normalized = {unicodedata.normalize("NFKC", name): name for name in columns}
+        arrays = []
+        for var_name in solver.inputs:
+            key = var_name if var_name in columns else normalized.get(
+                unicodedata.normalize("NFKC", var_name))
+            if key is None:
+                raise ValueError(f"Не передан столбец для {var_name}")
+            arrays.append(np.asarray(columns[key], dtype=float))
+
+        arrays = np.broadcast_arrays(*arrays)
+        known = dict(zip(solver.inputs, arrays))
+        shape = arrays[0].shape if arrays else ()
+        compute, check = solver.vectorized()
+
+        with np.errstate(all="ignore"):
+            valid = np.broadcast_to(check(known), shape)
+            result = np.broadcast_to(np.asarray(compute(known), dtype=float), shape)
+            # деление на ноль и выход из области определения дают inf/nan
+            valid = valid & np.isfinite(result)
+
+        return np.where(valid, result, np.nan), valid
+
+
+def main(argv=None):
+    """Точка входа командной строки: python -m calculator <команда>"""
+    import batch
+    import benchmark
+    import planner
+    from classes import historyTransfer
+
+    parser = argparse.ArgumentParser(
+        prog="python -m calculator", description="Калькулятор для физики без интерфейса")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    batch.add_arguments(subparsers)
+    historyTransfer.add_arguments(subparsers)
+    planner.add_arguments(subparsers)
+    benchmark.add_arguments(subparsers)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
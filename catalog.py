@@ -0,0 +1,290 @@
+import hashlib
+import json
+import marshal
+import os
+import struct
+import threading
+from collections.abc import Mapping
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: каталоги только в JSON
+    tomllib = None
+
+# файлы каталога формул и их разбор
+SOURCE_SUFFIXES = (".json", ".toml")
+
+# кэш лежит рядом с файлом каталога, как .pyc: <папка>/__pycache__/<файл>.cache
+CACHE_DIR = "__pycache__"
+CACHE_MAGIC = b"PHYCAT01"
+# при изменении формата кэша, проверки каталогов или состава полей формулы
+# (например, quantity для планировщика, result_domain) версия увеличивается
+CACHE_VERSION = (3, marshal.version)
+HEADER_SIZE = struct.Struct("<I")
+
+
+class CatalogError(Exception):
+    """Ошибка в файле каталога формул"""
+
+
+def read_source(path, data=None):
+    """Содержимое файла каталога (JSON или TOML)"""
+    if data is None:
+        with open(path, "rb") as file:
+            data = file.read()
+    try:
+        if path.endswith(".toml"):
+            if tomllib is None:
+                raise CatalogError(f"{path}: для каталогов TOML нужен Python 3.11+")
+            return tomllib.loads(data.decode("utf-8"))
+        return json.loads(data.decode("utf-8-sig"))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CatalogError(f"{path}: {e}") from None
+
+
+def validate_formula(formula_name, formula_info):
+    """
+    Проверка формулы по схеме каталога: поля и их типы, разбор выражения,
+    ограничений и единиц измерения. Возвращает текст ошибки или None
+    """
+    from formula_engine import FormulaError, parse_domain, parse_equation
+    from units import get_unit
+
+    if not isinstance(formula_info, dict):
+        return "описание формулы должно быть объектом"
+    for key in ("formula", "expression"):
+        if not isinstance(formula_info.get(key, ""), str):
+            return f"поле {key} должно быть строкой"
+    if "formula" not in formula_info:
+        return "нет поля formula"
+    variables = formula_info.get("variables")
+    if not isinstance(variables, dict) or not variables:
+        return "нет переменных (поле variables)"
+    for var_name, var_info in variables.items():
+        if not isinstance(var_info, dict):
+            return f"описание переменной {var_name} должно быть объектом"
+        for key in ("unit", "description"):
+            if not isinstance(var_info.get(key), str):
+                return f"у переменной {var_name} нет поля {key}"
+        if not isinstance(var_info.get("quantity", ""), str):
+            return f"у переменной {var_name} поле quantity должно быть строкой"
+        try:
+            get_unit(var_info["unit"])
+        except ValueError as e:
+            return f"у переменной {var_name} {e}"
+    for key in ("domain", "result_domain"):
+        domain = formula_info.get(key, {})
+        if not isinstance(domain, dict) or not all(isinstance(rule, str) for rule in domain.values()):
+            return f"поле {key} должно быть объектом вида {{\"m\": \"> 0\"}}"
+        unknown = [var_name for var_name in domain if var_name not in variables]
+        if unknown:
+            return f"ограничение для неизвестной переменной {', '.join(unknown)}"
+        try:
+            parse_domain(domain)
+        except FormulaError as e:
+            return str(e)
+    try:
+        parse_equation(formula_info.get("expression", formula_info["formula"]), variables)
+    except FormulaError as e:
+        return str(e)
+    return None
+
+
+def compile_source(path, data=None):
+    """Разбор и проверка файла каталога: (раздел, порядок, {формула: описание})"""
+    source = read_source(path, data)
+    if not isinstance(source, dict):
+        raise CatalogError(f"{path}: каталог должен быть объектом")
+    category = source.get("category")
+    order = source.get("order", 0)
+    formulas = source.get("formulas")
+    if not isinstance(category, str) or not category:
+        raise CatalogError(f"{path}: нет названия раздела (поле category)")
+    if not isinstance(order, int):
+        raise CatalogError(f"{path}: поле order должно быть целым числом")
+    if not isinstance(formulas, dict):
+        raise CatalogError(f"{path}: нет формул (поле formulas)")
+    for formula_name, formula_info in formulas.items():
+        error = validate_formula(formula_name, formula_info)
+        if error is not None:
+            raise CatalogError(f"{path}: формула «{formula_name}»: {error}")
+    return category, order, formulas
+
+
+def cache_path(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, CACHE_DIR, name + ".cache")
+
+
+def read_cache_header(path):
+    """Заголовок кэша и смещение формул в файле или None, если кэша нет"""
+    try:
+        with open(cache_path(path), "rb") as file:
+            if file.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                return None
+            size, = HEADER_SIZE.unpack(file.read(HEADER_SIZE.size))
+            header = marshal.loads(file.read(size))
+            offset = file.tell()
+    except (OSError, EOFError, ValueError, TypeError, struct.error):
+        return None
+    if not isinstance(header, dict) or header.get("version") != CACHE_VERSION:
+        return None
+    return header, offset
+
+
+def write_cache(path, header, formulas):
+    """Атомарная запись кэша; если папка только для чтения, работаем без кэша"""
+    target = cache_path(path)
+    temp = f"{target}.{os.getpid()}.tmp"
+    header_data = marshal.dumps(header)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(temp, "wb") as file:
+            file.write(CACHE_MAGIC)
+            file.write(HEADER_SIZE.pack(len(header_data)))
+            file.write(header_data)
+            marshal.dump(formulas, file)
+        os.replace(temp, target)
+    except OSError:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+
+
+class CatalogFile:
+    """
+    Один файл каталога (раздел формул). При открытии читается только заголовок
+    кэша с названиями формул, сами формулы - при первом обращении к разделу
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.formulas = None
+        self.offset = None
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        cached = read_cache_header(path)
+        if cached is not None and (cached[0]["mtime"], cached[0]["size"]) == stamp:
+            self.set_header(*cached)
+            return
+
+        # время изменения другое (копирование, checkout) - сверяем содержимое по хэшу
+        with open(path, "rb") as file:
+            data = file.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if cached is not None and cached[0]["hash"] == digest:
+            self.set_header(*cached)
+            formulas = self.load()
+        else:
+            category, order, formulas = compile_source(path, data)
+            self.category, self.order, self.names = category, order, list(formulas)
+            self.formulas = formulas
+        write_cache(path, {"version": CACHE_VERSION, "mtime": stamp[0], "size": stamp[1],
+                           "hash": digest, "category": self.category, "order": self.order,
+                           "names": self.names}, formulas)
+
+    def set_header(self, header, offset):
+        self.category = header["category"]
+        self.order = header["order"]
+        self.names = header["names"]
+        self.offset = offset
+
+    def load(self):
+        """Формулы раздела (из кэша, без повторного разбора и проверки)"""
+        if self.formulas is None:
+            try:
+                with open(cache_path(self.path), "rb") as file:
+                    file.seek(self.offset)
+                    formulas = marshal.load(file)
+            except (OSError, EOFError, ValueError, TypeError):
+                # кэш удален или испорчен после открытия - собираем заново
+                formulas = compile_source(self.path)[2]
+            self.formulas = formulas
+        return self.formulas
+
+
+class FormulaCatalog(Mapping):
+    """
+    Формулы из файлов каталога: раздел -> {формула: описание}.
+    Папки просматриваются при первом обращении, раздел загружается,
+    когда к нему обращаются впервые
+    """
+
+    def __init__(self, *directories):
+        self.directories = directories
+        self._files = None  # раздел -> CatalogFile
+        self._formula_categories = None
+        # каталог читают и GUI-поток, и фоновая загрузка модулей
+        self._lock = threading.RLock()
+
+    @property
+    def files(self):
+        with self._lock:
+            if self._files is None:
+                self.scan()
+            return self._files
+
+    def scan(self):
+        catalog_files = []
+        for directory in self.directories:
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(SOURCE_SUFFIXES):
+                    catalog_files.append(CatalogFile(os.path.join(directory, name)))
+        catalog_files.sort(key=lambda catalog_file: catalog_file.order)
+
+        files = {}
+        formula_categories = {}
+        for catalog_file in catalog_files:
+            if catalog_file.category in files:
+                raise CatalogError(f"{catalog_file.path}: раздел {catalog_file.category} "
+                                   f"уже есть в {files[catalog_file.category].path}")
+            for formula_name in catalog_file.names:
+                if formula_name in formula_categories:
+                    raise CatalogError(f"{catalog_file.path}: формула «{formula_name}» "
+                                       f"уже есть в разделе {formula_categories[formula_name]}")
+                formula_categories[formula_name] = catalog_file.category
+            files[catalog_file.category] = catalog_file
+        self._files = files
+        self._formula_categories = formula_categories
+
+    def __getitem__(self, category):
+        catalog_file = self.files[category]
+        with self._lock:
+            return catalog_file.load()
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+    @property
+    def formula_categories(self):
+        """Раздел каждой формулы (без загрузки самих формул)"""
+        self.files
+        return self._formula_categories
+
+    @property
+    def formulas(self):
+        """Все формулы по названию; раздел формулы загружается при обращении к ней"""
+        return FormulaLookup(self)
+
+
+class FormulaLookup(Mapping):
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def __getitem__(self, formula_name):
+        category = self.catalog.formula_categories[formula_name]
+        return self.catalog[category][formula_name]
+
+    def __contains__(self, formula_name):
+        return formula_name in self.catalog.formula_categories
+
+    def __iter__(self):
+        return iter(self.catalog.formula_categories)
+
+    def __len__(self):
+        return len(self.catalog.formula_categories)
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+# не чаще, чем раз в столько секунд, задача сообщает о прогрессе
+PROGRESS_INTERVAL = 0.05
+
+
+class JobCancelled(Exception):
+    """Задача отменена (бросается из job.check())"""
+
+
+class JobSignals(QObject):
+    progress = pyqtSignal(int, int)  # выполнено, всего
+    partial = pyqtSignal(object)  # промежуточный результат
+    finished = pyqtSignal(object)  # итоговый результат
+    failed = pyqtSignal(object)  # исключение
+    cancelled = pyqtSignal()
+
+
+class CalculationJob(QRunnable):
+    """
+    Задача для пула потоков. work(job) выполняется вне GUI-потока и может
+    сообщать о прогрессе, отдавать промежуточные результаты и проверять отмену.
+    Сигналы доставляются в GUI-поток через очередь событий
+    """
+
+    def __init__(self, work, executor):
+        super().__init__()
+        # задачу удаляет не пул, а исполнитель, когда она завершится
+        self.setAutoDelete(False)
+        self.work = work
+        self.executor = executor
+        self.signals = JobSignals()
+        self._cancelled = threading.Event()
+        self._last_progress = 0.0
+
+    def cancel(self):
+        """Отмена: задача из очереди снимается сразу, выполняемая - при следующей проверке"""
+        self._cancelled.set()
+        if self.executor.pool.tryTake(self):
+            self.signals.cancelled.emit()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def report_progress(self, done, total):
+        """Прогресс (сигналы прореживаются, чтобы не засыпать цикл событий)"""
+        now = time.monotonic()
+        if done >= total or now - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.signals.progress.emit(done, total)
+
+    def emit_partial(self, result):
+        self.signals.partial.emit(result)
+
+    def run(self):
+        try:
+            self.check()
+            result = self.work(self)
+            self.check()
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+class CalculationExecutor(QObject):
+    """
+    Исполнитель расчетов в собственном пуле потоков с ограниченной очередью:
+    если задач (ожидающих и выполняемых) уже max_queue, новая не принимается.
+    Методы исполнителя вызываются из GUI-потока
+    """
+
+    def __init__(self, workers=None, max_queue=16, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(workers or max(1, (os.cpu_count() or 1) - 1))
+        self.max_queue = max_queue
+        self.jobs = {}  # сигналы задачи -> задача
+
+    def submit(self, work, on_finished=None, on_failed=None, on_progress=None,
+               on_partial=None, on_cancelled=None):
+        """
+        Ставит work(job) в очередь, обработчики вызываются в GUI-потоке.
+        Возвращает задачу или None, если очередь заполнена
+        """
+        if len(self.jobs) >= self.max_queue:
+            return None
+        job = CalculationJob(work, self)
+        signals = job.signals
+        for signal, handler in ((signals.finished, on_finished), (signals.failed, on_failed),
+                                (signals.progress, on_progress), (signals.partial, on_partial),
+                                (signals.cancelled, on_cancelled)):
+            if handler is not None:
+                signal.connect(handler)
+        # задача освобождается последней: сигналы удаленного объекта не доставляются
+        for signal in (signals.finished, signals.failed, signals.cancelled):
+            signal.connect(self.release)
+        self.jobs[signals] = job
+        self.pool.start(job)
+        return job
+
+    def release(self, *args):
+        self.jobs.pop(self.sender(), None)
+
+    def pending(self):
+        """Число ожидающих и выполняемых задач"""
+        return len(self.jobs)
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            job.cancel()
+
+    def shutdown(self, timeout_ms=-1):
+        """Отменяем все задачи и ждем завершения выполняемых"""
+        self.cancel_all()
+        return self.pool.waitForDone(timeout_ms)
+
+
+class EventLoopMonitor(QObject):
+    """
+    Замер отзывчивости интерфейса: таймер должен срабатывать каждые interval_ms,
+    опоздание срабатывания показывает, сколько GUI-поток был занят
+    """
+
+    def __init__(self, interval_ms=20, parent=None):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.tick)
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        self.total_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.over_50ms = 0
+        self.over_100ms = 0
+        self._last = time.perf_counter()
+
+    def start(self):
+        self.reset()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def tick(self):
+        now = time.perf_counter()
+        lag = max(0.0, (now - self._last) * 1000 - self.interval_ms)
+        self._last = now
+        self.ticks += 1
+        self.total_lag_ms += lag
+        self.max_lag_ms = max(self.max_lag_ms, lag)
+        self.over_50ms += lag > 50
+        self.over_100ms += lag > 100
+
+    def stats(self):
+        return {
+            "ticks": self.ticks,
+            "mean_lag_ms": self.total_lag_ms / self.ticks if self.ticks else 0.0,
+            "max_lag_ms": self.max_lag_ms,
+            "over_50ms": self.over_50ms,
+            "over_100ms": self.over_100ms,
+        }
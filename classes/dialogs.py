@@ -1,12 +1,24 @@
-import json
+import time
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QTableWidget,
-                             QTableWidgetItem, QPushButton,
-                             QHBoxLayout, QComboBox)
-from PyQt6.QtCore import Qt
+                             QTableWidgetItem, QTableView, QPushButton,
+                             QHBoxLayout, QComboBox, QLineEdit, QTabWidget,
+                             QFileDialog, QMessageBox)
+from PyQt6.QtCore import Qt, QTimer
 from const.constans import PHYSICS_CONSTANTS, PHYSICS_UNITS
+from const.formulas import CATEGORIES
+from classes.historyModel import HistoryTableModel
+from classes.sweepModel import SweepTableModel
 
 
 class HistoryDialog(QDialog):
+    # интервалы времени для фильтра (в секундах)
+    PERIODS = {
+        "За все время": None,
+        "За сутки": 24 * 3600,
+        "За неделю": 7 * 24 * 3600,
+        "За месяц": 30 * 24 * 3600,
+    }
+
     def __init__(self, db, parent=None):
         super().__init__(parent)
         self.db = db
@@ -15,35 +27,166 @@ class HistoryDialog(QDialog):
 
         layout = QVBoxLayout()
 
-        # таблица
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(
-            ["Формула", "Входные данные", "Результат", "Время"])
+        # строка поиска и фильтры по разделу и времени
+        search_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Поиск: формула, переменная или значение")
+        self.category_combo = QComboBox()
+        self.category_combo.addItem("Все разделы")
+        self.category_combo.addItems(CATEGORIES)
+        self.period_combo = QComboBox()
+        self.period_combo.addItems(self.PERIODS)
+        search_layout.addWidget(self.search_edit)
+        search_layout.addWidget(self.category_combo)
+        search_layout.addWidget(self.period_combo)
+        layout.addLayout(search_layout)
+
+        # таблица с ленивой подгрузкой истории
+        self.model = HistoryTableModel(db, parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.horizontalHeader().setStretchLastSection(True)
         layout.addWidget(self.table)
 
         self.setLayout(layout)
+
+        # поиск запускается после паузы в наборе текста
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.search_edit.textChanged.connect(self.search_timer.start)
+        self.category_combo.currentIndexChanged.connect(self.apply_search)
+        self.period_combo.currentIndexChanged.connect(self.apply_search)
+
         self.load_history()
 
     def load_history(self):
-        """Загружаем историю в таблицу"""
-        history = self.db.get_history()
-        self.table.setRowCount(len(history))
+        """Загружаем первую страницу истории, остальное подгружается при прокрутке"""
+        self.model.reload()
+        self.table.resizeColumnsToContents()
 
-        for row, record in enumerate(history):
-            id, formula_name, inputs_json, result, timestamp = record
-            inputs = json.loads(inputs_json)  # преобразуем обратно из JSON
+    def apply_search(self):
+        """Применяем строку поиска и фильтры"""
+        category = None
+        if self.category_combo.currentIndex() > 0:
+            category = self.category_combo.currentText()
+        period = self.PERIODS[self.period_combo.currentText()]
+        since = time.time() - period if period is not None else None
+        self.model.set_search(self.search_edit.text(), category, since)
 
-            # форматируем входные данные в красивую строку
-            inputs_str = ", ".join([f"{k} = {v}" for k, v in inputs.items()])
 
-            self.table.setItem(row, 0, QTableWidgetItem(formula_name))
-            self.table.setItem(row, 1, QTableWidgetItem(inputs_str))
-            self.table.setItem(row, 2, QTableWidgetItem(result))
-            self.table.setItem(row, 3, QTableWidgetItem(timestamp))
+class StatsDialog(QDialog):
+    # период статистики: (ключ для БД, сколько секунд показывать)
+    PERIODS = {
+        "По часам (двое суток)": ("hour", 2 * 24 * 3600),
+        "По дням (три месяца)": ("day", 90 * 24 * 3600),
+    }
 
-        self.table.resizeColumnsToContents()
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.setWindowTitle("Статистика вычислений")
+        self.setFixedSize(700, 450)
+
+        layout = QVBoxLayout()
+
+        self.period_combo = QComboBox()
+        self.period_combo.addItems(self.PERIODS)
+        self.period_combo.currentIndexChanged.connect(self.load_stats)
+        layout.addWidget(self.period_combo)
+
+        self.tabs = QTabWidget()
+        self.formulas_table = self.create_table(
+            ["Формула", "Раздел", "Расчетов", "Ошибок", "Доля ошибок", "Последний расчет"])
+        self.usage_table = self.create_table(["Интервал", "Расчетов", "Ошибок"])
+        self.results_table = self.create_table(
+            ["Формула", "Переменная", "Количество", "Минимум", "Максимум", "Среднее"])
+        self.tabs.addTab(self.formulas_table, "Формулы")
+        self.tabs.addTab(self.usage_table, "По времени")
+        self.tabs.addTab(self.results_table, "Результаты")
+        layout.addWidget(self.tabs)
+
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn)
+
+        self.setLayout(layout)
+        self.load_stats()
+
+    def create_table(self, headers):
+        table = QTableWidget()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def fill_table(self, table, rows):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(value))
+        table.resizeColumnsToContents()
+
+    def load_stats(self):
+        """Загружаем статистику из сводных таблиц"""
+        period, length = self.PERIODS[self.period_combo.currentText()]
+        stats = self.db.stats(period, since=time.time() - length)
+        time_format = "%Y-%m-%d %H:00" if period == "hour" else "%Y-%m-%d"
+
+        self.fill_table(self.formulas_table, [
+            (name, category or "", str(calculations), str(errors), f"{error_rate:.1%}",
+             time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_timestamp)))
+            for name, category, calculations, errors, error_rate, last_timestamp in stats["formulas"]])
+        self.fill_table(self.usage_table, [
+            (time.strftime(time_format, time.localtime(bucket)), str(calculations), str(errors))
+            for bucket, calculations, errors in stats["usage"]])
+        self.fill_table(self.results_table, [
+            (name, target, str(count), f"{minimum:.6g}", f"{maximum:.6g}", f"{mean:.6g}")
+            for name, target, count, minimum, maximum, mean in stats["results"]])
+
+
+class SweepDialog(QDialog):
+    """Таблица результатов расчета по диапазонам с сохранением в CSV"""
+
+    def __init__(self, sweep, precision=6, parent=None):
+        super().__init__(parent)
+        self.sweep = sweep
+        self.setWindowTitle(f"Расчет по диапазону: {sweep.formula_name}")
+        self.resize(800, 500)
+
+        layout = QVBoxLayout()
+
+        axes = " × ".join(f"{name} ({len(values)} точек)" for name, values in sweep.axes)
+        layout.addWidget(QLabel(f"{sweep.target} для {axes}"))
+
+        # ячейки формируются только для видимой части таблицы
+        self.table = QTableView()
+        self.table.setModel(SweepTableModel(sweep, precision, self.table))
+        layout.addWidget(self.table)
+
+        buttons_layout = QHBoxLayout()
+        save_btn = QPushButton("Сохранить в файл")
+        save_btn.clicked.connect(self.save)
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        buttons_layout.addWidget(save_btn)
+        buttons_layout.addWidget(close_btn)
+        layout.addLayout(buttons_layout)
+
+        self.setLayout(layout)
+
+    def save(self):
+        from sweep import save_sweep
+
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Сохранить результаты", f"{self.sweep.target}.csv", "CSV (*.csv)")
+        if not path:
+            return
+        try:
+            save_sweep(self.sweep, path)
+        except OSError as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить файл: {e}")
 
 
 class ConstantsDialog(QDialog):
@@ -90,6 +233,9 @@ class ConstantsDialog(QDialog):
 
             for name, data in constants.items():
                 self.constants_table.insertRow(row)
+                # обозначение можно вводить в поля вместо значения
+                if "symbol" in data:
+                    name = f"{name} ({data['symbol']})"
                 self.constants_table.setItem(row, 0, QTableWidgetItem(name))
                 self.constants_table.setItem(
                     row, 1, QTableWidgetItem(data["value"]))
@@ -181,11 +327,24 @@ class AboutDialog(QDialog):
 
 
 class SettingsDialog(QDialog):
+    RETENTION = {
+        "30 дней": 30,
+        "90 дней": 90,
+        "1 год": 365,
+        "Всегда": None,
+    }
+    # оценка погрешности результата: (метод, размер выборки)
+    UNCERTAINTY = {
+        "Монте-Карло, 10⁵ точек": ("monte_carlo", 100_000),
+        "Монте-Карло, 10⁶ точек": ("monte_carlo", 1_000_000),
+        "Линейная оценка": ("linear", None),
+    }
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
         self.setWindowTitle("Настройки")
-        self.setFixedSize(250, 150)
+        self.setFixedSize(250, 260)
 
         layout = QVBoxLayout()
 
@@ -203,6 +362,21 @@ class SettingsDialog(QDialog):
 
         self.precision_combo.setCurrentText(str(current_precision))
 
+        # срок хранения истории в основной БД (старые записи уходят в архив)
+        self.retention_combo = QComboBox()
+        self.retention_combo.addItems(self.RETENTION)
+        current_retention = getattr(getattr(parent, 'db', None), 'retention_days', None)
+        for text, days in self.RETENTION.items():
+            if days == current_retention:
+                self.retention_combo.setCurrentText(text)
+
+        self.uncertainty_combo = QComboBox()
+        self.uncertainty_combo.addItems(self.UNCERTAINTY)
+        current_uncertainty = getattr(parent, 'uncertainty_method', None)
+        for text, method in self.UNCERTAINTY.items():
+            if method == current_uncertainty:
+                self.uncertainty_combo.setCurrentText(text)
+
         buttons_layout = QHBoxLayout()
         ok_btn = QPushButton("OK")
         cancel_btn = QPushButton("Отмена")
@@ -215,6 +389,10 @@ class SettingsDialog(QDialog):
 
         layout.addWidget(title)
         layout.addWidget(self.precision_combo)
+        layout.addWidget(QLabel("Хранить историю:"))
+        layout.addWidget(self.retention_combo)
+        layout.addWidget(QLabel("Погрешность результата:"))
+        layout.addWidget(self.uncertainty_combo)
         layout.addLayout(buttons_layout)
 
         self.setLayout(layout)
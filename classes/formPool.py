@@ -0,0 +1,56 @@
+from PyQt6.QtWidgets import QWidget, QStackedWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit
+
+
+class FormPool(QStackedWidget):
+    """
+    Формы ввода переменных. Форма каждой формулы создается один раз и дальше
+    только показывается, поэтому значения полей сохраняются между переключениями
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.forms = {}  # формула -> (виджет формы, {переменная: поле ввода})
+        # пустая страница, пока формула не выбрана
+        self.addWidget(QWidget())
+
+    def show_form(self, formula_name, variables):
+        """Показываем форму формулы (создается при первом выборе), возвращаем ее поля"""
+        form = self.forms.get(formula_name)
+        if form is None:
+            form = self.forms[formula_name] = self.build_form(variables)
+            self.addWidget(form[0])
+        self.setCurrentWidget(form[0])
+        return form[1]
+
+    @staticmethod
+    def build_form(variables):
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(8)
+
+        fields = {}
+        for var_name, var_info in variables.items():
+            var_layout = QHBoxLayout()
+
+            label = QLabel(f"{var_name}:")
+            label.setFixedWidth(80)
+            label.setObjectName("variableLabel")
+
+            input_field = QLineEdit()
+            input_field.setPlaceholderText(
+                f"{var_info['description']} ({var_info['unit']})")
+            input_field.setToolTip("Число с единицей измерения (5 кН, 220 мВ), обозначение постоянной\n"
+                                   "из справочника (g, c, k_B) или диапазон\n"
+                                   "начало..конец:точек, например 0..100:1000 (log - логарифмическая шкала).\n"
+                                   "В поле искомой величины можно указать единицу результата")
+
+            var_layout.addWidget(label)
+            var_layout.addWidget(input_field)
+            layout.addLayout(var_layout)
+
+            fields[var_name] = input_field
+
+        # формы разной высоты прижимаются к верху
+        layout.addStretch()
+        return widget, fields
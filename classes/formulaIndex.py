@@ -0,0 +1,168 @@
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+# сколько формул показывать в результатах поиска
+MAX_RESULTS = 100
+
+# вес совпадения в зависимости от поля формулы
+WEIGHTS = {"name": 3.0, "symbol": 2.0, "description": 1.0, "unit": 1.0, "category": 1.0}
+
+# качество совпадения слова запроса с термином
+EXACT, PREFIX, FUZZY = 1.0, 0.7, 0.4
+
+WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    # Eₖ -> ek, ё -> е, регистр не важен
+    return unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+
+
+def trigrams(text):
+    # пробел только в начале: опечатка в незаконченном слове тоже находится
+    text = f" {text}"
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Расстояние Дамерау-Левенштейна, если оно не больше limit, иначе limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class FormulaIndex:
+    """
+    Поисковый индекс формул по названиям, обозначениям и описаниям переменных,
+    единицам и разделам. Термины хранятся в отсортированном списке (поиск по
+    началу слова) и в индексе триграмм (поиск с опечатками)
+    """
+
+    def __init__(self, categories=None):
+        self.categories = {}  # формула -> раздел
+        self.postings = {}  # термин -> {формула: вес}
+        self.terms = []  # отсортированные термины
+        self.trigram_terms = {}  # триграмма -> термины
+        self.formula_terms = {}  # формула -> ее термины (для обновления)
+        for category, formulas in (categories or {}).items():
+            for formula_name, formula_info in formulas.items():
+                self.add_formula(category, formula_name, formula_info)
+
+    def category(self, formula_name):
+        return self.categories.get(formula_name)
+
+    @staticmethod
+    def extract_terms(category, formula_name, formula_info):
+        """Термины формулы с весами полей"""
+        terms = {}
+
+        def add(text, field, split=True):
+            weight = WEIGHTS[field]
+            for term in (WORD.findall(normalize(text)) if split else [normalize(text)]):
+                terms[term] = max(terms.get(term, 0.0), weight)
+
+        add(formula_name, "name")
+        add(category, "category")
+        for var_name, var_info in formula_info["variables"].items():
+            add(var_name, "symbol", split=False)
+            add(var_info.get("description", ""), "description")
+            # единицы целиком (м/с²) и по частям (м, с)
+            unit = var_info.get("unit", "")
+            if unit.strip("-"):
+                add(unit, "unit", split=False)
+                add(unit, "unit")
+        return terms
+
+    def add_formula(self, category, formula_name, formula_info):
+        """Добавляет формулу в индекс (повторное добавление обновляет ее)"""
+        if formula_name in self.categories:
+            self.remove_formula(formula_name)
+        terms = self.extract_terms(category, formula_name, formula_info)
+        self.categories[formula_name] = category
+        self.formula_terms[formula_name] = terms
+        for term, weight in terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                insort(self.terms, term)
+                for trigram in trigrams(term):
+                    self.trigram_terms.setdefault(trigram, set()).add(term)
+            posting[formula_name] = weight
+
+    def remove_formula(self, formula_name):
+        del self.categories[formula_name]
+        for term in self.formula_terms.pop(formula_name):
+            posting = self.postings[term]
+            del posting[formula_name]
+            if not posting:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+                for trigram in trigrams(term):
+                    self.trigram_terms[trigram].discard(term)
+
+    def match_word(self, word):
+        """Термины, подходящие к слову запроса: {термин: качество совпадения}"""
+        matches = {}
+        # совпадение по началу термина (включая точное)
+        start = bisect_left(self.terms, word)
+        for term in self.terms[start:]:
+            if not term.startswith(word):
+                break
+            matches[term] = EXACT if term == word else PREFIX
+
+        # опечатки: кандидаты по общим триграммам, затем расстояние до начала термина
+        if len(word) >= 3:
+            limit = 1 if len(word) <= 5 else 2
+            word_trigrams = trigrams(word)
+            shared = {}
+            for trigram in word_trigrams:
+                for term in self.trigram_terms.get(trigram, ()):
+                    shared[term] = shared.get(term, 0) + 1
+            required = max(1, len(word_trigrams) - 3 * limit)
+            for term, count in shared.items():
+                if count < required or term in matches:
+                    continue
+                distance = edit_distance(word, term[:len(word)], limit)
+                if distance <= limit:
+                    matches[term] = FUZZY / distance
+        return matches
+
+    def search(self, query, limit=MAX_RESULTS):
+        """
+        Формулы, подходящие под все слова запроса, лучшие первыми.
+        Возвращает список (раздел, формула)
+        """
+        scores = None
+        for word in WORD.findall(normalize(query)) or [normalize(query).strip()]:
+            if not word:
+                continue
+            word_scores = {}
+            for term, quality in self.match_word(word).items():
+                for formula_name, weight in self.postings[term].items():
+                    score = weight * quality
+                    if score > word_scores.get(formula_name, 0.0):
+                        word_scores[formula_name] = score
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {name: score + word_scores[name]
+                          for name, score in scores.items() if name in word_scores}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.categories[name], name) for name, _ in ranked[:limit]]
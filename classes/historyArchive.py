@@ -0,0 +1,76 @@
+import gzip
+import json
+import os
+import time
+
+
+class HistoryArchive:
+    """
+    Архив старой истории: по одному сжатому файлу JSON Lines на месяц
+    (history-YYYY-MM.jsonl.gz). Файлы только дописываются, читаются без изменения
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    @staticmethod
+    def month_of(timestamp):
+        return time.strftime("%Y-%m", time.localtime(timestamp))
+
+    def path_for(self, month):
+        return os.path.join(self.directory, f"history-{month}.jsonl.gz")
+
+    def months(self):
+        """Список месяцев, для которых есть архив"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[len("history-"):-len(".jsonl.gz")]
+                      for name in os.listdir(self.directory)
+                      if name.startswith("history-") and name.endswith(".jsonl.gz"))
+
+    def append(self, records):
+        """
+        Дописывает записи в архив. records - кортежи
+        (id, формула, раздел, искомая переменная, результат, время, {переменная: значение})
+        """
+        by_month = {}
+        for record in records:
+            by_month.setdefault(self.month_of(record[5]), []).append(record)
+
+        os.makedirs(self.directory, exist_ok=True)
+        for month, month_records in by_month.items():
+            lines = "".join(json.dumps({
+                "id": id, "formula": formula_name, "category": category,
+                "target": target, "result": result, "timestamp": timestamp,
+                "inputs": inputs,
+            }, ensure_ascii=False) + "\n"
+                for id, formula_name, category, target, result, timestamp, inputs in month_records)
+            # каждое дописывание - отдельный gzip-блок, старые данные не переписываются
+            with open(self.path_for(month), "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="ab") as archive:
+                    archive.write(lines.encode("utf-8"))
+                raw.flush()
+                os.fsync(raw.fileno())
+
+    def query(self, since=None, until=None, formula_name=None):
+        """
+        Читает записи архива (только чтение), открывая лишь файлы нужных месяцев.
+        Возвращает кортежи (id, формула, {переменная: значение}, результат, время)
+        """
+        first = self.month_of(since) if since is not None else None
+        last = self.month_of(until) if until is not None else None
+        for month in self.months():
+            if (first is not None and month < first) or (last is not None and month > last):
+                continue
+            with gzip.open(self.path_for(month), "rt", encoding="utf-8") as archive:
+                for line in archive:
+                    record = json.loads(line)
+                    timestamp = record["timestamp"]
+                    if since is not None and timestamp < since:
+                        continue
+                    if until is not None and timestamp >= until:
+                        continue
+                    if formula_name is not None and record["formula"] != formula_name:
+                        continue
+                    yield (record["id"], record["formula"], record["inputs"],
+                           record["result"], timestamp)
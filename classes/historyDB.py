@@ -1,38 +1,869 @@
 import sqlite3
 import json
+import atexit
+import logging
+import queue
+import threading
+import os
+import time
 from datetime import datetime
+from const.formulas import CATEGORIES
+from classes.historyArchive import HistoryArchive
+
+STOP = object()
+
+log = logging.getLogger(__name__)
+
+# повторные попытки записи пачки истории (БД занята, ошибка диска) и пауза перед первой
+WRITE_RETRIES = 3
+RETRY_DELAY = 0.1
+
+# версия схемы БД (хранится в PRAGMA user_version)
+SCHEMA_VERSION = 4
+
+# длина интервалов статистики использования
+STATS_PERIODS = ("hour", "day")
+
+# значение PRAGMA auto_vacuum для режима INCREMENTAL
+INCREMENTAL_VACUUM = 2
+
+# раздел физики для каждой формулы (по заголовкам каталога, без загрузки формул)
+FORMULA_CATEGORIES = CATEGORIES.formula_categories
+
+# начало суток по местному времени для времени в секундах (SQL)
+DAY_START = "CAST(strftime('%s', {0}, 'unixepoch', 'localtime', 'start of day', 'utc') AS INTEGER)"
+
+# допустимые операторы сравнения в фильтрах по значениям переменных
+COMPARISON_OPERATORS = ("<", "<=", ">", ">=", "=", "!=")
+
+
+def connect(db_path):
+    """Открывает соединение с БД в режиме WAL"""
+    conn = sqlite3.connect(db_path)
+    # постепенная очистка включается только до первой записи в новый файл,
+    # переход в WAL уже записывает заголовок; у старых баз это ничего не меняет
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('PRAGMA journal_mode=WAL')
+    # в режиме WAL NORMAL не портит базу и не ждет fsync на каждой транзакции
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA foreign_keys=ON')
+    return conn
+
+
+def to_float(value):
+    """Преобразует значение поля ввода в число (None, если это не число)"""
+    if value is None:
+        return None
+    try:
+        return float(str(value).strip().replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def legacy_target(inputs, result):
+    """
+    Искомая переменная записи старого формата. Старое приложение сохраняло ее
+    вместе с введенными значениями: это поле без значения или поле, куда
+    записан результат (округленный до нескольких знаков)
+    """
+    empty = [name for name, value in inputs.items() if not str(value).strip()]
+    if len(empty) == 1:
+        return empty[0]
+    number = to_float(result)
+    if number is None:
+        return None
+    # число знаков после точки у поля с результатом: введенное пользователем
+    # совпадающее значение обычно записано короче
+    matches = {}
+    for name, value in inputs.items():
+        text = str(value).strip().replace(',', '.')
+        decimals = len(text.partition('.')[2])
+        if to_float(text) is not None and text == f"{number:.{decimals}f}":
+            matches[name] = decimals
+    if not matches:
+        return None
+    most = max(matches.values())
+    best = [name for name, decimals in matches.items() if decimals == most]
+    return best[0] if len(best) == 1 else None
+
+
+def to_epoch(value):
+    """datetime или число секунд -> целое время в секундах"""
+    return int(value.timestamp() if isinstance(value, datetime) else value)
+
+
+def add_time_filters(query, params, since=None, until=None):
+    """Добавляет в запрос условия на интервал времени [since, until)"""
+    if since is not None:
+        query.append('AND h.timestamp >= ?')
+        params.append(to_epoch(since))
+    if until is not None:
+        query.append('AND h.timestamp < ?')
+        params.append(to_epoch(until))
+
+
+def fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def fts_query(text, category=None):
+    """
+    Строка поиска -> запрос FTS5: каждое слово ищется по префиксу,
+    раздел физики задается фильтром по столбцу category
+    """
+    match = ' '.join(fts_phrase(word) + '*' for word in text.split())
+    if match and category is not None:
+        match = f'({match}) AND category : {fts_phrase(category)}'
+    return match
+
+
+def day_start(timestamp):
+    """Начало суток (по местному времени) для момента времени в секундах"""
+    return int(datetime.fromtimestamp(timestamp).replace(
+        hour=0, minute=0, second=0, microsecond=0).timestamp())
+
+
+def get_formula_id(conn, formula_name, formula_ids):
+    """Идентификатор формулы (формула добавляется в справочник при первом упоминании)"""
+    formula_id = formula_ids.get(formula_name)
+    if formula_id is None:
+        conn.execute('INSERT OR IGNORE INTO formulas (name, category) VALUES (?, ?)',
+                     (formula_name, FORMULA_CATEGORIES.get(formula_name)))
+        formula_id = conn.execute('SELECT id FROM formulas WHERE name = ?',
+                                  (formula_name,)).fetchone()[0]
+        formula_ids[formula_name] = formula_id
+    return formula_id
+
+
+def fts_document(history_id, formula_name, inputs):
+    """Строка полнотекстового индекса для записи истории"""
+    return (history_id, formula_name, FORMULA_CATEGORIES.get(formula_name),
+            ' '.join(variable for variable, value in inputs),
+            ' '.join(f'{value:.15g}' for variable, value in inputs if value is not None))
+
+
+def index_documents(conn, first_id=0):
+    """Добавляет в полнотекстовый индекс записи истории с id >= first_id (одним запросом)"""
+    conn.execute('''INSERT INTO history_fts (rowid, formula, category, variables, vals)
+                    SELECT h.id, f.name, f.category,
+                           ifnull(group_concat(v.variable, ' '), ''),
+                           ifnull(group_concat(CASE WHEN v.value IS NOT NULL
+                                               THEN printf('%.15g', v.value) END, ' '), '')
+                    FROM history h JOIN formulas f ON f.id = h.formula_id
+                    LEFT JOIN history_values v ON v.history_id = h.id
+                    WHERE h.id >= ?
+                    GROUP BY h.id''', (first_id,))
+
+
+def add_history_stats(conn, first_id=0):
+    """Учитывает в сводной статистике записи истории с id >= first_id (без триггера)"""
+    conn.execute('''INSERT INTO formula_stats (formula_id, calculations, errors, last_timestamp)
+                    SELECT formula_id, count(*), 0, max(timestamp)
+                    FROM history WHERE id >= ? GROUP BY formula_id
+                    ON CONFLICT (formula_id) DO UPDATE
+                    SET calculations = calculations + excluded.calculations,
+                        last_timestamp = max(last_timestamp, excluded.last_timestamp)''',
+                 (first_id,))
+    for period, bucket in (('hour', 'timestamp - timestamp % 3600'),
+                           ('day', DAY_START.format('timestamp'))):
+        conn.execute(f'''INSERT INTO usage_stats (period, bucket, formula_id, calculations, errors)
+                         SELECT '{period}', {bucket}, formula_id, count(*), 0
+                         FROM history WHERE id >= ? GROUP BY 2, 3
+                         ON CONFLICT (period, bucket, formula_id) DO UPDATE
+                         SET calculations = calculations + excluded.calculations''',
+                     (first_id,))
+    conn.execute('''INSERT INTO result_stats (formula_id, target, count, min_result, max_result, sum_result)
+                    SELECT formula_id, target, count(*), min(result), max(result), sum(result)
+                    FROM history
+                    WHERE id >= ? AND target IS NOT NULL AND result IS NOT NULL
+                    GROUP BY formula_id, target
+                    ON CONFLICT (formula_id, target) DO UPDATE
+                    SET count = count + excluded.count,
+                        min_result = min(min_result, excluded.min_result),
+                        max_result = max(max_result, excluded.max_result),
+                        sum_result = sum_result + excluded.sum_result''',
+                 (first_id,))
+
+
+def insert_records(conn, records, formula_ids):
+    """
+    Записывает записи истории в нормализованные таблицы и полнотекстовый индекс.
+    records - кортежи (формула, искомая переменная, [(переменная, значение)], результат, время);
+    запись с inputs = None - неудачный расчет, он учитывается только в статистике.
+    formula_ids - кэш идентификаторов формул
+    """
+    values = []
+    documents = []
+    error_formulas = []
+    error_usage = []
+    for formula_name, target, inputs, result, timestamp in records:
+        formula_id = get_formula_id(conn, formula_name, formula_ids)
+        if inputs is None:
+            error_formulas.append((formula_id, timestamp))
+            error_usage.append(("hour", timestamp - timestamp % 3600, formula_id))
+            error_usage.append(("day", day_start(timestamp), formula_id))
+            continue
+        cursor = conn.execute('INSERT INTO history (formula_id, target, result, timestamp) VALUES (?, ?, ?, ?)',
+                              (formula_id, target, result, timestamp))
+        history_id = cursor.lastrowid
+        values.extend((history_id, variable, value) for variable, value in inputs)
+        # документ индекса собирается сразу целиком: обновлять его по одной переменной дорого
+        documents.append(fts_document(history_id, formula_name, inputs))
+    conn.executemany('INSERT INTO history_values (history_id, variable, value) VALUES (?, ?, ?)',
+                     values)
+    conn.executemany('INSERT INTO history_fts (rowid, formula, category, variables, vals) VALUES (?, ?, ?, ?, ?)',
+                     documents)
+    if error_formulas:
+        # успешные расчеты попадают в статистику триггером, ошибки - здесь
+        conn.executemany('''INSERT INTO formula_stats (formula_id, calculations, errors, last_timestamp)
+                            VALUES (?, 0, 1, ?)
+                            ON CONFLICT (formula_id) DO UPDATE SET errors = errors + 1,
+                                last_timestamp = max(last_timestamp, excluded.last_timestamp)''',
+                         error_formulas)
+        conn.executemany('''INSERT INTO usage_stats (period, bucket, formula_id, calculations, errors)
+                            VALUES (?, ?, ?, 0, 1)
+                            ON CONFLICT (period, bucket, formula_id) DO UPDATE SET errors = errors + 1''',
+                         error_usage)
+
+
+def load_inputs(conn, ids):
+    """Значения переменных для записей истории: {id: {переменная: значение}}"""
+    inputs = {id: {} for id in ids}
+    # идентификаторы передаем порциями, чтобы не превысить лимит параметров SQLite
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ', '.join('?' * len(chunk))
+        for history_id, variable, value in conn.execute(
+                f'''SELECT history_id, variable, value FROM history_values
+                    WHERE history_id IN ({placeholders}) ORDER BY rowid''',
+                chunk):
+            inputs[history_id][variable] = value
+    return inputs
+
+
+def archive_old_records(conn, archive, cutoff, chunk_size=5000):
+    """
+    Переносит записи старше cutoff в архив порциями. Каждая порция сначала
+    записывается в архив, затем удаляется из БД в той же транзакции.
+    Сводная статистика при этом сохраняется. Возвращает число перенесенных записей
+    """
+    moved = 0
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                '''SELECT h.id, f.name, f.category, h.target, h.result, h.timestamp
+                   FROM history h JOIN formulas f ON f.id = h.formula_id
+                   WHERE h.timestamp < ? ORDER BY h.timestamp, h.id LIMIT ?''',
+                (cutoff, chunk_size)).fetchall()
+            if not rows:
+                conn.execute('COMMIT')
+                return moved
+            inputs = load_inputs(conn, [row[0] for row in rows])
+            archive.append([row + (inputs[row[0]],) for row in rows])
+
+            # значения переменных удаляются каскадно, полнотекстовый индекс - триггером
+            last_timestamp, last_id = rows[-1][5], rows[-1][0]
+            conn.execute('DELETE FROM history WHERE (timestamp, id) <= (?, ?) AND timestamp < ?',
+                         (last_timestamp, last_id, cutoff))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        moved += len(rows)
+
+
+def compact(conn):
+    """Возвращаем освободившееся место файлу БД"""
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != INCREMENTAL_VACUUM:
+        # старые базы один раз переводятся в режим постепенной очистки
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+    else:
+        conn.execute('PRAGMA incremental_vacuum')
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+class HistoryWriter(threading.Thread):
+    """Фоновый поток, который записывает историю пачками в одной транзакции"""
+
+    def __init__(self, db_path, batch_size=500, flush_interval=1.0):
+        super().__init__(name="HistoryWriter", daemon=True)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.formula_ids = {}
+        self.last_error = None
+
+    def run(self):
+        conn = connect(self.db_path)
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if not batch else max(0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                # истек интервал сброса; несохраненная пачка ждет следующего интервала
+                self.write(conn, batch)
+                deadline = time.monotonic() + self.flush_interval
+                continue
+
+            if item is STOP:
+                self.write(conn, batch)
+                if batch:
+                    log.error("История: при закрытии не сохранено записей: %d", len(batch))
+                break
+            if isinstance(item, threading.Event):
+                # запрос немедленного сброса
+                self.write(conn, batch)
+                item.set()
+                continue
+            if callable(item):
+                # обслуживание БД (архивация, сжатие) выполняется в этом же потоке
+                self.write(conn, batch)
+                try:
+                    item(conn)
+                except (sqlite3.Error, OSError) as e:
+                    self.last_error = e
+                    log.error("История: ошибка обслуживания БД: %s", e)
+                continue
+
+            batch.append(item)
+            if len(batch) == 1:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self.write(conn, batch)
+        conn.close()
+
+    def write(self, conn, batch):
+        """
+        Записывает накопленные записи одной транзакцией. Если БД недоступна,
+        запись повторяется; после неудачных попыток пачка остается в batch и
+        пишется при следующем сбросе. Пачка с неверной записью пишется по одной
+        записи, пропускаются только неверные
+        """
+        delay = RETRY_DELAY
+        for attempt in range(WRITE_RETRIES):
+            if not batch:
+                return
+            try:
+                with conn:
+                    insert_records(conn, batch, self.formula_ids)
+            except sqlite3.OperationalError as e:
+                # БД занята другим процессом, нет места на диске и т.п.
+                self.last_error = e
+                self.formula_ids.clear()
+                if attempt + 1 < WRITE_RETRIES:
+                    time.sleep(delay)
+                    delay *= 2
+                continue
+            except sqlite3.Error as e:
+                self.last_error = e
+                self.formula_ids.clear()
+                self.write_each(conn, batch)
+                if batch:
+                    break
+            batch.clear()
+            return
+        log.warning("История: не удалось записать %d записей (%s), повтор при следующем сбросе",
+                    len(batch), self.last_error)
+
+    def write_each(self, conn, batch):
+        """
+        Записывает пачку по одной записи, неверные записи пропускаются с сообщением
+        в лог. Если БД стала недоступна, в batch остаются незаписанные записи
+        """
+        for index, record in enumerate(batch):
+            try:
+                with conn:
+                    insert_records(conn, [record], self.formula_ids)
+            except sqlite3.OperationalError as e:
+                self.last_error = e
+                self.formula_ids.clear()
+                del batch[:index]
+                return
+            except sqlite3.Error as e:
+                self.last_error = e
+                self.formula_ids.clear()
+                log.error("История: запись %s пропущена: %s", record[0], e)
+        batch.clear()
+
 
 class HistoryDB:
-    def __init__(self):
-        self.conn = sqlite3.connect('history.db')
+    def __init__(self, db_path='history.db', write_behind=False, batch_size=500,
+                 flush_interval=1.0, retention_days=None):
+        self.db_path = db_path
+        self.conn = connect(db_path)
+        self.formula_ids = {}
         self.create_table()
 
+        # записи старше retention_days переносятся в архив (None - хранить все в БД);
+        # срок, выбранный в настройках, хранится в самой БД, retention_days - значение
+        # по умолчанию, пока он не выбран
+        self.retention_days = self.get_setting('retention_days', retention_days)
+        self.archive = HistoryArchive(
+            os.path.join(os.path.dirname(os.path.abspath(db_path)), 'history_archive'))
+
+        # отложенная запись: записи копятся в очереди и пишутся фоновым потоком
+        self.writer = None
+        if write_behind:
+            self.writer = HistoryWriter(db_path, batch_size, flush_interval)
+            self.writer.start()
+            atexit.register(self.close)
+
     def create_table(self):
-        """Создаем одну таблицу для истории"""
+        """Создаем таблицы истории и при необходимости обновляем старую схему"""
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        # все шаги обновления выполняются в одной транзакции
+        self.conn.execute('BEGIN')
+        try:
+            if version < 1:
+                self.upgrade_to_normalized()
+            if version < 2:
+                self.upgrade_to_search()
+            if version < 3:
+                self.upgrade_to_stats()
+            if version < 4:
+                self.upgrade_to_settings()
+            self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def upgrade_to_normalized(self):
+        """Версия 1: нормализованные таблицы с типизированными столбцами"""
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(history)')]
+        legacy = 'inputs' in columns
+        if legacy:
+            # старая схема: входные данные в JSON, результат и время - текст
+            self.conn.execute('ALTER TABLE history RENAME TO history_legacy')
+
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS formulas
+                         (id INTEGER PRIMARY KEY,
+                          name TEXT NOT NULL UNIQUE)''')
         self.conn.execute('''CREATE TABLE IF NOT EXISTS history
                          (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                          formula_name TEXT,
-                          inputs TEXT,
-                          result TEXT,
-                          timestamp TEXT)''')
-        self.conn.commit()
+                          formula_id INTEGER NOT NULL REFERENCES formulas (id),
+                          target TEXT,
+                          result REAL,
+                          timestamp INTEGER NOT NULL)''')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS history_values
+                         (history_id INTEGER NOT NULL
+                              REFERENCES history (id) ON DELETE CASCADE,
+                          variable TEXT NOT NULL,
+                          value REAL)''')
+
+        if legacy:
+            self.migrate_legacy()
+            self.conn.execute('DROP TABLE history_legacy')
+
+        # индексы: сортировка по времени, фильтры по формуле и по значениям переменных
+        self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_history_timestamp
+                             ON history (timestamp, id)''')
+        self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_history_formula
+                             ON history (formula_id, timestamp)''')
+        self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_values_history
+                             ON history_values (history_id)''')
+        self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_values_variable
+                             ON history_values (variable, value)''')
+
+    def upgrade_to_search(self):
+        """
+        Версия 2: раздел физики у формул и полнотекстовый индекс FTS5.
+        Документ индекса добавляется в той же транзакции, что и запись истории
+        (insert_records), удаление синхронизирует триггер
+        """
+        self.conn.execute('ALTER TABLE formulas ADD COLUMN category TEXT')
+        self.conn.executemany('UPDATE formulas SET category = ? WHERE name = ?',
+                              [(category, name) for name, category in FORMULA_CATEGORIES.items()])
+        self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_formulas_category
+                             ON formulas (category)''')
+
+        # точка и минус входят в токен, чтобы числа вида -1.5 искались целиком;
+        # префиксные индексы ускоряют поиск по началу слова при наборе
+        self.conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5
+                             (formula, category, variables, vals,
+                              tokenize = "unicode61 tokenchars '.-'",
+                              prefix = '1 2 3')''')
+        self.conn.execute('''CREATE TRIGGER IF NOT EXISTS history_fts_delete
+                             AFTER DELETE ON history BEGIN
+                                 DELETE FROM history_fts WHERE rowid = old.id;
+                             END''')
+
+        # индексируем уже накопленную историю
+        index_documents(self.conn)
+
+    def upgrade_to_stats(self):
+        """
+        Версия 3: сводные таблицы статистики. Они обновляются триггером при каждой
+        вставке, поэтому запросы к ним не зависят от размера истории
+        """
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS formula_stats
+                         (formula_id INTEGER PRIMARY KEY REFERENCES formulas (id),
+                          calculations INTEGER NOT NULL,
+                          errors INTEGER NOT NULL,
+                          last_timestamp INTEGER)''')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS usage_stats
+                         (period TEXT NOT NULL,
+                          bucket INTEGER NOT NULL,
+                          formula_id INTEGER NOT NULL REFERENCES formulas (id),
+                          calculations INTEGER NOT NULL,
+                          errors INTEGER NOT NULL,
+                          PRIMARY KEY (period, bucket, formula_id))''')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS result_stats
+                         (formula_id INTEGER NOT NULL REFERENCES formulas (id),
+                          target TEXT NOT NULL,
+                          count INTEGER NOT NULL,
+                          min_result REAL,
+                          max_result REAL,
+                          sum_result REAL,
+                          PRIMARY KEY (formula_id, target))''')
+
+        self.conn.execute(f'''CREATE TRIGGER IF NOT EXISTS history_stats
+                             AFTER INSERT ON history BEGIN
+                                 INSERT INTO formula_stats (formula_id, calculations, errors, last_timestamp)
+                                 VALUES (new.formula_id, 1, 0, new.timestamp)
+                                 ON CONFLICT (formula_id) DO UPDATE
+                                 SET calculations = calculations + 1,
+                                     last_timestamp = max(last_timestamp, excluded.last_timestamp);
+
+                                 INSERT INTO usage_stats (period, bucket, formula_id, calculations, errors)
+                                 VALUES ('hour', new.timestamp - new.timestamp % 3600, new.formula_id, 1, 0),
+                                        ('day', {DAY_START.format('new.timestamp')}, new.formula_id, 1, 0)
+                                 ON CONFLICT (period, bucket, formula_id) DO UPDATE
+                                 SET calculations = calculations + 1;
+
+                                 INSERT INTO result_stats (formula_id, target, count, min_result, max_result, sum_result)
+                                 SELECT new.formula_id, new.target, 1, new.result, new.result, new.result
+                                 WHERE new.target IS NOT NULL AND new.result IS NOT NULL
+                                 ON CONFLICT (formula_id, target) DO UPDATE
+                                 SET count = count + 1,
+                                     min_result = min(min_result, excluded.min_result),
+                                     max_result = max(max_result, excluded.max_result),
+                                     sum_result = sum_result + excluded.sum_result;
+                             END''')
+
+        # статистика по уже накопленной истории
+        add_history_stats(self.conn)
+
+    def upgrade_to_settings(self):
+        """Версия 4: настройки истории (срок хранения), чтобы они переживали перезапуск"""
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS settings
+                         (key TEXT PRIMARY KEY,
+                          value)''')
+
+    def get_setting(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def set_setting(self, key, value):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+                              (key, value))
+
+    def set_retention(self, retention_days):
+        """Новый срок хранения истории (сохраняется в БД)"""
+        self.retention_days = retention_days
+        self.set_setting('retention_days', retention_days)
 
-    def add_calculation(self, formula_name, inputs, result):
+    def migrate_legacy(self, chunk_size=10000):
+        """Переносим записи из старой таблицы (JSON и текстовые поля) в новую схему"""
+        cursor = self.conn.execute(
+            'SELECT id, formula_name, inputs, result, timestamp FROM history_legacy ORDER BY id')
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            history = []
+            values = []
+            for id, formula_name, inputs_json, result, timestamp in rows:
+                formula_id = self.formula_ids.get(formula_name)
+                if formula_id is None:
+                    formula_id = self.conn.execute('INSERT INTO formulas (name) VALUES (?)',
+                                                   (formula_name or '',)).lastrowid
+                    self.formula_ids[formula_name] = formula_id
+                try:
+                    epoch = int(datetime.fromisoformat(timestamp).timestamp())
+                except (TypeError, ValueError):
+                    epoch = 0
+                try:
+                    inputs = json.loads(inputs_json)
+                except (TypeError, ValueError):
+                    inputs = {}
+                # идентификаторы записей сохраняются, поэтому вставляем пачкой
+                history.append((id, formula_id, legacy_target(inputs, result), to_float(result), epoch))
+                values.extend((id, name, to_float(value)) for name, value in inputs.items())
+            self.conn.executemany('INSERT INTO history (id, formula_id, target, result, timestamp) VALUES (?, ?, ?, ?, ?)',
+                                  history)
+            self.conn.executemany('INSERT INTO history_values (history_id, variable, value) VALUES (?, ?, ?)',
+                                  values)
+
+    def add_calculation(self, formula_name, inputs, result, target=None):
         """Добавляем запись в историю"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        inputs_json = json.dumps(inputs)  # сохраняем как JSON
+        timestamp = int(time.time())
+        values = [(name, to_float(value)) for name, value in inputs.items()]
+        record = (formula_name, target, values, to_float(result), timestamp)
+
+        if self.writer is not None:
+            self.writer.queue.put(record)
+            return
+
+        with self.conn:
+            insert_records(self.conn, [record], self.formula_ids)
+
+    def add_error(self, formula_name):
+        """Учитываем неудачный расчет в статистике"""
+        record = (formula_name, None, None, None, int(time.time()))
+
+        if self.writer is not None:
+            self.writer.queue.put(record)
+            return
 
-        self.conn.execute('INSERT INTO history (formula_name, inputs, result, timestamp) VALUES (?, ?, ?, ?)',
-                          (formula_name, inputs_json, str(result), timestamp))
-        self.conn.commit()
+        with self.conn:
+            insert_records(self.conn, [record], self.formula_ids)
+
+    def run_maintenance(self):
+        """
+        Архивируем записи старше срока хранения и сжимаем БД.
+        При отложенной записи работа выполняется в фоновом потоке
+        """
+        if self.writer is not None and self.writer.is_alive():
+            self.writer.queue.put(self.maintain)
+        else:
+            self.maintain(self.conn)
+
+    def maintain(self, conn):
+        moved = 0
+        if self.retention_days is not None:
+            cutoff = int(time.time()) - self.retention_days * 24 * 3600
+            moved = archive_old_records(conn, self.archive, cutoff)
+        compact(conn)
+        return moved
+
+    def query_archive(self, since=None, until=None, formula_name=None):
+        """Чтение архивной истории (генератор кортежей как у get_history)"""
+        return self.archive.query(
+            to_epoch(since) if since is not None else None,
+            to_epoch(until) if until is not None else None,
+            formula_name)
+
+    def flush(self):
+        """Дожидаемся записи всех отложенных записей"""
+        if self.writer is not None and self.writer.is_alive():
+            done = threading.Event()
+            self.writer.queue.put(done)
+            done.wait()
+
+    def attach_inputs(self, rows):
+        """
+        Дополняем строки истории значениями переменных.
+        Возвращает кортежи (id, формула, {переменная: значение}, результат, время)
+        """
+        if not rows:
+            return []
+        inputs = load_inputs(self.conn, [row[0] for row in rows])
+        return [(id, formula_name, inputs[id], result, timestamp)
+                for id, formula_name, result, timestamp in rows]
 
     def get_history(self):
         """Получаем всю историю"""
+        self.flush()
         cursor = self.conn.execute(
-            'SELECT * FROM history ORDER BY timestamp DESC')
-        return cursor.fetchall()
+            '''SELECT h.id, f.name, h.result, h.timestamp
+               FROM history h JOIN formulas f ON f.id = h.formula_id
+               ORDER BY h.timestamp DESC, h.id DESC''')
+        return self.attach_inputs(cursor.fetchall())
+
+    def get_history_page(self, limit=200, after=None):
+        """
+        Получаем страницу истории (от новых к старым).
+        after - ключ (timestamp, id) последней записи предыдущей страницы
+        """
+        self.flush()
+        if after is None:
+            cursor = self.conn.execute(
+                '''SELECT h.id, f.name, h.result, h.timestamp
+                   FROM history h JOIN formulas f ON f.id = h.formula_id
+                   ORDER BY h.timestamp DESC, h.id DESC LIMIT ?''',
+                (limit,))
+        else:
+            # постраничная выборка по ключу: работает по индексу без OFFSET
+            cursor = self.conn.execute(
+                '''SELECT h.id, f.name, h.result, h.timestamp
+                   FROM history h JOIN formulas f ON f.id = h.formula_id
+                   WHERE (h.timestamp, h.id) < (?, ?)
+                   ORDER BY h.timestamp DESC, h.id DESC LIMIT ?''',
+                (after[0], after[1], limit))
+        return self.attach_inputs(cursor.fetchall())
+
+    def find_calculations(self, formula_name=None, since=None, until=None,
+                          conditions=(), limit=None):
+        """
+        Поиск по истории с использованием индексов.
+        since/until - datetime или время в секундах,
+        conditions - список (переменная, оператор, значение), например [("R", ">", 100)]
+        """
+        self.flush()
+        query = ['''SELECT h.id, f.name, h.result, h.timestamp
+                    FROM history h JOIN formulas f ON f.id = h.formula_id WHERE 1''']
+        params = []
+        if formula_name is not None:
+            query.append('AND f.name = ?')
+            params.append(formula_name)
+        add_time_filters(query, params, since, until)
+        for variable, operator, value in conditions:
+            if operator not in COMPARISON_OPERATORS:
+                raise ValueError(f"Недопустимый оператор: {operator}")
+            query.append(f'''AND h.id IN (SELECT history_id FROM history_values
+                                          WHERE variable = ? AND value {operator} ?)''')
+            params.extend((variable, value))
+        query.append('ORDER BY h.timestamp DESC, h.id DESC')
+        if limit is not None:
+            query.append('LIMIT ?')
+            params.append(limit)
+        return self.attach_inputs(self.conn.execute(' '.join(query), params).fetchall())
+
+    def search_history(self, text='', category=None, since=None, until=None, limit=200):
+        """
+        Полнотекстовый поиск по истории: названия формул, разделы, имена и значения
+        переменных. Можно сузить поиск по разделу и интервалу времени.
+        Результаты упорядочены по релевантности (без текста - по времени)
+        """
+        return self.search_page(text, category, since, until, limit)[0]
+
+    def search_page(self, text='', category=None, since=None, until=None, limit=200, after=None):
+        """
+        Страница результатов поиска: (строки как у get_history, ключ последней строки).
+        Ключ передается в after для следующей страницы: (релевантность, id) для
+        текстового запроса, (время, id) без текста. Релевантность считается по всем
+        совпадениям, а не только по последним
+        """
+        self.flush()
+        match = fts_query(text, category)
+        if match:
+            query = ['''SELECT h.id, f.name, h.result, h.timestamp, m.score
+                        FROM (SELECT rowid, bm25(history_fts) AS score FROM history_fts
+                              WHERE history_fts MATCH ?) m
+                        JOIN history h ON h.id = m.rowid
+                        JOIN formulas f ON f.id = h.formula_id WHERE 1''']
+            params = [match]
+        else:
+            query = ['''SELECT h.id, f.name, h.result, h.timestamp, h.timestamp
+                        FROM history h JOIN formulas f ON f.id = h.formula_id WHERE 1''']
+            params = []
+            if category is not None:
+                query.append('AND f.category = ?')
+                params.append(category)
+        add_time_filters(query, params, since, until)
+        if after is not None:
+            # меньшее значение bm25 - более релевантная запись
+            if match:
+                query.append('AND (m.score > ? OR m.score = ? AND h.id < ?)')
+                params.extend((after[0], after[0], after[1]))
+            else:
+                query.append('AND (h.timestamp, h.id) < (?, ?)')
+                params.extend(after)
+        query.append('ORDER BY m.score, h.id DESC' if match else
+                     'ORDER BY h.timestamp DESC, h.id DESC')
+        query.append('LIMIT ?')
+        params.append(limit)
+        rows = self.conn.execute(' '.join(query), params).fetchall()
+        last = (rows[-1][4], rows[-1][0]) if rows else after
+        return self.attach_inputs([row[:4] for row in rows]), last
+
+    def search_facets(self, text='', since=None, until=None):
+        """Число найденных записей по разделам физики: {раздел: количество}"""
+        self.flush()
+        match = fts_query(text)
+        if match:
+            query = ['''SELECT f.category, count(*)
+                        FROM history_fts m
+                        JOIN history h ON h.id = m.rowid
+                        JOIN formulas f ON f.id = h.formula_id
+                        WHERE history_fts MATCH ?''']
+            params = [match]
+        else:
+            query = ['''SELECT f.category, count(*)
+                        FROM history h JOIN formulas f ON f.id = h.formula_id WHERE 1''']
+            params = []
+        add_time_filters(query, params, since, until)
+        query.append('GROUP BY f.category')
+        return dict(self.conn.execute(' '.join(query), params).fetchall())
+
+    def stats(self, period='day', since=None, until=None, formula_name=None):
+        """
+        Статистика из сводных таблиц:
+        formulas - (формула, раздел, расчетов, ошибок, доля ошибок, время последнего расчета),
+        usage - (начало интервала, расчетов, ошибок) по часам или дням,
+        results - (формула, переменная, количество, минимум, максимум, среднее)
+        """
+        if period not in STATS_PERIODS:
+            raise ValueError(f"Неизвестный период: {period}")
+        self.flush()
+
+        formula_filter = ''
+        formula_params = []
+        if formula_name is not None:
+            formula_filter = 'AND f.name = ?'
+            formula_params = [formula_name]
+
+        formulas = []
+        for name, category, calculations, errors, last_timestamp in self.conn.execute(
+                f'''SELECT f.name, f.category, s.calculations, s.errors, s.last_timestamp
+                    FROM formula_stats s JOIN formulas f ON f.id = s.formula_id
+                    WHERE 1 {formula_filter}
+                    ORDER BY s.calculations DESC''', formula_params):
+            total = calculations + errors
+            formulas.append((name, category, calculations, errors,
+                             errors / total if total else 0.0, last_timestamp))
+
+        query = ['''SELECT u.bucket, sum(u.calculations), sum(u.errors)
+                    FROM usage_stats u JOIN formulas f ON f.id = u.formula_id
+                    WHERE u.period = ?''', formula_filter]
+        params = [period] + formula_params
+        if since is not None:
+            query.append('AND u.bucket >= ?')
+            params.append(to_epoch(since))
+        if until is not None:
+            query.append('AND u.bucket < ?')
+            params.append(to_epoch(until))
+        query.append('GROUP BY u.bucket ORDER BY u.bucket')
+        usage = self.conn.execute(' '.join(query), params).fetchall()
+
+        results = self.conn.execute(
+            f'''SELECT f.name, r.target, r.count, r.min_result, r.max_result,
+                       r.sum_result / r.count
+                FROM result_stats r JOIN formulas f ON f.id = r.formula_id
+                WHERE 1 {formula_filter}
+                ORDER BY f.name, r.target''', formula_params).fetchall()
+
+        return {"formulas": formulas, "usage": usage, "results": results}
 
     def clear_history(self):
-        """Очищаем историю"""
-        self.conn.execute('DELETE FROM history')
-        self.conn.commit()
+        """Очищаем историю и статистику"""
+        self.flush()
+        with self.conn:
+            self.conn.execute('DELETE FROM formula_stats')
+            self.conn.execute('DELETE FROM usage_stats')
+            self.conn.execute('DELETE FROM result_stats')
+            self.conn.execute('DELETE FROM history_fts')
+            self.conn.execute('DELETE FROM history_values')
+            self.conn.execute('DELETE FROM history')
+
+    def close(self):
+        """Сбрасываем очередь и закрываем соединения (можно вызывать повторно)"""
+        if self.writer is not None:
+            if self.writer.is_alive():
+                self.writer.queue.put(STOP)
+                self.writer.join()
+            atexit.unregister(self.close)
+            self.writer = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,101 @@
+from datetime import datetime
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """
+    Модель истории с ленивой подгрузкой: записи читаются из БД страницами
+    по мере прокрутки, текст ячеек формируется только для видимых строк
+    """
+
+    HEADERS = ["Формула", "Входные данные", "Результат", "Время"]
+
+    def __init__(self, db, page_size=200, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.page_size = page_size
+        self.rows = []
+        self.inputs_cache = {}
+        self.exhausted = False
+        # параметры поиска: (текст, раздел, начало интервала) или None
+        self.search = None
+        # ключ последней загруженной строки результатов поиска
+        self.search_after = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        id, formula_name, inputs, result, timestamp = self.rows[index.row()]
+        column = index.column()
+        if column == 0:
+            return formula_name
+        if column == 1:
+            return self.format_inputs(index.row(), inputs)
+        if column == 2:
+            return "" if result is None else str(result)
+        return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+    def format_inputs(self, row, inputs):
+        """Формируем строку входных данных при первом показе строки"""
+        text = self.inputs_cache.get(row)
+        if text is None:
+            text = ", ".join([f"{k} = {v:.15g}" if v is not None else f"{k} = "
+                              for k, v in inputs.items()])
+            self.inputs_cache[row] = text
+        return text
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Подгружаем следующую страницу истории или результатов поиска"""
+        if parent.isValid():
+            return
+        if self.search is not None:
+            # результаты поиска упорядочены по релевантности, страницы - по ее ключу
+            text, category, since = self.search
+            page, self.search_after = self.db.search_page(
+                text, category, since, limit=self.page_size, after=self.search_after)
+        else:
+            after = None
+            if self.rows:
+                last = self.rows[-1]
+                after = (last[4], last[0])
+            page = self.db.get_history_page(self.page_size, after)
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if not page:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+    def reload(self):
+        """Сбрасываем модель и загружаем первую страницу заново"""
+        self.beginResetModel()
+        self.rows = []
+        self.inputs_cache = {}
+        self.exhausted = False
+        self.search_after = None
+        self.endResetModel()
+        self.fetchMore()
+
+    def set_search(self, text='', category=None, since=None):
+        """Включаем поиск по истории (без параметров - обычный просмотр)"""
+        text = text.strip()
+        if not text and category is None and since is None:
+            self.search = None
+        else:
+            self.search = (text, category, since)
+        self.reload()
@@ -0,0 +1,357 @@
+import csv
+import gzip
+import json
+import struct
+from itertools import groupby
+from operator import itemgetter
+import numpy as np
+from classes.historyDB import (HistoryDB, FORMULA_CATEGORIES, get_formula_id,
+                               index_documents, add_history_stats)
+
+# число записей истории в одной порции чтения и записи
+CHUNK_SIZE = 50000
+
+# столбцы CSV (совпадают с полями JSON Lines и архива истории)
+FIELDS = ["id", "formula", "category", "target", "result", "timestamp", "inputs"]
+
+# столбцовый формат: сигнатура файла, затем блоки
+# [длина заголовка][заголовок JSON][массивы столбцов]
+COLUMNAR_MAGIC = b"PHYSHST1"
+BLOCK_HEADER = struct.Struct("<I")
+# столбцы блока: (имя, тип numpy); первые шесть - по одному значению на запись,
+# последние два - по одному на значение переменной
+COLUMNS = [
+    ("id", "<i8"),
+    ("formula", "<i4"),
+    ("target", "<i4"),
+    ("result", "<f8"),
+    ("timestamp", "<i8"),
+    ("count", "<i4"),
+    ("variable", "<i4"),
+    ("value", "<f8"),
+]
+
+
+def iter_history(conn, chunk_size=CHUNK_SIZE):
+    """
+    Генератор порций истории по возрастанию id. Записи и значения переменных
+    читаются двумя курсорами и сливаются по id, поэтому память не растет с размером БД.
+    Запись - (id, формула, искомая переменная, результат, время, [(переменная, значение)])
+    """
+    formulas = dict(conn.execute('SELECT id, name FROM formulas'))
+    # оба курсора читают один снимок БД
+    conn.execute('BEGIN')
+    try:
+        history = conn.execute(
+            'SELECT id, formula_id, target, result, timestamp FROM history ORDER BY id')
+        values = conn.execute(
+            '''SELECT history_id, variable, value FROM history_values
+               ORDER BY history_id, rowid''')
+        groups = groupby(fetch_rows(values, chunk_size), key=itemgetter(0))
+        key, group = next(groups, (None, None))
+        while True:
+            rows = history.fetchmany(chunk_size)
+            if not rows:
+                break
+            chunk = []
+            for id, formula_id, target, result, timestamp in rows:
+                while key is not None and key < id:
+                    key, group = next(groups, (None, None))
+                inputs = []
+                if key == id:
+                    inputs = [(variable, value) for _, variable, value in group]
+                chunk.append((id, formulas[formula_id], target, result, timestamp, inputs))
+            yield chunk
+    finally:
+        conn.execute('COMMIT')
+
+
+def fetch_rows(cursor, chunk_size):
+    """Построчный обход курсора с чтением порциями через fetchmany"""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def write_csv(chunks, path):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for chunk in chunks:
+            writer.writerows(
+                (id, formula_name, FORMULA_CATEGORIES.get(formula_name), target or "",
+                 "" if result is None else repr(result), timestamp,
+                 json.dumps(dict(inputs), ensure_ascii=False))
+                for id, formula_name, target, result, timestamp, inputs in chunk)
+
+
+def read_csv(path, chunk_size):
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        reader = csv.DictReader(file)
+        missing = [name for name in FIELDS if name not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"В файле нет столбцов: {', '.join(missing)}")
+        chunk = []
+        for row in reader:
+            result = row["result"]
+            chunk.append((row["formula"], row["target"] or None,
+                          list(json.loads(row["inputs"]).items()),
+                          float(result) if result else None, int(row["timestamp"])))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def open_jsonl(path, mode):
+    """Файл JSON Lines, сжатый gzip, если имя оканчивается на .gz (так хранится архив)"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_jsonl(chunks, path):
+    with open_jsonl(path, "w") as file:
+        for chunk in chunks:
+            file.write("".join(json.dumps({
+                "id": id, "formula": formula_name, "category": FORMULA_CATEGORIES.get(formula_name),
+                "target": target, "result": result, "timestamp": timestamp,
+                "inputs": dict(inputs),
+            }, ensure_ascii=False) + "\n"
+                for id, formula_name, target, result, timestamp, inputs in chunk))
+
+
+def read_jsonl(path, chunk_size):
+    with open_jsonl(path, "r") as file:
+        chunk = []
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            chunk.append((record["formula"], record.get("target"),
+                          list(record["inputs"].items()),
+                          record.get("result"), int(record["timestamp"])))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def write_columnar(chunks, path):
+    """
+    Столбцовый двоичный формат: каждая порция записывается блоком массивов
+    фиксированного типа. Строки (формулы, переменные) заменены кодами, новые строки
+    словаря передаются в заголовке блока
+    """
+    codes = {}
+
+    def encode(text):
+        code = codes.get(text)
+        if code is None:
+            code = codes[text] = len(codes)
+            new_strings.append(text)
+        return code
+
+    with open(path, "wb") as file:
+        file.write(COLUMNAR_MAGIC)
+        for chunk in chunks:
+            new_strings = []
+            columns = {name: [] for name, dtype in COLUMNS}
+            for id, formula_name, target, result, timestamp, inputs in chunk:
+                columns["id"].append(id)
+                columns["formula"].append(encode(formula_name))
+                columns["target"].append(-1 if target is None else encode(target))
+                columns["result"].append(np.nan if result is None else result)
+                columns["timestamp"].append(timestamp)
+                columns["count"].append(len(inputs))
+                for variable, value in inputs:
+                    columns["variable"].append(encode(variable))
+                    columns["value"].append(np.nan if value is None else value)
+
+            header = json.dumps({"rows": len(chunk), "values": len(columns["value"]),
+                                 "strings": new_strings}, ensure_ascii=False).encode("utf-8")
+            file.write(BLOCK_HEADER.pack(len(header)))
+            file.write(header)
+            for name, dtype in COLUMNS:
+                file.write(np.asarray(columns[name], dtype=dtype).tobytes())
+
+
+def read_columnar(path, chunk_size):
+    """Чтение столбцового формата по блокам (размер порции задан при экспорте)"""
+    strings = []
+    with open(path, "rb") as file:
+        if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError("Файл не является выгрузкой истории")
+        while True:
+            size = file.read(BLOCK_HEADER.size)
+            if not size:
+                return
+            header = json.loads(file.read(BLOCK_HEADER.unpack(size)[0]))
+            strings.extend(header["strings"])
+
+            columns = {}
+            for name, dtype in COLUMNS:
+                length = header["values"] if name in ("variable", "value") else header["rows"]
+                itemsize = np.dtype(dtype).itemsize
+                data = file.read(length * itemsize)
+                if len(data) != length * itemsize:
+                    raise ValueError("Файл выгрузки обрезан")
+                columns[name] = np.frombuffer(data, dtype=dtype)
+
+            # NaN обратно превращаем в пустые значения
+            results = np.where(np.isnan(columns["result"]), None, columns["result"]).tolist()
+            values = np.where(np.isnan(columns["value"]), None, columns["value"]).tolist()
+            variables = [strings[code] for code in columns["variable"].tolist()]
+            ends = np.cumsum(columns["count"]).tolist()
+
+            chunk = []
+            start = 0
+            for formula, target, result, timestamp, end in zip(
+                    columns["formula"].tolist(), columns["target"].tolist(), results,
+                    columns["timestamp"].tolist(), ends):
+                chunk.append((strings[formula], None if target < 0 else strings[target],
+                              list(zip(variables[start:end], values[start:end])),
+                              result, timestamp))
+                start = end
+            yield chunk
+
+
+# формат -> (функция записи, функция чтения, расширения файла)
+FORMATS = {
+    "csv": (write_csv, read_csv, (".csv",)),
+    "jsonl": (write_jsonl, read_jsonl, (".jsonl", ".jsonl.gz")),
+    "columnar": (write_columnar, read_columnar, (".phh",)),
+}
+
+
+def detect_format(path, format=None):
+    """Формат по явному указанию или по расширению файла"""
+    if format is None:
+        for name, (writer, reader, extensions) in FORMATS.items():
+            if path.lower().endswith(extensions):
+                return name
+        raise ValueError(f"Не удалось определить формат файла: {path}")
+    if format not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {format}")
+    return format
+
+
+def export_history(db, path, format=None, chunk_size=CHUNK_SIZE):
+    """Потоковая выгрузка всей истории в файл. Возвращает число записей"""
+    writer = FORMATS[detect_format(path, format)][0]
+    db.flush()
+    counter = {"rows": 0}
+
+    def counted(chunks):
+        for chunk in chunks:
+            counter["rows"] += len(chunk)
+            yield chunk
+
+    writer(counted(iter_history(db.conn, chunk_size)), path)
+    return counter["rows"]
+
+
+def import_history(db, path, format=None, rebuild_indexes=False, chunk_size=CHUNK_SIZE):
+    """
+    Загрузка истории из файла одной транзакцией (при ошибке ничего не добавляется).
+    Записи получают новые id после уже имеющихся. Триггер статистики на время
+    загрузки отключается: статистика и полнотекстовый индекс заполняются в конце
+    одним запросом на таблицу. С rebuild_indexes так же перестраиваются индексы
+    истории - для больших файлов это быстрее, чем обновлять их на каждой вставке.
+    Возвращает число записей
+    """
+    reader = FORMATS[detect_format(path, format)][1]
+    db.flush()
+    conn = db.conn
+    count = 0
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        triggers = conn.execute(
+            """SELECT name, sql FROM sqlite_master
+               WHERE type = 'trigger' AND tbl_name = 'history' AND name = 'history_stats'""").fetchall()
+        indexes = []
+        if rebuild_indexes:
+            indexes = conn.execute(
+                """SELECT name, sql FROM sqlite_master
+                   WHERE type = 'index' AND tbl_name IN ('history', 'history_values')
+                   AND sql IS NOT NULL""").fetchall()
+        for name, sql in triggers:
+            conn.execute(f'DROP TRIGGER {name}')
+        for name, sql in indexes:
+            conn.execute(f'DROP INDEX {name}')
+
+        # id назначаем сами, чтобы вставлять пачками; удаленные id не переиспользуются
+        first_id = conn.execute(
+            """SELECT max(ifnull((SELECT seq FROM sqlite_sequence WHERE name = 'history'), 0),
+                          ifnull((SELECT max(id) FROM history), 0))""").fetchone()[0] + 1
+        next_id = first_id
+        for chunk in reader(path, chunk_size):
+            history = []
+            values = []
+            for formula_name, target, inputs, result, timestamp in chunk:
+                formula_id = get_formula_id(conn, formula_name, db.formula_ids)
+                history.append((next_id, formula_id, target, result, timestamp))
+                values.extend((next_id, variable, value) for variable, value in inputs)
+                next_id += 1
+            conn.executemany('INSERT INTO history (id, formula_id, target, result, timestamp) VALUES (?, ?, ?, ?, ?)',
+                             history)
+            conn.executemany('INSERT INTO history_values (history_id, variable, value) VALUES (?, ?, ?)',
+                             values)
+            count += len(chunk)
+
+        for name, sql in indexes + triggers:
+            conn.execute(sql)
+        # без слияния сегментов на каждой вставке индекс заполняется заметно быстрее;
+        # потом возвращаем значение по умолчанию, и сегменты сольются при обычной записи
+        conn.execute("INSERT INTO history_fts (history_fts, rank) VALUES ('automerge', 0)")
+        index_documents(conn, first_id)
+        conn.execute("INSERT INTO history_fts (history_fts, rank) VALUES ('automerge', 4)")
+        add_history_stats(conn, first_id)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        db.formula_ids.clear()
+        raise
+    return count
+
+
+def add_arguments(subparsers):
+    """Регистрирует команды export и import в разборщике аргументов командной строки"""
+    formats = sorted(FORMATS)
+    parser = subparsers.add_parser("export", help="выгрузка истории расчетов в файл")
+    parser.add_argument("output", help="файл .csv, .jsonl, .jsonl.gz или .phh (столбцовый)")
+    parser.add_argument("--db", default="history.db", help="файл БД истории")
+    parser.add_argument("--format", choices=formats, help="формат (по умолчанию - по расширению)")
+    parser.set_defaults(handler=run_export)
+
+    parser = subparsers.add_parser("import", help="загрузка истории расчетов из файла")
+    parser.add_argument("input", help="файл .csv, .jsonl, .jsonl.gz или .phh (столбцовый)")
+    parser.add_argument("--db", default="history.db", help="файл БД истории")
+    parser.add_argument("--format", choices=formats, help="формат (по умолчанию - по расширению)")
+    parser.add_argument("--rebuild-indexes", action="store_true",
+                        help="перестроить индексы после загрузки (быстрее для больших файлов)")
+    parser.set_defaults(handler=run_import)
+
+
+def run_export(args):
+    db = HistoryDB(args.db)
+    try:
+        rows = export_history(db, args.output, args.format)
+    finally:
+        db.close()
+    print(f"Выгружено записей: {rows}")
+    return 0
+
+
+def run_import(args):
+    db = HistoryDB(args.db)
+    try:
+        rows = import_history(db, args.input, args.format, args.rebuild_indexes)
+    finally:
+        db.close()
+    print(f"Загружено записей: {rows}")
+    return 0
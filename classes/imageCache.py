@@ -0,0 +1,143 @@
+import os
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+
+# папка с текстурами относительно модуля, а не текущей директории
+TEXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "texture")
+
+# размер области картинки формулы (в логических пикселях)
+IMAGE_SIZE = (600, 250)
+
+# картинки к формулам (формулы без картинки не указаны)
+FORMULA_IMAGES = {
+    'Второй закон Ньютона': 'ВЗН.png',
+    'Кинетическая энергия': 'КИПЭ.png',
+    'Потенциальная энергия': 'КИПЭ.png',
+    'Закон сохранения энергии': 'КИПЭ.png',
+    'Импульс': 'ИМП.png',
+    'КПД тепловой машины': 'КПД.png',
+    'Удельная теплота': 'УТ.png',
+    'Закон Ома': 'ЗО.png',
+    'Мощность тока': 'ЗО.png',  # подойдет картинка из закона Ома
+    'Энергия конденсатора': 'ЭК.png',
+    'Закон преломления': 'ЗП.png',
+    'Формула тонкой линзы': 'ФТЛ.png',
+    'Расход жидкости': 'РЖ.png',
+    'Сила Архимеда': 'СА.png',
+}
+
+
+def load_image(path, size, dpr):
+    """
+    Читает и масштабирует картинку под размер size с учетом плотности пикселей.
+    QImage можно использовать вне GUI-потока. None - файла нет или он не читается
+    """
+    if not os.path.isfile(path):
+        return None
+    image = QImage(path)
+    if image.isNull():
+        return None
+    width, height = size
+    image = image.scaled(round(width * dpr), round(height * dpr),
+                         Qt.AspectRatioMode.KeepAspectRatio,
+                         Qt.TransformationMode.SmoothTransformation)
+    image.setDevicePixelRatio(dpr)
+    return image
+
+
+class ImageLoaderSignals(QObject):
+    loaded = pyqtSignal(object, object)  # ключ, QImage или None
+
+
+class ImageLoader(QRunnable):
+    """Задача пула потоков: загрузка одной картинки"""
+
+    def __init__(self, key, path):
+        super().__init__()
+        self.key = key
+        self.path = path
+        self.signals = ImageLoaderSignals()
+
+    def run(self):
+        image_name, size, dpr = self.key
+        self.signals.loaded.emit(self.key, load_image(self.path, size, dpr))
+
+
+class ImageCache(QObject):
+    """
+    Кэш готовых к показу картинок с ключом (картинка, размер, плотность пикселей).
+    Картинки заранее читаются и масштабируются в пуле потоков, в кэше
+    остаются последние использованные в пределах бюджета памяти.
+    Отсутствующие файлы тоже запоминаются, чтобы не обращаться к диску повторно
+    """
+
+    def __init__(self, directory=TEXTURE_DIR, budget_bytes=16 * 1024 * 1024, parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self._pixmaps = OrderedDict()
+        self._pending = set()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(image_name, size, dpr):
+        return (image_name, tuple(size), float(dpr))
+
+    def pixmap(self, image_name, size=IMAGE_SIZE, dpr=1.0):
+        """Картинка для показа или None, если ее нет"""
+        if image_name is None:
+            return None
+        key = self.make_key(image_name, size, dpr)
+        if key in self._pixmaps:
+            self._pixmaps.move_to_end(key)
+            self.hits += 1
+            return self._pixmaps[key]
+        # картинка еще не готова - читаем ее сразу, не дожидаясь пула
+        self.misses += 1
+        self.store(key, load_image(os.path.join(self.directory, image_name), size, dpr))
+        return self._pixmaps.get(key)
+
+    def warm_up(self, image_names, size=IMAGE_SIZE, dpr=1.0):
+        """Загружаем картинки в фоновых потоках"""
+        pool = QThreadPool.globalInstance()
+        for image_name in sorted(set(image_names)):
+            key = self.make_key(image_name, size, dpr)
+            if key in self._pixmaps or key in self._pending:
+                continue
+            self._pending.add(key)
+            loader = ImageLoader(key, os.path.join(self.directory, image_name))
+            # сигнал из потока пула доставляется в поток кэша через очередь событий
+            loader.signals.loaded.connect(self.on_loaded)
+            pool.start(loader)
+
+    def on_loaded(self, key, image):
+        self._pending.discard(key)
+        if key not in self._pixmaps:
+            self.store(key, image)
+
+    def store(self, key, image):
+        """Кладем картинку в кэш (QPixmap создается только в GUI-потоке)"""
+        pixmap = QPixmap.fromImage(image) if image is not None else None
+        self._pixmaps[key] = pixmap
+        self._pixmaps.move_to_end(key)
+        self.used_bytes += self.size_of(pixmap)
+        # вытесняем давно не использованные картинки, последнюю оставляем всегда
+        while self.used_bytes > self.budget_bytes and len(self._pixmaps) > 1:
+            old_key, old_pixmap = self._pixmaps.popitem(last=False)
+            self.used_bytes -= self.size_of(old_pixmap)
+
+    @staticmethod
+    def size_of(pixmap):
+        if pixmap is None:
+            return 0
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    def clear(self):
+        self._pixmaps.clear()
+        self.used_bytes = 0
+
+    def __len__(self):
+        return len(self._pixmaps)
@@ -1,32 +1,132 @@
-from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout,
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLabel, QListWidget, QComboBox,
-                             QLineEdit, QPushButton, QDialog, QMessageBox)
+                             QPushButton, QDialog, QMessageBox, QLineEdit, QProgressBar)
 from PyQt6.QtGui import QIcon, QPixmap
-from styles import DARK_THEME, LIGHT_THEME
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from styles import STYLESHEETS
 from const.formulas import CATEGORIES
-from calculator import Calculator
+import importlib
 import os
-from PyQt6.QtCore import Qt
-from classes.historyDB import HistoryDB
-from classes.dialogs import HistoryDialog, ConstantsDialog, UnitsDialog, AboutDialog, SettingsDialog
+import threading
+from classes.imageCache import ImageCache, FORMULA_IMAGES, IMAGE_SIZE, TEXTURE_DIR
+from classes.formPool import FormPool
+from classes.calcExecutor import CalculationExecutor
+
+# модули, которые не нужны для первого кадра: загружаются в фоне после показа окна
+PRELOAD_MODULES = ("numpy", "calculator", "formula_engine", "classes.historyDB", "const.constans")
+
+
+def preload_modules():
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+
+
+def prepare_db():
+    """Обновление схемы БД истории и перенос старых записей (выполняется в фоне)"""
+    from classes.historyDB import HistoryDB
+    HistoryDB().close()
+
+
+def set_state(widget, state):
+    """Меняет динамическое свойство state; стиль пересчитывается только у этого виджета"""
+    widget.setProperty("state", state)
+    widget.style().unpolish(widget)
+    widget.style().polish(widget)
 
 
 class PhysicsCalculator(QMainWindow):
+    # окно отрисовано в первый раз, отложенная загрузка запускается
+    first_frame_shown = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.theme_file = "theme_status.txt"
         self.current_theme = self.load_theme()  # загружаем тему из файла
-        self.db = HistoryDB()  # добавление БД
+        # БД истории и калькулятор создаются при первом обращении
+        self._db = None
+        self._calculator = None
+        self._formula_index = None
+        self.current_category = None
+        self.first_frame = False
+        self.preload_thread = None
+        self.db_thread = None
+        # расчеты выполняются вне GUI-потока, очередь ограничена
+        self.executor = CalculationExecutor(max_queue=16, parent=self)
+        self.calculation_job = None
         self.calculation_precision = 6
+        # оценка погрешности при вводе "100 ± 2": (метод, размер выборки)
+        self.uncertainty_method = ("monte_carlo", 100_000)
+        self.image_cache = ImageCache()  # готовые к показу картинки формул
         self.set_app_icon()  # иконка приложения
         self.initUI()
 
+    @property
+    def db(self):
+        return self.open_db()
+
+    def open_db(self):
+        """
+        БД истории (запись в фоновом потоке, старая история уходит в архив; срок
+        хранения сохраняется в БД, пока он не выбран в настройках - 90 дней)
+        """
+        if self._db is None:
+            # схема обновляется в фоне после первого кадра, здесь только ждем ее
+            if self.db_thread is not None:
+                self.db_thread.join()
+            from classes.historyDB import HistoryDB
+            self._db = HistoryDB(write_behind=True, retention_days=90)
+            self._db.run_maintenance()
+        return self._db
+
+    @property
+    def calculator(self):
+        if self._calculator is None:
+            from calculator import Calculator
+            from classes.resultCache import ResultCache
+            self._calculator = Calculator(cache=ResultCache(maxsize=1024))
+        return self._calculator
+
+    @property
+    def formula_index(self):
+        """Поисковый индекс формул всех разделов (строится один раз)"""
+        if self._formula_index is None:
+            from classes.formulaIndex import FormulaIndex
+            self._formula_index = FormulaIndex(CATEGORIES)
+        return self._formula_index
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_frame:
+            self.first_frame = True
+            # остальное загружаем, когда первый кадр уже выведен
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Отложенная часть запуска: БД, картинки формул и тяжелые модули"""
+        self.first_frame_shown.emit()
+        self.preload_thread = threading.Thread(target=preload_modules, name="Preload", daemon=True)
+        self.preload_thread.start()
+        self.db_thread = threading.Thread(target=prepare_db, name="PrepareDB", daemon=True)
+        self.db_thread.start()
+        self.formula_index  # индекс поиска строится до первого запроса
+        # картинки всех формул читаются заранее в фоновых потоках
+        self.image_cache.warm_up(FORMULA_IMAGES.values(), IMAGE_SIZE, self.devicePixelRatioF())
+
+    def closeEvent(self, event):
+        """При закрытии окна дописываем историю и закрываем БД"""
+        self.executor.shutdown()
+        # выход посреди фонового импорта (например, numpy) роняет интерпретатор
+        for thread in (self.preload_thread, self.db_thread):
+            if thread is not None:
+                thread.join()
+        if self._db is not None:
+            self._db.close()
+        super().closeEvent(event)
+
     def set_app_icon(self):
         """Устанавливает иконку с правильным путем для exe"""
 
-        base_path = os.path.dirname(os.path.abspath(__file__))
-
-        icon_path = os.path.join(base_path, "texture", "app_icon.png")
+        icon_path = os.path.join(TEXTURE_DIR, "app_icon.png")
         self.setWindowIcon(QIcon(icon_path))
 
     def load_theme(self):
@@ -37,8 +137,7 @@ class PhysicsCalculator(QMainWindow):
                     theme = f.read().strip()
                     return theme if theme in ['dark', 'light'] else 'dark'
             else:
-                # если файла нет создаем его с темой по умолчанию
-                self.save_theme('dark')
+                # файл создается при первой смене темы
                 return 'dark'
         except Exception:
             return 'dark'
@@ -50,47 +149,21 @@ class PhysicsCalculator(QMainWindow):
                 f.write(theme)
         except Exception:
             pass
-    def update_formula_image(self, formula_name):
-        """обновление картинки в зависимости от выбранной формулы"""
-        # словарь путей к картинкам (где нет картинок, но есть путь - это костыль, чтобы не было ошибок,
-        #  нужно будет исправить)
-        image_mapping = {
-            'Второй закон Ньютона': 'texture/ВЗН.png',
-            'Кинетическая энергия': 'texture/КИПЭ.png',
-            'Потенциальная энергия': 'texture/КИПЭ.png',
-            'Импульс': 'texture/ИМП.png',
-            'КПД тепловой машины': 'texture/КПД.png',
-            'Удельная теплота' : 'texture/УТ.png',
-            'Закон Ома' : 'texture/ЗО.png',
-            'Мощность тока' : 'texture/ЗО.png', # подойдет картинка из закона Ома
-            'Энергия конденсатора' : 'texture/ЭК.png',
-            'Закон преломления' : 'texture/ЗП.png',
-            'Формула тонкой линзы' : 'texture/ФТЛ.png',
-            'Расход жидкости' : 'texture/РЖ.png',
-            'Сила Архимеда' : 'texture/СА.png',
-            
-        }
-        
-        
-        # Проверяем существование файла
-        image_path = image_mapping.get(formula_name)
-        if os.path.exists(image_path):
-            pixmap = QPixmap(image_path)
-                    # Масштабируем картинку
-            pixmap = pixmap.scaled(600, 250, Qt.AspectRatioMode.KeepAspectRatio, 
-                            Qt.TransformationMode.SmoothTransformation)
-        
-            self.piclabel.setPixmap(pixmap)
-        else:
-            self.piclabel.setPixmap(QPixmap())
-
 
+    def update_formula_image(self, formula_name):
+        """обновление картинки в зависимости от выбранной формулы (картинки берутся из кэша)"""
+        pixmap = self.image_cache.pixmap(FORMULA_IMAGES.get(formula_name), IMAGE_SIZE,
+                                         self.piclabel.devicePixelRatioF())
+        self.piclabel.setPixmap(pixmap if pixmap is not None else QPixmap())
 
     def initUI(self):
         self.setWindowTitle('Калькулятор для физики')
         self.setGeometry(100, 100, 900, 600)
 
+        # имена объектов используются в таблице стилей (styles.py)
+        self.setObjectName("mainWindow")
         central_widget = QWidget()
+        central_widget.setObjectName("centralWidget")
         self.setCentralWidget(central_widget)
 
         self.layout = QHBoxLayout(central_widget)
@@ -105,8 +178,15 @@ class PhysicsCalculator(QMainWindow):
 
         # заголовок
         title_label = QLabel("Формулы по физике")
+        title_label.setObjectName("titleLabel")
         self.left_layout.addWidget(title_label)
 
+        # поиск формулы по всем разделам
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Поиск формулы...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.left_layout.addWidget(self.search_edit)
+
         # выбор категории
         category_label = QLabel("Категория:")
         self.left_layout.addWidget(category_label)
@@ -133,9 +213,11 @@ class PhysicsCalculator(QMainWindow):
         formula_text_layout = QVBoxLayout()
         
         self.formula_name_label = QLabel("Выберите формулу")
+        self.formula_name_label.setObjectName("formulaName")
         formula_text_layout.addWidget(self.formula_name_label)
 
         self.formula_expression_label = QLabel("")
+        self.formula_expression_label.setObjectName("formulaExpression")
         formula_text_layout.addWidget(self.formula_expression_label)
 
         self.category_label = QLabel("")
@@ -154,18 +236,23 @@ class PhysicsCalculator(QMainWindow):
         # добавляем горизонтальный layout в правую панель
         self.right_layout.addLayout(formula_pic_layout)
 
-        # layout для переменных
-        self.variables_layout = QVBoxLayout()
-        self.variables_layout.setSpacing(8)
-        self.right_layout.addLayout(self.variables_layout)
+        # формы ввода переменных (своя для каждой формулы, создаются один раз)
+        self.form_pool = FormPool()
+        self.right_layout.addWidget(self.form_pool)
 
         # кнопка расчета
         self.calculate_button = QPushButton("Рассчитать")
         self.calculate_button.clicked.connect(self.calculate)
         self.right_layout.addWidget(self.calculate_button)
 
+        # прогресс расчета по диапазону и оценки погрешности
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        self.right_layout.addWidget(self.progress_bar)
+
         # поле для результата
         self.result_label = QLabel("")
+        self.result_label.setObjectName("resultLabel")
         self.right_layout.addWidget(self.result_label)
 
         # добавление панели в основной layout
@@ -182,6 +269,7 @@ class PhysicsCalculator(QMainWindow):
         self.category_combo.currentTextChanged.connect(
             self.update_formulas_list)
         self.formula_list.currentTextChanged.connect(self.on_formula_selected)
+        self.search_edit.textChanged.connect(self.search_formulas)
 
         # применяем тему из файла
         self.apply_theme(self.current_theme)
@@ -210,9 +298,11 @@ class PhysicsCalculator(QMainWindow):
         # меню "история"
         history_menu = menuBar.addMenu("История")
         show_history_action = history_menu.addAction("Показать историю")
+        stats_action = history_menu.addAction("Статистика")
         clear_history_action = history_menu.addAction("Очистить историю")
 
         show_history_action.triggered.connect(self.show_history)
+        stats_action.triggered.connect(self.show_stats)
         clear_history_action.triggered.connect(self.clear_history)
 
         # меню "Настройки"
@@ -227,74 +317,76 @@ class PhysicsCalculator(QMainWindow):
 
     def show_constants(self):
         """Показать справочник констант"""
+        from classes.dialogs import ConstantsDialog
         dialog = ConstantsDialog(self)
         dialog.exec()
 
     def show_units(self):
         """Показать справочник единиц измерения"""
+        from classes.dialogs import UnitsDialog
         dialog = UnitsDialog(self)
         dialog.exec()
 
     def show_about(self):
         """Показать диалог О программе"""
+        from classes.dialogs import AboutDialog
         dialog = AboutDialog(self)
         dialog.exec()
 
     def show_settings(self):
         """Показать диалог настроек"""
+        from classes.dialogs import SettingsDialog
         dialog = SettingsDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             # сохраняем точность
             self.calculation_precision = int(
                 dialog.precision_combo.currentText())
+            self.uncertainty_method = dialog.UNCERTAINTY[dialog.uncertainty_combo.currentText()]
+            retention_days = dialog.RETENTION[dialog.retention_combo.currentText()]
+            if retention_days != self.db.retention_days:
+                self.db.set_retention(retention_days)
+                self.db.run_maintenance()
             QMessageBox.information(
                 self, "Настройки", f"Точность установлена: {self.calculation_precision} знаков")
 
     def apply_theme(self, theme_name):
-        """Применение выбранной темы"""
+        """Применение выбранной темы (одна таблица стилей на все приложение)"""
+        if theme_name != self.current_theme:
+            self.save_theme(theme_name)
         self.current_theme = theme_name
-        self.save_theme(theme_name)
-
-        theme = DARK_THEME if theme_name == "dark" else LIGHT_THEME
-
-        # применяем стили ко всем элементам
-        self.setStyleSheet(theme["main_window"])
-
-        # находим все элементы и применяем стили
-        for widget in self.findChildren(QLabel):
-            if widget == self.formula_name_label:
-                widget.setStyleSheet(theme["formula_name"])
-            elif widget == self.formula_expression_label:
-                widget.setStyleSheet(theme["formula_expression"])
-            elif widget == self.result_label:
-                widget.setStyleSheet(theme["result_label"])
-            elif "Формулы по физике" in widget.text():
-                widget.setStyleSheet(theme["title_label"])
-            else:
-                widget.setStyleSheet(theme["subtitle_label"])
-
-        self.category_combo.setStyleSheet(theme["combo_box"])
-        self.formula_list.setStyleSheet(theme["list_widget"])
-        self.calculate_button.setStyleSheet(theme["calculate_button"])
-
-        # обновляем стили полей ввода
-        for input_field in self.input_fields.values():
-            input_field.setStyleSheet(theme["input_field"])
+        QApplication.instance().setStyleSheet(STYLESHEETS[theme_name])
 
     def update_formulas_list(self):
         # обновление списка формул при смене категории
         category = self.category_combo.currentText()
         self.formula_list.clear()
 
+        if self.search_edit.text().strip():
+            # при смене категории поиск сбрасывается
+            self.search_edit.blockSignals(True)
+            self.search_edit.clear()
+            self.search_edit.blockSignals(False)
+
         if category in CATEGORIES:
             self.formula_list.addItems(CATEGORIES[category])
 
+    def search_formulas(self, query):
+        """Поиск по мере ввода: формулы всех разделов, лучшие совпадения первыми"""
+        if not query.strip():
+            self.update_formulas_list()
+            return
+        self.formula_list.clear()
+        self.formula_list.addItems(
+            [formula_name for _, formula_name in self.formula_index.search(query)])
+
     def on_formula_selected(self, formula_name):
         if not formula_name:
             return
 
         self.current_formula_name = formula_name
-        category = self.category_combo.currentText()
+        # в результатах поиска формулы из разных разделов
+        category = self.formula_index.category(formula_name)
+        self.current_category = category
         self.update_formula_image(formula_name)
 
         formula_data = CATEGORIES[category][formula_name]
@@ -304,51 +396,21 @@ class PhysicsCalculator(QMainWindow):
         self.formula_expression_label.setText(formula_data["formula"])
         self.category_label.setText(f"Категория: {category}")
 
-        # полная очистка
-        for i in reversed(range(self.variables_layout.count())):
-            item = self.variables_layout.itemAt(i)
-            if item.layout():
-                # удаление всех виджетов из вложенного layout
-                for j in reversed(range(item.layout().count())):
-                    widget = item.layout().itemAt(j).widget()
-                    if widget:
-                        widget.deleteLater()
-                item.layout().deleteLater()
-            elif item.widget():
-                item.widget().deleteLater()
-
-        self.input_fields = {}
-
-        # создание полей для переменных
-        for var_name, var_info in formula_data['variables'].items():
-            var_layout = QHBoxLayout()
-
-            label = QLabel(f"{var_name}:")
-            label.setFixedWidth(80)
-            label.setStyleSheet("font-weight: bold; font-size: 13px;")
-
-            input_field = QLineEdit()
-            input_field.setPlaceholderText(
-                f"{var_info['description']} ({var_info['unit']})")
-
-            # применение текущей темы к полю ввода
-            theme = DARK_THEME if self.current_theme == "dark" else LIGHT_THEME
-            input_field.setStyleSheet(theme["input_field"])
-
-            var_layout.addWidget(label)
-            var_layout.addWidget(input_field)
-            self.variables_layout.addLayout(var_layout)
-
-            self.input_fields[var_name] = input_field
-
-        # обновление интерфейса
-        self.variables_layout.update()
+        # форма формулы создается при первом выборе, потом только переключается
+        self.input_fields = self.form_pool.show_form(formula_name, formula_data['variables'])
 
     def show_history(self):
         """Показываем диалог истории"""
+        from classes.dialogs import HistoryDialog
         dialog = HistoryDialog(self.db, self)
         dialog.exec()
 
+    def show_stats(self):
+        """Показываем статистику вычислений"""
+        from classes.dialogs import StatsDialog
+        dialog = StatsDialog(self.db, self)
+        dialog.exec()
+
     def clear_history(self):
         """Очищаем историю"""
         self.db.clear_history()
@@ -357,15 +419,14 @@ class PhysicsCalculator(QMainWindow):
     # метод для вычисления
     def calculate(self):
         if not hasattr(self, 'current_formula_name'):
-            self.result_label.setStyleSheet("color: red; font-size: 12px;")
-            self.result_label.setText("Сначала выберите формулу")
+            self.show_error("Сначала выберите формулу")
             return
 
         # сбрасываем стили всех полей ввода
         self.reset_input_fields_style()
 
         # получаем текущую категорию и формулу
-        category = self.category_combo.currentText()
+        category = self.current_category
         formula_name = self.current_formula_name
         formula_data = {formula_name: CATEGORIES[category][formula_name]}
 
@@ -374,49 +435,137 @@ class PhysicsCalculator(QMainWindow):
         for var_name, input_field in self.input_fields.items():
             input_values[var_name] = input_field.text()
 
-        # вычисляем результат
-        calculator = Calculator()
-        calculation_result = calculator.calculate(formula_data, input_values)
-
-        # обрабатываем результат
+        # расчет идет в пуле потоков; новый расчет отменяет незавершенный предыдущий
+        if self.calculation_job is not None:
+            self.calculation_job.cancel()
+        self.progress_bar.hide()
+        calculator = self.calculator
+
+        # если хоть одно поле задано диапазоном (0..100:1000) - считаем по сетке,
+        # если с погрешностью (100 ± 2) - оцениваем погрешность результата
+        from sweep import is_range, run_sweep
+        from uncertainty import is_uncertain, run_uncertainty
+        if any(is_uncertain(text) for text in input_values.values()):
+            self.result_label.setText("Идет оценка погрешности...")
+            set_state(self.result_label, "")
+            method, samples = self.uncertainty_method
+            input_fields = self.input_fields
+            self.calculation_job = self.executor.submit(
+                lambda job: run_uncertainty(formula_name, input_values, method,
+                                            samples, calculator, job=job),
+                on_finished=lambda estimate: self.show_uncertainty(
+                    input_fields, input_values, estimate),
+                on_failed=lambda error: self.show_error(str(error)),
+                on_progress=self.show_progress)
+        elif any(is_range(text) for text in input_values.values()):
+            self.result_label.setText("Идет расчет по диапазону...")
+            set_state(self.result_label, "")
+            self.calculation_job = self.executor.submit(
+                lambda job: run_sweep(formula_name, input_values, calculator, job=job),
+                on_finished=self.show_sweep,
+                on_failed=lambda error: self.show_error(str(error)),
+                on_progress=self.show_progress)
+        else:
+            input_fields = self.input_fields  # форма этой формулы (формы не пересоздаются)
+            self.calculation_job = self.executor.submit(
+                lambda job: calculator.calculate(formula_data, input_values),
+                on_finished=lambda calculation_result: self.show_result(
+                    formula_name, input_fields, input_values, calculation_result),
+                on_failed=lambda error: self.show_result(
+                    formula_name, input_fields, input_values, {"success": False, "error": str(error)}))
+        if self.calculation_job is None:
+            self.show_error("Слишком много расчетов в очереди, попробуйте позже")
+
+    def show_progress(self, done, total):
+        """Прогресс текущего расчета (сигналы отмененных задач пропускаются)"""
+        job = self.calculation_job
+        if job is None or self.sender() is not job.signals:
+            return
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+        self.progress_bar.show()
+
+    def show_error(self, text):
+        """Сообщение об ошибке красным цветом снизу"""
+        self.progress_bar.hide()
+        self.result_label.setText(text)
+        set_state(self.result_label, "error")
+
+    def show_sweep(self, sweep):
+        """Таблица результатов расчета по диапазону"""
+        from classes.dialogs import SweepDialog
+        self.progress_bar.hide()
+        self.result_label.setText("")
+        dialog = SweepDialog(sweep, self.calculation_precision, self)
+        # обработчик завершения расчета не ждет закрытия окна (exec() крутил бы
+        # вложенный цикл событий внутри сигнала), окно удаляется при закрытии
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.open()
+
+    def show_uncertainty(self, input_fields, input_values, estimate):
+        """Результат с погрешностью в поле искомой величины, интервал - снизу"""
+        self.progress_bar.hide()
+        precision = self.calculation_precision
+        result_text = f"{estimate.mean:.{precision}f} ± {estimate.std:.{precision}f} {estimate.unit}"
+        # в историю пишутся средние значения числами в единицах формулы
+        all_data = dict(estimate.values)
+        all_data[estimate.target] = estimate.result
+        self.db.add_calculation(estimate.formula_name, all_data, estimate.result, estimate.target)
+
+        result_field = input_fields[estimate.target]
+        result_field.setText(result_text)
+        set_state(result_field, "result")
+
+        low, high = estimate.interval
+        details = [f"95%: [{low:.{precision}f}; {high:.{precision}f}]",
+                   f"медиана {estimate.median:.{precision}f}"]
+        if estimate.valid is not None and estimate.valid < estimate.samples:
+            details.append(f"вне области определения {1 - estimate.valid / estimate.samples:.1%} выборки")
+        if estimate.contributions:
+            details.append("вклад: " + ", ".join(
+                f"{var_name} {share:.0%}" for var_name, share in
+                sorted(estimate.contributions.items(), key=lambda item: -item[1])))
+        self.result_label.setText(", ".join(details))
+        set_state(self.result_label, "")
+
+    def show_result(self, formula_name, input_fields, input_values, calculation_result):
+        """Обработка результата расчета (вызывается в GUI-потоке)"""
         if calculation_result["success"]:
             result = calculation_result["result"]
             target_var = calculation_result["target_variable"]
 
-            # Создаем копию input_values и добавляем результат
-            all_data = input_values.copy()
-            all_data[target_var] = f"{result:.{self.calculation_precision}f}"
+            # результат в единице, указанной в поле искомой величины (если указана)
+            result_text = f"{result:.{self.calculation_precision}f}"
+            if "unit" in calculation_result:
+                result_text = (f"{calculation_result['display_result']:.{self.calculation_precision}f}"
+                               f" {calculation_result['unit']}")
+
+            # в историю пишутся числа в единицах формулы, а не текст полей ("5 кВ")
+            all_data = dict(calculation_result["values"])
+            all_data[target_var] = result
 
-            self.db.add_calculation(formula_name, all_data, str(result))
+            self.db.add_calculation(formula_name, all_data, result, target_var)
 
             # отображаем результат в соответствующем поле ввода
-            if target_var in self.input_fields:
-                result_field = self.input_fields[target_var]
-                result_field.setText(
-                    f"{result:.{self.calculation_precision}f}")
-
-                # применяем зеленый стиль для поле с результатом
-                result_field.setStyleSheet("""
-                    QLineEdit {
-                        background-color: #388e3c;
-                        color: #ffffff;
-                        border: 2px solid #4caf50;
-                        border-radius: 3px;
-                        padding: 5px;
-                        font-weight: bold;
-                    }
-                """)
+            if target_var in input_fields:
+                result_field = input_fields[target_var]
+                result_field.setText(result_text)
+
+                # подсвечиваем поле с результатом
+                set_state(result_field, "result")
 
             # очищаем сообщение об ошибке
             self.result_label.setText("")
+            set_state(self.result_label, "")
 
         else:
+            self.db.add_error(formula_name)
+
             # показываем ошибку красным цветом снизу
-            self.result_label.setText(f"Ошибка: {calculation_result['error']}")
-            self.result_label.setStyleSheet("color: red; font-size: 12px;")
+            self.show_error(f"Ошибка: {calculation_result['error']}")
 
     def reset_input_fields_style(self):
-        """Сбрасывает стили всех полей ввода к обычному"""
-        theme = DARK_THEME if self.current_theme == "dark" else LIGHT_THEME
+        """Снимает подсветку результата с полей ввода"""
         for input_field in self.input_fields.values():
-            input_field.setStyleSheet(theme["input_field"])
+            if input_field.property("state"):
+                set_state(input_field, "")
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class ResultCache:
+    """
+    Потокобезопасный LRU-кэш результатов вычислений с ограничением размера,
+    необязательным временем жизни записей и счетчиками попаданий
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        if maxsize <= 0:
+            raise ValueError("Размер кэша должен быть больше нуля")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(formula_name, target_var, known_vars):
+        """Ключ кэша: формула, искомая переменная и нормализованные значения"""
+        # + 0.0 превращает -0.0 в 0.0, чтобы одинаковые входы давали один ключ
+        values = tuple(sorted((name, float(value) + 0.0)
+                              for name, value in known_vars.items()))
+        return (formula_name, target_var, values)
+
+    def get(self, key, default=MISSING):
+        """Возвращает значение из кэша или default, если записи нет"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Сохраняет значение, при переполнении удаляет самую старую запись"""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Берет значение из кэша, а при промахе вычисляет и сохраняет его"""
+        value = self.get(key)
+        if value is MISSING:
+            # вычисление идет вне блокировки, чтобы не тормозить другие потоки
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Счетчики кэша"""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self):
+        return len(self._data)
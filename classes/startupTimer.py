@@ -0,0 +1,125 @@
+import sys
+import time
+from importlib.abc import MetaPathFinder
+
+
+class TimedLoader:
+    """Обертка загрузчика модуля, измеряющая время его выполнения"""
+
+    def __init__(self, loader, name, timer):
+        self.loader = loader
+        self.name = name
+        self.timer = timer
+
+    def create_module(self, spec):
+        # модули расширений (PyQt6, numpy) загружаются именно здесь
+        with self.timer.measure(self.name):
+            return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self.timer.measure(self.name):
+            self.loader.exec_module(module)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class ImportTimer(MetaPathFinder):
+    """
+    Перехватчик импорта: для каждого модуля запоминает полное время загрузки
+    и собственное время (без вложенных импортов), как python -X importtime
+    """
+
+    def __init__(self):
+        self.times = {}  # модуль -> [собственное время, полное время]
+        self._stack = []
+        self._finding = set()
+
+    def find_spec(self, name, path=None, target=None):
+        if name in self._finding:
+            return None
+        self._finding.add(name)
+        try:
+            # спецификацию ищут остальные поисковики, мы только оборачиваем загрузчик
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding.discard(name)
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = TimedLoader(spec.loader, name, self)
+        return spec
+
+    def measure(self, name):
+        return ImportMeasure(self, name)
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+
+class ImportMeasure:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.timer._stack.append(0.0)
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        children = self.timer._stack.pop()
+        if self.timer._stack:
+            self.timer._stack[-1] += elapsed
+        times = self.timer.times.setdefault(self.name, [0.0, 0.0])
+        times[0] += elapsed - children
+        times[1] += elapsed
+
+
+class StartupTimer:
+    """
+    Отчет о времени запуска: время импорта модулей и этапы до первого кадра.
+    Время отсчитывается от start (момент запуска main.py)
+    """
+
+    def __init__(self, start=None, budget_ms=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.budget_ms = budget_ms
+        self.imports = ImportTimer()
+        self.stages = []
+
+    def mark(self, stage):
+        """Отмечаем завершение этапа запуска"""
+        self.stages.append((stage, (time.perf_counter() - self.start) * 1000))
+
+    def elapsed_ms(self, stage):
+        for name, ms in self.stages:
+            if name == stage:
+                return ms
+        return None
+
+    def over_budget(self, stage="первый кадр"):
+        """Первый кадр показан позже бюджета"""
+        ms = self.elapsed_ms(stage)
+        return self.budget_ms is not None and ms is not None and ms > self.budget_ms
+
+    def report(self, top=15):
+        lines = ["Этапы запуска (мс от старта):"]
+        lines.extend(f"  {ms:8.1f}  {stage}" for stage, ms in self.stages)
+        lines.append(f"Самые долгие импорты (мс, собственное / полное, всего {len(self.imports.times)}):")
+        slowest = sorted(self.imports.times.items(), key=lambda item: item[1][0], reverse=True)
+        lines.extend(f"  {own * 1000:8.1f} / {total * 1000:8.1f}  {name}"
+                     for name, (own, total) in slowest[:top])
+        if self.budget_ms is not None:
+            verdict = "превышен" if self.over_budget() else "соблюден"
+            lines.append(f"Бюджет до первого кадра {self.budget_ms} мс: {verdict}")
+        return "\n".join(lines)
@@ -0,0 +1,41 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class SweepTableModel(QAbstractTableModel):
+    """
+    Таблица результатов расчета по сетке. Строки - значения первой переменной,
+    столбцы - второй (или один столбец результата). Текст ячеек формируется
+    только для видимых ячеек, поэтому размер сетки на интерфейс не влияет
+    """
+
+    def __init__(self, sweep, precision=6, parent=None):
+        super().__init__(parent)
+        self.sweep = sweep
+        self.precision = precision
+        self.row_name, self.row_values = sweep.axes[0]
+        self.column_values = sweep.axes[1][1] if len(sweep.axes) > 1 else None
+        # для одной оси массив результатов - столбец таблицы
+        self.result = sweep.result if self.column_values is not None else sweep.result[:, None]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.result.shape[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.result.shape[1]
+
+    def format_value(self, value):
+        return "—" if value != value else f"{value:.{self.precision}g}"
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Vertical:
+            return f"{self.row_name} = {self.format_value(self.row_values[section])}"
+        if self.column_values is None:
+            return self.sweep.target
+        return f"{self.sweep.axes[1][0]} = {self.format_value(self.column_values[section])}"
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return self.format_value(float(self.result[index.row(), index.column()]))
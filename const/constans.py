@@ -1,28 +1,28 @@
 PHYSICS_CONSTANTS = {
     "Универсальные": {
-        "Скорость света в вакууме": {"value": "3.00×10⁸", "unit": "м/с", "description": "Фундаментальная физическая постоянная"},
-        "Гравитационная постоянная": {"value": "6.67×10⁻¹¹", "unit": "Н·м²/кг²", "description": "Постоянная в законе всемирного тяготения"},
-        "Постоянная Планка": {"value": "6.63×10⁻³⁴", "unit": "Дж·с", "description": "Фундаментальная постоянная квантовой механики"},
-        "Постоянная Больцмана": {"value": "1.38×10⁻²³", "unit": "Дж/К", "description": "Постоянная в уравнении состояния идеального газа"},
-        "Постоянная Авогадро": {"value": "6.02×10²³", "unit": "моль⁻¹", "description": "Количество частиц в одном моле вещества"},
+        "Скорость света в вакууме": {"symbol": "c", "value": "3.00×10⁸", "unit": "м/с", "description": "Фундаментальная физическая постоянная"},
+        "Гравитационная постоянная": {"symbol": "G", "value": "6.67×10⁻¹¹", "unit": "Н·м²/кг²", "description": "Постоянная в законе всемирного тяготения"},
+        "Постоянная Планка": {"symbol": "h", "value": "6.63×10⁻³⁴", "unit": "Дж·с", "description": "Фундаментальная постоянная квантовой механики"},
+        "Постоянная Больцмана": {"symbol": "k_B", "value": "1.38×10⁻²³", "unit": "Дж/К", "description": "Постоянная в уравнении состояния идеального газа"},
+        "Постоянная Авогадро": {"symbol": "N_A", "value": "6.02×10²³", "unit": "моль⁻¹", "description": "Количество частиц в одном моле вещества"},
     },
     "Электромагнетизм": {
-        "Элементарный заряд": {"value": "1.60×10⁻¹⁹", "unit": "Кл", "description": "Заряд электрона"},
-        "Постоянная тонкой структуры": {"value": "7.30×10⁻³", "unit": "-", "description": "Безразмерная фундаментальная постоянная"},
-        "Магнитная постоянная": {"value": "1.26×10⁻⁶", "unit": "Гн/м", "description": "Магнитная проницаемость вакуума"},
-        "Электрическая постоянная": {"value": "8.85×10⁻¹²", "unit": "Ф/м", "description": "Электрическая проницаемость вакуума"},
+        "Элементарный заряд": {"symbol": "e", "value": "1.60×10⁻¹⁹", "unit": "Кл", "description": "Заряд электрона"},
+        "Постоянная тонкой структуры": {"symbol": "α", "value": "7.30×10⁻³", "unit": "-", "description": "Безразмерная фундаментальная постоянная"},
+        "Магнитная постоянная": {"symbol": "μ₀", "value": "1.26×10⁻⁶", "unit": "Гн/м", "description": "Магнитная проницаемость вакуума"},
+        "Электрическая постоянная": {"symbol": "ε₀", "value": "8.85×10⁻¹²", "unit": "Ф/м", "description": "Электрическая проницаемость вакуума"},
     },
     "Механика": {
-        "Ускорение свободного падения": {"value": "9.81", "unit": "м/с²", "description": "Стандартное значение на поверхности Земли"},
-        "Атмосферное давление": {"value": "1.01×10⁵", "unit": "Па", "description": "Нормальное атмосферное давление"},
-        "Стандартная плотность воды": {"value": "1000", "unit": "кг/м³", "description": "Плотность воды при 4°C"},
-        "Стандартная плотность воздуха": {"value": "1.29", "unit": "кг/м³", "description": "Плотность воздуха при 0°C"},
+        "Ускорение свободного падения": {"symbol": "g", "value": "9.81", "unit": "м/с²", "description": "Стандартное значение на поверхности Земли"},
+        "Атмосферное давление": {"symbol": "p₀", "value": "1.01×10⁵", "unit": "Па", "description": "Нормальное атмосферное давление"},
+        "Стандартная плотность воды": {"symbol": "ρ_в", "value": "1000", "unit": "кг/м³", "description": "Плотность воды при 4°C"},
+        "Стандартная плотность воздуха": {"symbol": "ρ_возд", "value": "1.29", "unit": "кг/м³", "description": "Плотность воздуха при 0°C"},
     },
     "Астрономия": {
-        "Масса Земли": {"value": "5.97×10²⁴", "unit": "кг", "description": "Масса планеты Земля"},
-        "Масса Солнца": {"value": "1.99×10³⁰", "unit": "кг", "description": "Масса Солнца"},
-        "Астрономическая единица": {"value": "1.50×10¹¹", "unit": "м", "description": "Среднее расстояние от Земли до Солнца"},
-        "Парсек": {"value": "3.09×10¹⁶", "unit": "м", "description": "Астрономическая единица расстояния"},
+        "Масса Земли": {"symbol": "M_З", "value": "5.97×10²⁴", "unit": "кг", "description": "Масса планеты Земля"},
+        "Масса Солнца": {"symbol": "M_С", "value": "1.99×10³⁰", "unit": "кг", "description": "Масса Солнца"},
+        "Астрономическая единица": {"symbol": "а.е.", "value": "1.50×10¹¹", "unit": "м", "description": "Среднее расстояние от Земли до Солнца"},
+        "Парсек": {"symbol": "пк", "value": "3.09×10¹⁶", "unit": "м", "description": "Астрономическая единица расстояния"},
     }
 }
 
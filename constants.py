@@ -0,0 +1,70 @@
+import unicodedata
+from const.constans import PHYSICS_CONSTANTS
+from units import SUPERSCRIPTS, convert, get_unit
+
+
+class Constant:
+    """Постоянная из справочника с числовым значением"""
+
+    __slots__ = ("name", "symbol", "value", "unit")
+
+    def __init__(self, name, symbol, value, unit):
+        self.name = name
+        self.symbol = symbol
+        self.value = value
+        self.unit = unit
+
+
+def parse_number(text):
+    """Число из справочника: "6.67×10⁻¹¹" -> 6.67e-11"""
+    mantissa, _, exponent = text.replace(",", ".").partition("×10")
+    if exponent:
+        return float(f"{mantissa}e{exponent.translate(SUPERSCRIPTS)}")
+    return float(mantissa)
+
+
+def normalize(text):
+    # k_B и kB - одна постоянная, μ₀ и μ0 тоже
+    return unicodedata.normalize("NFKC", text).replace("_", "").strip()
+
+
+def build_index():
+    """
+    Индексы постоянных по обозначению и по названию (без учета регистра).
+    Строятся один раз при импорте
+    """
+    symbols = {}
+    names = {}
+    for constants in PHYSICS_CONSTANTS.values():
+        for name, data in constants.items():
+            constant = Constant(name, data.get("symbol"), parse_number(data["value"]), data["unit"])
+            names[name.casefold()] = constant
+            if constant.symbol:
+                # обозначения регистрозависимы (g и G)
+                symbols[normalize(constant.symbol)] = constant
+    return symbols, names
+
+
+SYMBOLS, NAMES = build_index()
+
+
+def find_constant(text):
+    """Постоянная по обозначению (g, c, G, e, h, k_B, N_A) или названию, иначе None"""
+    text = text.strip()
+    return SYMBOLS.get(normalize(text)) or NAMES.get(text.casefold())
+
+
+def constant_value(text, var_info):
+    """
+    Значение постоянной в единицах переменной формулы. None, если такой
+    постоянной нет или ее размерность не подходит (тогда h - это часы, а не Планк)
+    """
+    constant = find_constant(text)
+    if constant is None:
+        return None
+    try:
+        if get_unit(constant.unit).dims != get_unit(var_info["unit"]).dims:
+            return None
+    except ValueError:
+        return None
+    return convert(constant.value, constant.unit, var_info["unit"])
@@ -0,0 +1,933 @@
+import math
+import re
+import sys
+from collections import ChainMap
+import numpy as np
+from const.formulas import CATEGORIES
+
+
+class FormulaError(Exception):
+    """Ошибка разбора или преобразования формулы"""
+
+
+# функции, которые можно использовать в выражениях, и их обратные
+FUNCTIONS = {
+    "sin": "asin",
+    "cos": "acos",
+    "tan": "atan",
+    "asin": "sin",
+    "acos": "cos",
+    "atan": "tan",
+    "exp": "log",
+    "log": "exp",
+    "sqrt": None,  # обращается через возведение в квадрат
+}
+
+NAMED_CONSTANTS = {"pi": math.pi}
+
+# пространство имен для скомпилированных функций (скалярный вариант)
+MATH_NAMESPACE = {
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan,
+    "exp": math.exp, "log": math.log, "sqrt": math.sqrt,
+    "pi": math.pi,
+}
+
+# пространство имен для векторного варианта (массивы NumPy)
+NUMPY_NAMESPACE = {
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+    "exp": np.exp, "log": np.log, "sqrt": np.sqrt,
+    "pi": np.pi,
+    # деление на ноль помечается как nan, как ZeroDivisionError в скалярном варианте
+    "div": lambda a, b: np.where(b != 0, a / np.where(b != 0, b, 1.0), np.nan),
+}
+
+
+def tracking_div(zeros):
+    """Деление для векторного варианта, которое запоминает маски делений на ноль в zeros"""
+    def div(a, b):
+        zero = b == 0
+        zeros.append(zero)
+        return np.where(zero, np.nan, a / np.where(zero, 1.0, b))
+    return div
+
+
+# сколько строк векторного расчета можно досчитать численно (см. CompiledSolver.with_fallback)
+FALLBACK_ROWS = 1000
+
+# приоритеты операций для генерации исходного кода
+PRECEDENCE = {"add": 1, "sub": 1, "mul": 2, "div": 2, "neg": 3, "pow": 4}
+OPERATORS = {"add": "+", "sub": "-", "mul": "*", "div": "/", "pow": "**"}
+
+# численное решение: точность по x (абсолютная и относительная, до соседних чисел
+# с плавающей точкой), допустимая невязка (абсолютная) и число итераций
+NUMERIC_OPTIONS = {"xtol": 1e-300, "rtol": sys.float_info.epsilon, "ftol": 1e-8, "max_iter": 100}
+
+# к допустимой невязке добавляется погрешность округления:
+# ROUNDING * (|левая часть| + |правая часть|)
+ROUNDING = 16 * sys.float_info.epsilon
+
+NUMBER_RE = re.compile(r"\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?")
+DOMAIN_RE = re.compile(r"^\s*(<=|>=|!=|<|>)\s*(-?[\d.]+(?:[eE][+-]?\d+)?)\s*$")
+
+
+def tokenize(text, variables):
+    """Разбивает выражение на токены, имена переменных берутся из описания формулы"""
+    names = sorted(list(variables) + list(FUNCTIONS) + list(NAMED_CONSTANTS),
+                   key=len, reverse=True)
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        char = text[pos]
+        if char.isspace():
+            pos += 1
+            continue
+        if char in "+-*/^()=":
+            tokens.append(("op", char))
+            pos += 1
+            continue
+        match = NUMBER_RE.match(text, pos)
+        if match:
+            tokens.append(("num", float(match.group())))
+            pos = match.end()
+            continue
+        for name in names:
+            if text.startswith(name, pos):
+                if name in FUNCTIONS:
+                    tokens.append(("func", name))
+                elif name in NAMED_CONSTANTS:
+                    tokens.append(("const", name))
+                else:
+                    tokens.append(("var", name))
+                pos += len(name)
+                break
+        else:
+            raise FormulaError(f"Неизвестный символ в выражении: {text[pos:]}")
+    return tokens
+
+
+class Parser:
+    """Рекурсивный разбор выражения в дерево из кортежей"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None)
+
+    def take(self, value=None):
+        token = self.peek()
+        if token[0] is None or (value is not None and token[1] != value):
+            raise FormulaError(f"Ожидалось '{value}'")
+        self.pos += 1
+        return token
+
+    def parse_equation(self):
+        lhs = self.parse_expr()
+        self.take("=")
+        rhs = self.parse_expr()
+        if self.peek()[0] is not None:
+            raise FormulaError("Лишние символы в конце выражения")
+        return lhs, rhs
+
+    def parse_expr(self):
+        node = self.parse_term()
+        while self.peek() in (("op", "+"), ("op", "-")):
+            op = self.take()[1]
+            node = ("add" if op == "+" else "sub", node, self.parse_term())
+        return node
+
+    def parse_term(self):
+        node = self.parse_unary()
+        while self.peek() in (("op", "*"), ("op", "/")):
+            op = self.take()[1]
+            node = ("mul" if op == "*" else "div", node, self.parse_unary())
+        return node
+
+    def parse_unary(self):
+        if self.peek() == ("op", "-"):
+            self.take()
+            return ("neg", self.parse_unary())
+        return self.parse_power()
+
+    def parse_power(self):
+        node = self.parse_atom()
+        if self.peek() == ("op", "^"):
+            self.take()
+            node = ("pow", node, self.parse_unary())
+        return node
+
+    def parse_atom(self):
+        kind, value = self.take()
+        if kind in ("num", "var", "const"):
+            return (kind, value)
+        if kind == "func":
+            self.take("(")
+            arg = self.parse_expr()
+            self.take(")")
+            return ("call", value, arg)
+        if (kind, value) == ("op", "("):
+            node = self.parse_expr()
+            self.take(")")
+            return node
+        raise FormulaError(f"Неожиданный символ '{value}'")
+
+
+def parse_equation(text, variables):
+    """Разбирает строку вида 'F = m*a' в пару деревьев (левая, правая часть)"""
+    return Parser(tokenize(text, variables)).parse_equation()
+
+
+def count_var(node, name):
+    """Сколько раз переменная встречается в дереве"""
+    kind = node[0]
+    if kind == "var":
+        return 1 if node[1] == name else 0
+    if kind in ("num", "const"):
+        return 0
+    if kind == "call":
+        return count_var(node[2], name)
+    return sum(count_var(child, name) for child in node[1:])
+
+
+def isolate(lhs, rhs, target):
+    """
+    Выражает переменную target из уравнения lhs = rhs,
+    последовательно обращая операции (переменная должна встречаться один раз)
+    """
+    if count_var(lhs, target) + count_var(rhs, target) != 1:
+        raise FormulaError(
+            f"Переменная {target} должна встречаться в формуле ровно один раз")
+    if count_var(lhs, target) == 0:
+        lhs, rhs = rhs, lhs
+
+    while lhs != ("var", target):
+        kind = lhs[0]
+        if kind == "neg":
+            lhs, rhs = lhs[1], ("neg", rhs)
+        elif kind == "call":
+            func, arg = lhs[1], lhs[2]
+            if func == "sqrt":
+                rhs = ("pow", rhs, ("num", 2.0))
+            else:
+                rhs = ("call", FUNCTIONS[func], rhs)
+            lhs = arg
+        else:
+            a, b = lhs[1], lhs[2]
+            in_left = count_var(a, target) == 1
+            if kind == "add":
+                lhs, rhs = (a, ("sub", rhs, b)) if in_left else (b, ("sub", rhs, a))
+            elif kind == "sub":
+                lhs, rhs = (a, ("add", rhs, b)) if in_left else (b, ("sub", a, rhs))
+            elif kind == "mul":
+                lhs, rhs = (a, ("div", rhs, b)) if in_left else (b, ("div", rhs, a))
+            elif kind == "div":
+                lhs, rhs = (a, ("mul", rhs, b)) if in_left else (b, ("div", a, rhs))
+            elif kind == "pow":
+                if not in_left:
+                    lhs, rhs = b, ("div", ("call", "log", rhs), ("call", "log", a))
+                elif b == ("num", 2.0):
+                    lhs, rhs = a, ("call", "sqrt", rhs)
+                else:
+                    lhs, rhs = a, ("pow", rhs, ("div", ("num", 1.0), b))
+            else:
+                raise FormulaError(f"Не удалось обратить операцию {kind}")
+    return rhs
+
+
+def to_source(node, parent=0, vector=False):
+    """
+    Генерирует исходный код Python для дерева выражения.
+    В векторном варианте деление заменяется вызовом div()
+    """
+    kind = node[0]
+    if kind == "num":
+        return repr(node[1])
+    if kind == "const":
+        return node[1]
+    if kind == "var":
+        return f"k[{node[1]!r}]"
+    if kind == "call":
+        return f"{node[1]}({to_source(node[2], vector=vector)})"
+    if kind == "div" and vector:
+        return f"div({to_source(node[1], vector=vector)}, {to_source(node[2], vector=vector)})"
+    if kind == "neg":
+        source = f"-{to_source(node[1], PRECEDENCE['neg'], vector)}"
+    else:
+        prec = PRECEDENCE[kind]
+        # правый операнд некоммутативных операций берем в скобки при равном приоритете
+        right_prec = prec + 1 if kind in ("sub", "div") else prec
+        left_prec = prec + 1 if kind == "pow" else prec
+        source = (f"{to_source(node[1], left_prec, vector)} {OPERATORS[kind]} "
+                  f"{to_source(node[2], right_prec, vector)}")
+    if PRECEDENCE[kind] < parent:
+        return f"({source})"
+    return source
+
+
+def substitute(node, name, replacement):
+    """Заменяет переменную name в дереве на узел replacement"""
+    kind = node[0]
+    if kind == "var":
+        return replacement if node[1] == name else node
+    if kind in ("num", "const"):
+        return node
+    if kind == "call":
+        return ("call", node[1], substitute(node[2], name, replacement))
+    return (kind,) + tuple(substitute(child, name, replacement) for child in node[1:])
+
+
+ZERO, ONE = ("num", 0.0), ("num", 1.0)
+
+
+def add(a, b):
+    return b if a == ZERO else a if b == ZERO else ("add", a, b)
+
+
+def sub(a, b):
+    return a if b == ZERO else ("neg", b) if a == ZERO else ("sub", a, b)
+
+
+def mul(a, b):
+    if ZERO in (a, b):
+        return ZERO
+    return b if a == ONE else a if b == ONE else ("mul", a, b)
+
+
+def div(a, b):
+    return ZERO if a == ZERO else a if b == ONE else ("div", a, b)
+
+
+# производные функций по аргументу g
+DERIVATIVES = {
+    "sin": lambda g: ("call", "cos", g),
+    "cos": lambda g: ("neg", ("call", "sin", g)),
+    "tan": lambda g: div(ONE, ("pow", ("call", "cos", g), ("num", 2.0))),
+    "asin": lambda g: div(ONE, ("call", "sqrt", sub(ONE, ("pow", g, ("num", 2.0))))),
+    "acos": lambda g: ("neg", div(ONE, ("call", "sqrt", sub(ONE, ("pow", g, ("num", 2.0)))))),
+    "atan": lambda g: div(ONE, add(ONE, ("pow", g, ("num", 2.0)))),
+    "exp": lambda g: ("call", "exp", g),
+    "log": lambda g: div(ONE, g),
+    "sqrt": lambda g: div(ONE, mul(("num", 2.0), ("call", "sqrt", g))),
+}
+
+
+def derivative(node, name):
+    """Символьная производная дерева выражения по переменной name"""
+    kind = node[0]
+    if kind in ("num", "const"):
+        return ZERO
+    if kind == "var":
+        return ONE if node[1] == name else ZERO
+    if kind == "neg":
+        d = derivative(node[1], name)
+        return ZERO if d == ZERO else ("neg", d)
+    if kind == "call":
+        return mul(DERIVATIVES[node[1]](node[2]), derivative(node[2], name))
+    a, b = node[1], node[2]
+    da, db = derivative(a, name), derivative(b, name)
+    if kind == "add":
+        return add(da, db)
+    if kind == "sub":
+        return sub(da, db)
+    if kind == "mul":
+        return add(mul(da, b), mul(a, db))
+    if kind == "div":
+        return div(sub(mul(da, b), mul(a, db)), ("pow", b, ("num", 2.0)))
+    # степень: (a^b)' = b*a^(b-1)*a' при постоянном показателе, иначе a^b*(b'*ln a + b*a'/a)
+    if db == ZERO:
+        return mul(mul(b, ("pow", a, sub(b, ONE))), da)
+    return mul(node, add(mul(db, ("call", "log", a)), div(mul(b, da), a)))
+
+
+def parse_domain(domain):
+    """Преобразует словарь ограничений {'m': '> 0'} в список (переменная, оператор, граница)"""
+    rules = []
+    for var_name, spec in (domain or {}).items():
+        for part in spec.split(","):
+            match = DOMAIN_RE.match(part)
+            if not match:
+                raise FormulaError(f"Некорректное ограничение для {var_name}: {spec}")
+            rules.append((var_name, match.group(1), float(match.group(2))))
+    return rules
+
+
+def domain_source(rules, target):
+    """Исходный код проверки ограничений для известных переменных (без искомой)"""
+    checks = [f"(k[{var!r}] {op} {bound!r})" for var, op, bound in rules
+              if var != target]
+    return " & ".join(checks) if checks else "True"
+
+
+def target_source(rules, target, name):
+    """
+    Исходный код проверки найденного значения (name) по ограничениям result_domain.
+    Ограничения domain относятся только к введенным значениям: найденные Eₖ = 0
+    или Q < 0 при охлаждении - верные ответы
+    """
+    checks = [f"({name} {op} {bound!r})" for var, op, bound in rules if var == target]
+    return " & ".join(checks) if checks else "True"
+
+
+class CompiledSolver:
+    """Скомпилированное решение формулы относительно одной переменной"""
+
+    __slots__ = ("formula_name", "target", "inputs", "expr_source",
+                 "vector_source", "check_source", "result_source", "func", "vector_funcs",
+                 "fallback")
+
+    def __init__(self, formula_name, target, inputs, expr_source, vector_source,
+                 check_source, result_source="True", fallback=None):
+        self.formula_name = formula_name
+        self.target = target
+        self.inputs = inputs
+        self.expr_source = expr_source
+        self.vector_source = vector_source
+        self.check_source = check_source
+        # ограничения найденного значения (КПД от 0 до 100 %, R >= 0), значение - r
+        self.result_source = result_source
+        self.func = self.compile(MATH_NAMESPACE)
+        self.vector_funcs = None
+        # NumericSolver для значений, где обратная функция не определена
+        self.fallback = fallback
+
+    def compile(self, namespace):
+        """Компилирует проверку ограничений и вычисление в одну функцию"""
+        source = (f"def solve(k):\n"
+                  f"    if not ({self.check_source}):\n"
+                  f"        return None\n")
+        if self.result_source == "True":
+            source += f"    return {self.expr_source}\n"
+        else:
+            # комплексный результат проверяет FormulaEngine.solve (численное решение)
+            source += (f"    r = {self.expr_source}\n"
+                       f"    if r.__class__ is not complex and not ({self.result_source}):\n"
+                       f"        return None\n"
+                       f"    return r\n")
+        scope = dict(namespace)
+        exec(compile(source, f"<{self.formula_name}: {self.target}>", "exec"), scope)
+        return scope["solve"]
+
+    def vectorized(self):
+        """
+        Возвращает пару функций (вычисление, проверка ограничений) для массивов NumPy.
+        Компилируются при первом обращении
+        """
+        if self.vector_funcs is None:
+            # деления на ноль запоминаются: такие строки не решаются численно
+            source = (f"def compute(k):\n"
+                      f"    zeros = []\n"
+                      f"    div = tracking_div(zeros)\n"
+                      f"    return {self.vector_source}, zeros\n"
+                      f"def check(k):\n"
+                      f"    return {self.check_source}\n"
+                      f"def allowed(r):\n"
+                      f"    return {self.result_source}\n")
+            scope = dict(NUMPY_NAMESPACE, tracking_div=tracking_div)
+            exec(compile(source, f"<{self.formula_name}: {self.target} (numpy)>", "exec"),
+                 scope)
+            compute, check, allowed = scope["compute"], scope["check"], scope["allowed"]
+
+            def solve(k):
+                result, zeros = compute(k)
+                if self.fallback is not None:
+                    result = self.with_fallback(k, result, zeros, check)
+                if self.result_source != "True":
+                    # результаты вне ограничений искомой заменяются на nan
+                    result = np.where(allowed(result), result, np.nan)
+                return result
+            self.vector_funcs = (solve, check)
+        return self.vector_funcs
+
+    def with_fallback(self, k, result, zeros, check):
+        """
+        Строки, где формула дала nan или inf, пересчитываются численно. Кроме строк
+        с делением на ноль: у них решения нет (F = f в формуле линзы) или оно не
+        единственное (U = 0 и I = 0 в законе Ома), и строк вне ограничений известных.
+        Численно решаются не больше FALLBACK_ROWS строк, остальные остаются nan:
+        вне области определения обратной функции (asin от числа больше 1) корня
+        обычно нет, а перебор точек для каждой такой строки дорог
+        """
+        failed = ~np.isfinite(result)
+        if not failed.any():
+            return result
+        for zero in zeros:
+            failed = failed & ~zero
+        failed = failed & check(k)
+        shape = np.broadcast_shapes(np.shape(failed), *(np.shape(value) for value in k.values()))
+        rows = np.flatnonzero(np.broadcast_to(failed, shape))[:FALLBACK_ROWS]
+        if not len(rows):
+            return result
+        result = np.array(np.broadcast_to(result, shape), dtype=float).ravel()
+        known = {name: np.broadcast_to(value, shape).ravel()[rows] for name, value in k.items()}
+        result[rows] = self.fallback.vectorized()[0](known)
+        return result.reshape(shape)
+
+    def __call__(self, known_vars):
+        return self.func(known_vars)
+
+
+def scan_steps():
+    """
+    Порядок перебора точек при поиске интервала со сменой знака: ряд 1-2-5
+    от 1 и -1 наружу (вверх и вниз по порядкам, поочередно), затем ноль.
+    Каждая точка сравнивается с предыдущей в том же направлении
+    """
+    up = [m * 10.0 ** e for e in range(0, 41) for m in (1, 2, 5)][1:]
+    down = [m * 10.0 ** e for e in range(-1, -41, -1) for m in (5, 2, 1)]
+    steps = []
+    for x_up, x_down in zip(up, down):
+        # направления: 0 - положительные вверх, 1 - вниз, 2 и 3 - то же для отрицательных
+        steps += [(x_up, 0), (x_down, 1), (-x_up, 2), (-x_down, 3)]
+    return steps
+
+
+SCAN_STEPS = scan_steps()
+# граница перебора: корень за ней или у нее (невязка 1/x убывает до бесконечности) не ищется
+SCAN_LIMIT = max(abs(x) for x, _ in SCAN_STEPS)
+# смещение пробных точек при проверке, что уравнение не выполняется тождественно
+PROBE_STEP = 0.1234567
+
+# на сколько частей делится интервал со сменой знака, если в нем полюс
+REFINE_POINTS = 32
+
+
+def brent(f, a, b, fa, fb, xtol, rtol, max_iter):
+    """Метод Брента: корень f на [a, b], если f(a) и f(b) разного знака"""
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(max_iter):
+        if fb * fc > 0:
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol = 2 * rtol * abs(b) + 0.5 * xtol
+        m = 0.5 * (c - b)
+        if abs(m) <= tol or fb == 0:
+            return b
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            # обратная квадратичная интерполяция или секущая
+            s = fb / fa
+            if a == c:
+                p, q = 2 * m * s, 1 - s
+            else:
+                q, r = fa / fc, fb / fc
+                p = s * (2 * m * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * m * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            d = e = m
+        a, fa = b, fb
+        b += d if abs(d) > tol else (tol if m > 0 else -tol)
+        fb = f(b)
+    return b
+
+
+class NumericSolver:
+    """
+    Численное решение формулы относительно переменной, которую нельзя выразить
+    (или если обратная функция не определена для введенных значений).
+    Интервал со сменой знака ищется перебором точек, корень уточняется методом
+    Брента; без смены знака (касание) - методом Ньютона. Производная выводится
+    символьно и компилируется один раз. Интерфейс тот же, что у CompiledSolver
+    """
+
+    __slots__ = ("formula_name", "target", "inputs", "lhs", "rhs", "rules",
+                 "result_rules", "options", "funcs", "vector_funcs")
+
+    def __init__(self, formula_name, target, inputs, lhs, rhs, rules, options,
+                 result_rules=()):
+        self.formula_name = formula_name
+        self.target = target
+        self.inputs = inputs
+        self.lhs = lhs
+        self.rhs = rhs
+        self.rules = rules
+        # ограничения на найденное значение (result_domain формулы)
+        self.result_rules = result_rules
+        self.options = options  # общие настройки движка (NUMERIC_OPTIONS)
+        self.funcs = None
+        self.vector_funcs = None
+
+    def compile(self, namespace, vector):
+        """Левая и правая части, производная невязки, ограничения известных и искомой"""
+        # искомая в коде - аргумент x функций
+        x = ("const", "x")
+        lhs, rhs = substitute(self.lhs, self.target, x), substitute(self.rhs, self.target, x)
+        slope = substitute(derivative(sub(self.lhs, self.rhs), self.target), self.target, x)
+        check = domain_source(self.rules, self.target)
+        allowed = target_source(self.result_rules, self.target, "x")
+        source = (f"def sides(k, x):\n"
+                  f"    return {to_source(lhs, vector=vector)}, {to_source(rhs, vector=vector)}\n"
+                  f"def slope(k, x):\n"
+                  f"    return {to_source(slope, vector=vector)}\n"
+                  f"def check(k):\n"
+                  f"    return {check}\n"
+                  f"def allowed(x):\n"
+                  f"    return {allowed}\n")
+        scope = dict(namespace)
+        suffix = " (numpy)" if vector else ""
+        exec(compile(source, f"<{self.formula_name}: {self.target}, численно{suffix}>", "exec"), scope)
+        return scope["sides"], scope["slope"], scope["check"], scope["allowed"]
+
+    def func(self, known_vars):
+        """Скалярное решение: корень или None"""
+        if self.funcs is None:
+            self.funcs = self.compile(MATH_NAMESPACE, vector=False)
+        sides, slope, check, allowed = self.funcs
+        if not check(known_vars):
+            return None
+        xtol, rtol, ftol, max_iter = (self.options[key] for key in ("xtol", "rtol", "ftol", "max_iter"))
+
+        def residual(x):
+            # невязка и ее масштаб; вне области определения - nan
+            if not allowed(x):
+                return math.nan, math.nan
+            try:
+                left, right = sides(known_vars, x)
+                value = left - right
+            except (ArithmeticError, ValueError):
+                return math.nan, math.nan
+            if isinstance(value, complex):
+                return math.nan, math.nan
+            return value, abs(left) + abs(right)
+
+        def error(value, scale):
+            return abs(value) / scale if scale else (0.0 if value == 0 else math.inf)
+
+        def accepted(value, scale):
+            return abs(value) <= ftol + ROUNDING * scale
+
+        def unique(x):
+            # уравнение, которое выполняется при любом x (0 = 0 * x), решения не задает
+            step = PROBE_STEP * (1 + abs(x))
+            probes = [residual(t) for t in (x - step, x + step)]
+            if all(value != value or accepted(value, scale) for value, scale in probes) \
+                    and any(value == value for value, _ in probes):
+                return None
+            return x
+
+        def refine(a, b, fa, fb, depth=0):
+            # у полюса (1/x) знак тоже меняется, но невязка там не мала: тогда
+            # интервал просматривается подробнее - корень может быть рядом с полюсом
+            root = brent(lambda t: residual(t)[0], a, b, fa, fb, xtol, rtol, max_iter)
+            if accepted(*residual(root)):
+                return root
+            if depth:
+                return None
+            last = (a, fa)
+            for t in np.linspace(a, b, REFINE_POINTS + 1)[1:].tolist():
+                ft = residual(t)[0] if t != b else fb
+                if ft != ft:
+                    continue
+                if (ft < 0) != (last[1] < 0):
+                    root = refine(last[0], t, last[1], ft, depth + 1)
+                    if root is not None:
+                        return root
+                last = (t, ft)
+            return None
+
+        # последняя точка с конечной невязкой в каждом направлении перебора
+        start = {x: residual(x) for x in (1.0, -1.0)}
+        last = {side: (x, start[x][0]) for side, x in ((0, 1.0), (1, 1.0), (2, -1.0), (3, -1.0))}
+        best, best_error = None, math.inf
+        for x, (value, scale) in start.items():
+            if value == 0:
+                return unique(x)
+            if error(value, scale) < best_error:
+                best, best_error = x, error(value, scale)
+        for x, side in SCAN_STEPS + [(0.0, 1), (0.0, 3)]:
+            fx, scale = residual(x)
+            if fx == 0:
+                return unique(x)
+            if fx != fx:
+                continue
+            if error(fx, scale) < best_error:
+                best, best_error = x, error(fx, scale)
+            previous, fp = last[side]
+            last[side] = (x, fx)
+            if fp == fp and (fx < 0) != (fp < 0):
+                root = refine(previous, x, fp, fx)
+                if root is not None:
+                    return unique(root)
+        # невязка меньше всего на границе перебора - она убывает к бесконечности
+        # (1/F - 1/f - 1/d при F = f), корня нет
+        if best is None or abs(best) >= SCAN_LIMIT:
+            return None
+
+        # смены знака нет (корень-касание) - метод Ньютона от точки с наименьшей невязкой,
+        # пока шаг не станет меньше точности по x
+        x = best
+        for _ in range(max_iter):
+            value, scale = residual(x)
+            if value == 0:
+                return unique(x)
+            try:
+                step = value / slope(known_vars, x)
+            except (ArithmeticError, ValueError):
+                return None
+            if isinstance(step, complex) or not math.isfinite(step):
+                return None
+            x -= step
+            if abs(x) >= SCAN_LIMIT:
+                return None
+            if abs(step) <= xtol + rtol * abs(x):
+                return unique(x) if accepted(*residual(x)) else None
+        return None
+
+    def vectorized(self):
+        """
+        Пара функций (решение, проверка ограничений) для массивов NumPy:
+        тот же перебор точек для всех строк сразу, затем метод Ньютона,
+        внутри найденных интервалов - с защитой бисекцией
+        """
+        if self.vector_funcs is None:
+            funcs = self.compile(NUMPY_NAMESPACE, vector=True)
+            self.vector_funcs = (lambda k: self.solve_vector(k, funcs), funcs[2])
+        return self.vector_funcs
+
+    @np.errstate(all="ignore")
+    def solve_vector(self, known_vars, funcs):
+        sides, slope, check, allowed = funcs
+        xtol, rtol, ftol, max_iter = (self.options[key] for key in ("xtol", "rtol", "ftol", "max_iter"))
+        shape = np.broadcast_shapes(*(np.shape(value) for value in known_vars.values()))
+        size = math.prod(shape)
+        known = {name: np.broadcast_to(value, shape).ravel() for name, value in known_vars.items()}
+
+        def residual(k, x, rows):
+            left, right = sides(k, x)
+            value = np.broadcast_to(left - right, (rows,))
+            scale = np.broadcast_to(np.abs(left) + np.abs(right), (rows,))
+            return np.where(allowed(x), value, np.nan), scale
+
+        # перебор точек: первый интервал со сменой знака для каждой строки;
+        # массивы перебора относятся только к строкам, где интервал еще не найден
+        root = np.full(size, np.nan)
+        lower, upper = np.full(size, np.nan), np.full(size, np.nan)
+        found = np.zeros(size, dtype=bool)
+        best = np.full(size, np.nan)
+        active, active_known = np.arange(size), known
+        best_error = np.full(size, np.inf)
+        start = {x: residual(known, x, size) for x in (1.0, -1.0)}
+        # последняя точка с конечной невязкой в каждом направлении перебора
+        last = {side: (np.full(size, x), start[x][0]) for side, x in ((0, 1.0), (1, 1.0), (2, -1.0), (3, -1.0))}
+        for x, side in [(1.0, None), (-1.0, None)] + SCAN_STEPS + [(0.0, 1), (0.0, 3)]:
+            if side is None:
+                fx, scale = (value[active] for value in start[x])
+            else:
+                fx, scale = residual(active_known, x, len(active))
+            error = np.abs(fx) / np.where(scale > 0, scale, 1.0)
+            better = error < best_error
+            best[active[better]], best_error[better] = x, error[better]
+            new = fx == 0
+            root[active[new]] = x
+            if side is not None:
+                last_x, fp = last[side]
+                change = ~new & ((fx < 0) & (fp > 0) | (fx > 0) & (fp < 0))
+                lower[active[change]] = np.minimum(x, last_x[change])
+                upper[active[change]] = np.maximum(x, last_x[change])
+                new |= change
+                finite = np.isfinite(fx)
+                last[side] = np.where(finite, x, last_x), np.where(finite, fx, fp)
+            if new.any():
+                found[active[new]] = True
+                keep = ~new
+                active, best_error = active[keep], best_error[keep]
+                if not len(active):
+                    break
+                active_known = {name: value[active] for name, value in known.items()}
+                last = {side: (last_x[keep], fp[keep]) for side, (last_x, fp) in last.items()}
+
+        # метод Ньютона; для строк с интервалом шаг за его пределы заменяется бисекцией.
+        # Строка сходится, когда шаг (или интервал) меньше точности по x; сошедшиеся
+        # строки выбывают, итерации идут только по оставшимся
+        rows = np.flatnonzero(np.isnan(root))
+        k = {name: value[rows] for name, value in known.items()}
+        bracket = found[rows]
+        a, b = lower[rows], upper[rows]
+        # без интервала - от точки с наименьшей невязкой, но не от границы перебора
+        x = np.where(bracket, (a + b) / 2,
+                     np.where(np.abs(best[rows]) < SCAN_LIMIT, best[rows], np.nan))
+        fa = np.where(bracket, residual(k, np.where(bracket, a, x), len(rows))[0], np.nan)
+        moved = np.full(len(rows), np.inf)  # последний шаг
+        pending = np.arange(len(rows))  # номера в rows
+        solution = np.full(len(rows), np.nan)
+        accepted = np.zeros(len(rows), dtype=bool)
+        for _ in range(max_iter + 1):
+            fx, scale = residual(k, x, len(pending))
+            tol = xtol + rtol * np.abs(x)
+            # у полюса (1/x) знак тоже меняется, но невязка там не мала
+            converged = np.abs(fx) <= ftol + ROUNDING * scale
+            done = (fx == 0) | (np.abs(moved) <= tol) | (bracket & (b - a <= tol)) | ~np.isfinite(x)
+            solution[pending[done]], accepted[pending[done]] = x[done], converged[done]
+            keep = ~done
+            if not keep.any():
+                break
+            pending, bracket, x, fx, a, b, fa = (
+                value[keep] for value in (pending, bracket, x, fx, a, b, fa))
+            k = {name: value[keep] for name, value in k.items()}
+            left = bracket & ((fx < 0) == (fa < 0))
+            right = bracket & ~left
+            a, fa = np.where(left, x, a), np.where(left, fx, fa)
+            b = np.where(right, x, b)
+            newton = x - fx / slope(k, x)
+            inside = np.isfinite(newton) & np.where(bracket, (newton > a) & (newton < b),
+                                                    np.abs(newton) < SCAN_LIMIT)
+            step = np.where(inside, newton, np.where(bracket, (a + b) / 2, np.nan))
+            moved, x = step - x, step
+
+        # строки с полюсом в интервале (их немного) решаются скалярно с подробным просмотром
+        root[rows] = np.where(accepted, solution, np.nan)
+        for row in rows[found[rows] & ~accepted].tolist():
+            result = self.func({name: float(value[row]) for name, value in known.items()})
+            if result is not None:
+                root[row] = result
+
+        # уравнение, которое выполняется при любом x (0 = 0 * x), решения не задает
+        rows = np.flatnonzero(np.isfinite(root))
+        if len(rows):
+            k = {name: value[rows] for name, value in known.items()}
+            step = PROBE_STEP * (1 + np.abs(root[rows]))
+            (low, low_scale), (high, high_scale) = (residual(k, root[rows] + d, len(rows))
+                                                    for d in (-step, step))
+            identity = ((np.isnan(low) | (np.abs(low) <= ftol + ROUNDING * low_scale))
+                        & (np.isnan(high) | (np.abs(high) <= ftol + ROUNDING * high_scale))
+                        & ~(np.isnan(low) & np.isnan(high)))
+            root[rows[identity]] = np.nan
+        return root.reshape(shape)
+
+    def __call__(self, known_vars):
+        return self.func(known_vars)
+
+
+class FormulaEngine:
+    """
+    Хранит разобранные формулы и скомпилированные обратные решения.
+    Формула компилируется при первом обращении, дальше решение - это
+    поиск в словаре и вызов функции
+    """
+
+    def __init__(self, categories=CATEGORIES):
+        self.solvers = {}
+        self.gradients = {}
+        # настройки численного решения, общие для всех формул
+        self.numeric_options = dict(NUMERIC_OPTIONS)
+        # формулы каталога загружаются по разделам при первом обращении,
+        # добавленные через add_formula хранятся отдельно и имеют приоритет
+        formulas = getattr(categories, "formulas", None)
+        if formulas is None:
+            formulas = {formula_name: formula_info for category_formulas in categories.values()
+                        for formula_name, formula_info in category_formulas.items()}
+        self.definitions = ChainMap({}, formulas)
+
+    def add_formula(self, formula_name, formula_info):
+        """Регистрирует формулу (компиляция откладывается до первого решения)"""
+        self.definitions[formula_name] = formula_info
+        for cache in (self.solvers, self.gradients):
+            for key in [key for key in cache if key[0] == formula_name]:
+                del cache[key]
+
+    def compile_formula(self, formula_name):
+        """
+        Выводит и компилирует решения для всех переменных формулы. Переменные,
+        которые нельзя выразить (встречаются несколько раз), решаются численно
+        """
+        formula_info = self.definitions[formula_name]
+        variables = formula_info["variables"]
+        expression = formula_info.get("expression", formula_info["formula"])
+        lhs, rhs = parse_equation(expression, variables)
+        rules = parse_domain(formula_info.get("domain"))
+        result_rules = parse_domain(formula_info.get("result_domain"))
+
+        compiled = {}
+        for target in variables:
+            inputs = tuple(name for name in variables if name != target)
+            numeric = NumericSolver(formula_name, target, inputs, lhs, rhs, rules,
+                                    self.numeric_options, result_rules)
+            try:
+                expr = isolate(lhs, rhs, target)
+            except FormulaError:
+                compiled[(formula_name, target)] = numeric
+                continue
+            compiled[(formula_name, target)] = CompiledSolver(
+                formula_name, target, inputs, to_source(expr),
+                to_source(expr, vector=True), domain_source(rules, target),
+                target_source(result_rules, target, "r"), numeric)
+        self.solvers.update(compiled)
+        return compiled
+
+    def get_solver(self, formula_name, target):
+        solver = self.solvers.get((formula_name, target))
+        if solver is None:
+            if formula_name not in self.definitions:
+                return None
+            solver = self.compile_formula(formula_name).get((formula_name, target))
+        return solver
+
+    def get_gradient(self, formula_name, target):
+        """
+        Частные производные target по остальным переменным формулы (порядок как
+        в solver.inputs). Выводятся неявным дифференцированием уравнения
+        F = левая часть - правая часть: dy/dx = -F'x / F'y, поэтому годятся и для
+        переменных, которые решаются численно. Функция принимает значения всех
+        переменных, включая найденное значение target
+        """
+        gradient = self.gradients.get((formula_name, target))
+        if gradient is None:
+            formula_info = self.definitions[formula_name]
+            variables = formula_info["variables"]
+            lhs, rhs = parse_equation(formula_info.get("expression", formula_info["formula"]), variables)
+            equation = sub(lhs, rhs)
+            partials = ", ".join(f"-({to_source(derivative(equation, name))}) / d"
+                                 for name in variables if name != target)
+            source = (f"def gradient(k):\n"
+                      f"    d = {to_source(derivative(equation, target))}\n"
+                      f"    return [{partials}]\n")
+            scope = dict(MATH_NAMESPACE)
+            exec(compile(source, f"<{formula_name}: d{target}>", "exec"), scope)
+            gradient = self.gradients[(formula_name, target)] = scope["gradient"]
+        return gradient
+
+    def solve(self, formula_name, known_vars, target):
+        """Решает формулу относительно target; None, если решения нет"""
+        solver = self.get_solver(formula_name, target)
+        if solver is None:
+            return None
+        try:
+            result = solver.func(known_vars)
+        except ZeroDivisionError:
+            # решения нет (F = f в формуле линзы) или оно не единственное (U = 0 и I = 0
+            # в законе Ома): численный поиск нашел бы случайное значение
+            return None
+        except (ArithmeticError, ValueError):
+            # обратная функция не определена (asin(1.2), log(-1)) - ищем корень численно
+            if getattr(solver, "fallback", None) is None:
+                raise
+            result = solver.fallback(known_vars)
+        # дробные степени отрицательных чисел дают комплексный результат
+        if isinstance(result, complex):
+            result = solver.fallback(known_vars) if getattr(solver, "fallback", None) else None
+        return result
+
+
+_engine = None
+
+
+def get_engine():
+    """Общий экземпляр движка формул"""
+    global _engine
+    if _engine is None:
+        _engine = FormulaEngine()
+    return _engine
@@ -1,9 +1,69 @@
-from classes.mainClass import PhysicsCalculator
-from PyQt6.QtWidgets import QApplication
+import argparse
 import sys
+import time
 
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
+# момент запуска: от него считается время до первого кадра
+START = time.perf_counter()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Калькулятор для физики")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="вывести время запуска по этапам и модулям и закрыть приложение")
+    parser.add_argument("--startup-budget", type=float, metavar="МС",
+                        help="бюджет времени до первого кадра; при превышении код возврата 1")
+    parser.add_argument("--loop-report", action="store_true",
+                        help="при выходе вывести задержки цикла событий (отзывчивость интерфейса)")
+    # остальные аргументы передаются Qt
+    return parser.parse_known_args(argv)
+
+
+def main(argv=None):
+    args, qt_args = parse_args(sys.argv[1:] if argv is None else argv)
+    report = args.startup_report or args.startup_budget is not None
+
+    from classes.startupTimer import StartupTimer
+    timer = StartupTimer(START, args.startup_budget)
+    if report:
+        timer.imports.install()
+
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
+    app = QApplication(sys.argv[:1] + qt_args)
+    timer.mark("QApplication")
+
+    from classes.mainClass import PhysicsCalculator
+    timer.mark("импорт модулей окна")
     window = PhysicsCalculator()
+    timer.mark("окно создано")
+
+    def on_first_frame():
+        timer.mark("первый кадр")
+        timer.imports.uninstall()
+        if report:
+            # отчет выводим после отложенной части запуска
+            QTimer.singleShot(0, finish_report)
+
+    def finish_report():
+        timer.mark("отложенный запуск")
+        print(timer.report(), file=sys.stderr)
+        window.close()
+
+    window.first_frame_shown.connect(on_first_frame)
     window.show()
-    sys.exit(app.exec())
+
+    if args.loop_report:
+        from classes.calcExecutor import EventLoopMonitor
+        monitor = EventLoopMonitor(parent=window)
+        monitor.start()
+        app.aboutToQuit.connect(lambda: print(
+            "Задержки цикла событий: " + ", ".join(
+                f"{name} = {value:.1f}" if isinstance(value, float) else f"{name} = {value}"
+                for name, value in monitor.stats().items()), file=sys.stderr))
+
+    code = app.exec()
+    return 1 if timer.over_budget() else code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+import heapq
+import itertools
+from classes.resultCache import ResultCache
+from const.formulas import CATEGORIES
+from constants import find_constant
+from formula_engine import FormulaError, get_engine
+from units import convert, get_unit, is_difference, parse_value, split_quantity
+
+# сколько планов (известные величины, искомая) хранится в кэше
+PLAN_CACHE_SIZE = 256
+
+
+class Step:
+    """Шаг плана: формула, из которой выражается переменная var_name"""
+
+    __slots__ = ("formula_name", "var_name", "output", "inputs")
+
+    def __init__(self, formula_name, var_name, output, inputs):
+        self.formula_name = formula_name
+        self.var_name = var_name
+        self.output = output  # величина-результат
+        self.inputs = inputs  # ((переменная формулы, величина), ...)
+
+    def __repr__(self):
+        return f"Step({self.formula_name!r}, {self.var_name!r})"
+
+
+class ChainResult:
+    """Результат цепочки: значение искомой величины и выполненные шаги"""
+
+    def __init__(self, target, value, unit, steps):
+        self.target = target
+        self.value = value
+        self.unit = unit
+        self.steps = steps  # [(формула, переменная, значение, единица)]
+
+
+class SolvePlanner:
+    """
+    Планировщик расчета по цепочке формул. Величины разных формул совпадают,
+    если у переменных одно обозначение (или одно поле quantity в каталоге) и
+    одна размерность. Для каждой величины индексируются формулы, которые могут
+    ее дать; кратчайшая цепочка ищется алгоритмом Кнута (Дейкстра для
+    гиперграфа), планы кэшируются по паре (известные величины, искомая)
+    """
+
+    def __init__(self, categories=CATEGORIES, engine=None, cache=None):
+        self.engine = engine or get_engine()
+        # промежуточные результаты шагов (ResultCache), можно разделять с Calculator
+        self.cache = cache if cache is not None else ResultCache(maxsize=1024)
+        self.plans = ResultCache(maxsize=PLAN_CACHE_SIZE)
+        self.quantities = {}  # величина -> описание (единица и описание переменной)
+        self.names = {}  # обозначение или название величины -> [величины]
+        self.steps = []
+        self.consumers = {}  # величина -> номера шагов, где она нужна
+        for formulas in categories.values():
+            for formula_name, formula_info in formulas.items():
+                self.add_formula(formula_name, formula_info)
+
+    @staticmethod
+    def quantity_key(var_name, var_info):
+        return (var_info.get("quantity", var_name), get_unit(var_info["unit"]).dims)
+
+    def add_formula(self, formula_name, formula_info):
+        """Индексирует, какие величины можно получить из формулы"""
+        variables = formula_info["variables"]
+        keys = {}
+        for var_name, var_info in variables.items():
+            key = keys[var_name] = self.quantity_key(var_name, var_info)
+            self.quantities.setdefault(key, var_info)
+            # обозначение регистрируется, даже если величина уже известна
+            # под другим обозначением (из другой формулы)
+            for name in {var_name, key[0]}:
+                candidates = self.names.setdefault(name, [])
+                if key not in candidates:
+                    candidates.append(key)
+        for var_name in variables:
+            inputs = tuple((name, key) for name, key in keys.items() if name != var_name)
+            index = len(self.steps)
+            self.steps.append(Step(formula_name, var_name, keys[var_name], inputs))
+            for key in {key for _, key in inputs}:
+                self.consumers.setdefault(key, []).append(index)
+        # индекс изменился - старые планы могут быть уже не кратчайшими
+        self.plans.clear()
+
+    def resolve(self, name, text=""):
+        """
+        Величины, которые может означать обозначение. Если обозначение
+        неоднозначно (F - сила или фокусное расстояние), остаются величины
+        с размерностью единицы из text
+        """
+        candidates = self.names.get(name)
+        if not candidates:
+            raise ValueError(f"Неизвестная величина: {name}")
+        if len(candidates) == 1:
+            return candidates
+        unit = split_quantity(text)[1]
+        constant = find_constant(text) if text else None
+        if constant is not None:
+            unit = constant.unit
+        if unit:
+            try:
+                dims = get_unit(unit).dims
+            except ValueError as e:
+                raise ValueError(f"Некорректное значение для {name}: {e}") from None
+            candidates = [key for key in candidates if key[1] == dims] or candidates
+        return candidates
+
+    def ambiguous(self, name):
+        descriptions = ", ".join(f"{self.quantities[key]['description']} "
+                                 f"({self.quantities[key]['unit']})" for key in self.names[name])
+        return ValueError(f"Обозначение {name} неоднозначно ({descriptions}), укажите единицу измерения")
+
+    def choose(self, candidates, target_name, target_candidates):
+        """
+        Величины для неоднозначных обозначений (сила Архимеда или сила из второго
+        закона Ньютона - обе F в ньютонах): выбирается вариант с самой короткой
+        цепочкой. Возвращает ({обозначение: величина}, искомая величина, план)
+        """
+        names = list(candidates)
+        options = []
+        for choice in itertools.product(*candidates.values(), target_candidates):
+            steps = self.plan(choice[:-1], choice[-1])
+            if steps is not None:
+                options.append((len(steps), choice, steps))
+        ambiguous = [name for name in names if len(candidates[name]) > 1]
+        if len(target_candidates) > 1:
+            ambiguous.append(target_name)
+        if not options:
+            if ambiguous:
+                raise self.ambiguous(ambiguous[0])
+            raise ValueError(f"Нет цепочки формул, по которой можно найти {target_name}")
+        shortest = min(length for length, _, _ in options)
+        options = [option for option in options if option[0] == shortest]
+        if len(options) > 1:
+            # различаются только неоднозначные обозначения
+            for position, name in enumerate(names + [target_name]):
+                if len({choice[position] for _, choice, _ in options}) > 1:
+                    raise self.ambiguous(name)
+        _, choice, steps = options[0]
+        return dict(zip(names, choice)), choice[-1], steps
+
+    def plan(self, known, target):
+        """Кратчайшая цепочка шагов от известных величин к искомой (None, если ее нет)"""
+        known = frozenset(known)
+        return self.plans.get_or_compute((known, target), lambda: self.find_plan(known, target))
+
+    def find_plan(self, known, target):
+        if target in known:
+            return ()
+        # стоимость величины - число шагов, нужных для ее вычисления
+        cost = dict.fromkeys(known, 0)
+        best = {}
+        remaining = [len({key for _, key in step.inputs}) for step in self.steps]
+        queue = [(0, key) for key in known]
+        # формулы без входов (если такие есть) доступны сразу
+        for index, count in enumerate(remaining):
+            if count == 0:
+                queue.append((1, self.steps[index].output))
+                best.setdefault(self.steps[index].output, index)
+        heapq.heapify(queue)
+        done = set()
+
+        while queue:
+            _, key = heapq.heappop(queue)
+            if key in done:
+                continue
+            done.add(key)
+            if key == target:
+                break
+            for index in self.consumers.get(key, ()):
+                remaining[index] -= 1
+                if remaining[index]:
+                    continue
+                step = self.steps[index]
+                if step.output in done:
+                    continue
+                new_cost = 1 + sum(cost[key] for key in {key for _, key in step.inputs})
+                if new_cost < cost.get(step.output, float("inf")):
+                    cost[step.output] = new_cost
+                    best[step.output] = index
+                    heapq.heappush(queue, (new_cost, step.output))
+        if target not in done:
+            return None
+
+        # шаги в порядке выполнения: сначала те, от которых зависят следующие
+        order = []
+        visited = set(known)
+
+        def visit(key):
+            if key in visited:
+                return
+            visited.add(key)
+            step = self.steps[best[key]]
+            for _, input_key in step.inputs:
+                visit(input_key)
+            order.append(step)
+
+        visit(target)
+        return tuple(order)
+
+    def solve(self, known_values, target):
+        """
+        Расчет по цепочке формул. known_values - {обозначение: текст значения}
+        (числа, единицы измерения и постоянные, как в полях ввода), target -
+        обозначение искомой величины, можно с единицей результата ("p кг·м/с")
+        """
+        target_name, _, target_unit = target.strip().partition(" ")
+        keys, target_key, steps = self.choose(
+            {name: self.resolve(name, text) for name, text in known_values.items()},
+            target_name, self.resolve(target_name, f"1 {target_unit}" if target_unit else ""))
+
+        values = {}
+        for name, text in known_values.items():
+            key = keys[name]
+            var_info = self.quantities[key]
+            constant = find_constant(text)
+            if constant is not None and get_unit(constant.unit).dims == key[1]:
+                text = f"{constant.value!r} {constant.unit}"
+            try:
+                values[key] = parse_value(text, var_info)
+            except ValueError as e:
+                error = f"Некорректное значение для {name}"
+                raise ValueError(f"{error}: {e}" if split_quantity(text)[1] else error) from None
+
+        performed = []
+        for step in steps:
+            formula_info = self.engine.definitions[step.formula_name]
+            variables = formula_info["variables"]
+            # значения величин переводятся в единицы переменных этой формулы
+            known_vars = {var_name: convert_value(values[key], self.quantities[key], variables[var_name])
+                          for var_name, key in step.inputs}
+            key = ResultCache.make_key(step.formula_name, step.var_name, known_vars)
+            try:
+                result = self.cache.get_or_compute(
+                    key, lambda: self.engine.solve(step.formula_name, known_vars, step.var_name))
+            except (FormulaError, ArithmeticError, ValueError):
+                result = None
+            if result is None:
+                raise ValueError(f"Не удалось вычислить {step.var_name} "
+                                 f"по формуле «{step.formula_name}»")
+            var_info = variables[step.var_name]
+            values[step.output] = convert_value(result, var_info, self.quantities[step.output])
+            performed.append((step.formula_name, step.var_name, result, var_info["unit"]))
+
+        value = values[target_key]
+        unit = self.quantities[target_key]["unit"]
+        if target_unit:
+            value = convert_value(value, self.quantities[target_key], {"unit": target_unit})
+            unit = target_unit
+        return ChainResult(target_name, value, unit, performed)
+
+
+def convert_value(value, var_info, target_info):
+    return convert(value, var_info["unit"], target_info["unit"], is_difference(var_info))
+
+
+_planner = None
+
+
+def get_planner():
+    """Общий планировщик по всем формулам каталога"""
+    global _planner
+    if _planner is None:
+        _planner = SolvePlanner()
+    return _planner
+
+
+def add_arguments(subparsers):
+    """Регистрирует команду chain в разборщике аргументов командной строки"""
+    parser = subparsers.add_parser(
+        "chain", help="расчет величины по цепочке формул")
+    parser.add_argument("target", help="искомая величина, можно с единицей: \"p кг·м/с\"")
+    parser.add_argument("known", nargs="+",
+                        help="известные величины: m=2 \"h=10 м\" g=g")
+    parser.set_defaults(handler=run_from_args)
+
+
+def run_from_args(args):
+    known = {}
+    for item in args.known:
+        name, sep, text = item.partition("=")
+        if not sep:
+            raise ValueError(f"Известная величина задается как имя=значение: {item}")
+        known[name.strip()] = text.strip()
+    result = get_planner().solve(known, args.target)
+    for number, (formula_name, var_name, value, unit) in enumerate(result.steps, 1):
+        print(f"{number}. {formula_name}: {var_name} = {value:.6g} {unit}")
+    print(f"{result.target} = {result.value:.6g} {result.unit}")
+    return 0
@@ -249,3 +249,78 @@ LIGHT_THEME = {
         }
     """
 }
+
+# стили, не зависящие от темы: подписи переменных, результат, ошибка и прогресс расчета
+COMMON_STYLES = """
+    QLabel#variableLabel {
+        font-weight: bold;
+        font-size: 13px;
+    }
+    QLineEdit[state="result"] {
+        background-color: #388e3c;
+        color: #ffffff;
+        border: 2px solid #4caf50;
+        border-radius: 3px;
+        padding: 5px;
+        font-weight: bold;
+    }
+    QLabel#resultLabel[state="error"] {
+        color: red;
+        font-size: 12px;
+        font-weight: normal;
+    }
+    QProgressBar {
+        border: 1px solid #4caf50;
+        border-radius: 3px;
+        text-align: center;
+    }
+    QProgressBar::chunk {
+        background-color: #4caf50;
+    }
+"""
+
+# виджеты главного окна: (ключ стиля темы, селектор; None - стиль уже с селекторами)
+THEME_SELECTORS = [
+    ("subtitle_label", "QLabel"),
+    ("title_label", "QLabel#titleLabel"),
+    ("formula_name", "QLabel#formulaName"),
+    ("formula_expression", "QLabel#formulaExpression"),
+    ("result_label", "QLabel#resultLabel"),
+    ("combo_box", None),
+    ("list_widget", None),
+    ("calculate_button", None),
+    ("input_field", None),
+]
+
+
+def scope_rules(css, scope):
+    """Добавляет область действия scope к каждому селектору правил css"""
+    rules = []
+    for block in css.split("}"):
+        if "{" not in block:
+            continue
+        selectors, body = block.split("{", 1)
+        selectors = ", ".join(f"{scope} {selector.strip()}" for selector in selectors.split(","))
+        rules.append(f"{selectors} {{{body}}}")
+    return "\n".join(rules)
+
+
+def compile_stylesheet(theme):
+    """
+    Собирает тему в одну таблицу стилей приложения. Общий фон и цвет относятся
+    ко всему главному окну, остальное - к его центральному виджету (диалоги не затрагиваются).
+    При равной специфичности действует правило, записанное позже
+    """
+    rules = [f"QMainWindow#mainWindow, #mainWindow QWidget {{{theme['main_window']}}}"]
+    for key, selector in THEME_SELECTORS:
+        css = theme[key] if selector is None else f"{selector} {{{theme[key]}}}"
+        rules.append(scope_rules(css, "#centralWidget"))
+    rules.append(scope_rules(COMMON_STYLES, "#centralWidget"))
+    return "\n".join(rules)
+
+
+# готовые таблицы стилей: смена темы - один вызов QApplication.setStyleSheet
+STYLESHEETS = {
+    "dark": compile_stylesheet(DARK_THEME),
+    "light": compile_stylesheet(LIGHT_THEME),
+}
@@ -0,0 +1,162 @@
+import re
+import numpy as np
+from calculator import Calculator
+from constants import constant_value
+from formula_engine import get_engine
+from units import NUMBER, convert, conversion, is_difference, parse_value, split_quantity
+
+# число точек диапазона, если оно не указано
+DEFAULT_STEPS = 100
+
+# сколько переменных можно задать диапазоном (строки и столбцы таблицы)
+MAX_AXES = 2
+
+# сколько точек решается за один вызов solve_batch; между частями проверяется
+# отмена задачи и сообщается прогресс
+CHUNK_POINTS = 250_000
+
+# начало..конец:точек log единица (все, кроме границ, необязательно)
+RANGE = re.compile(rf"^\s*({NUMBER})\s*\.\.\s*({NUMBER})\s*(?::\s*(\d+))?\s*(log)?\s*([^:]*?)\s*$",
+                   re.IGNORECASE)
+
+
+def is_range(text):
+    return ".." in text
+
+
+def parse_range(text, var_info=None):
+    """
+    Диапазон значений из поля ввода: "начало..конец:точек", например "0..100:1000".
+    Суффикс log - логарифмическая шкала ("1..1000:50 log"), в конце можно указать
+    единицу измерения ("0..5:100 кН"), значения переводятся в единицы переменной var_info.
+    Если текст не диапазон, возвращает None
+    """
+    if not is_range(text):
+        return None
+    match = RANGE.match(text)
+    if match is None:
+        raise ValueError("диапазон задается как начало..конец:точек")
+    start, stop, steps, log, unit = match.groups()
+    start, stop = float(start.replace(",", ".")), float(stop.replace(",", "."))
+    steps = int(steps) if steps else DEFAULT_STEPS
+    if steps < 2:
+        raise ValueError("в диапазоне должно быть не меньше двух точек")
+    if log:
+        if start <= 0 or stop <= 0:
+            raise ValueError("для логарифмической шкалы границы должны быть больше нуля")
+        values = np.geomspace(start, stop, steps)
+    else:
+        values = np.linspace(start, stop, steps)
+    if unit:
+        if var_info is None:
+            raise ValueError("единица измерения здесь не поддерживается")
+        values = convert(values, unit, var_info["unit"], is_difference(var_info))
+    return values
+
+
+class SweepResult:
+    """Результат расчета по сетке: оси [(переменная, значения)] и массив результатов"""
+
+    def __init__(self, formula_name, target, axes, result):
+        self.formula_name = formula_name
+        self.target = target
+        self.axes = axes
+        self.result = result
+
+    @property
+    def shape(self):
+        return self.result.shape
+
+
+def run_sweep(formula_name, input_values, calculator=None, job=None):
+    """
+    Расчет формулы по сетке значений векторными проходами по CHUNK_POINTS точек.
+    input_values - текст полей ввода: одно пустое поле (искомая переменная,
+    в нем можно указать единицу результата), одна или две переменные заданы
+    диапазоном, остальные - числа. Точки вне области определения дают nan.
+    job - задача CalculationExecutor (прогресс и отмена между частями) или None
+    """
+    variables = get_engine().definitions[formula_name]["variables"]
+    fixed = {}
+    axes = []
+    missing = []
+    unit = None
+    for var_name, text in input_values.items():
+        var_info = variables[var_name]
+        text = text.strip()
+        constant = constant_value(text, var_info) if text else None
+        if constant is not None:
+            fixed[var_name] = constant
+            continue
+        number, unit_text = split_quantity(text)
+        if not number and not is_range(text):
+            if unit_text:
+                try:
+                    conversion(var_info["unit"], unit_text, is_difference(var_info))
+                except ValueError as e:
+                    raise ValueError(f"Некорректное значение для {var_name}: {e}") from None
+                unit = unit_text
+            missing.append(var_name)
+            continue
+        try:
+            values = parse_range(text, var_info)
+        except ValueError as e:
+            raise ValueError(f"Некорректный диапазон для {var_name}: {e}") from None
+        if values is not None:
+            axes.append((var_name, values))
+            continue
+        try:
+            fixed[var_name] = parse_value(text, var_info)
+        except ValueError as e:
+            error = f"Некорректное значение для {var_name}"
+            raise ValueError(f"{error}: {e}" if unit_text else error) from None
+
+    if len(missing) != 1:
+        raise ValueError("Заполните все поля кроме одного (которое нужно вычислить)")
+    if not axes or len(axes) > MAX_AXES:
+        raise ValueError("Диапазоном можно задать одну или две переменные")
+
+    # каждая ось вдоль своего измерения, остальные значения растягиваются на всю сетку
+    columns = dict(fixed)
+    for axis, (var_name, values) in enumerate(axes):
+        shape = [1] * len(axes)
+        shape[axis] = len(values)
+        columns[var_name] = values.reshape(shape)
+
+    target = missing[0]
+    calculator = calculator or Calculator()
+    shape = tuple(len(values) for _, values in axes)
+    result = np.empty(shape)
+    # сетка делится на части по строкам (первой оси)
+    rows = max(1, CHUNK_POINTS // (result.size // shape[0]))
+    row_var = axes[0][0]
+    for start in range(0, shape[0], rows):
+        if job is not None:
+            job.check()
+        stop = min(start + rows, shape[0])
+        columns[row_var] = axes[0][1][start:stop].reshape((-1,) + (1,) * (len(axes) - 1))
+        part, _ = calculator.solve_batch(formula_name, target, **columns)
+        result[start:stop] = np.broadcast_to(part, (stop - start,) + shape[1:])
+        if job is not None:
+            job.report_progress(stop, shape[0])
+    if unit is not None:
+        result = convert(result, variables[target]["unit"], unit, is_difference(variables[target]))
+        target = f"{target}, {unit}"
+    return SweepResult(formula_name, target, axes, result)
+
+
+def save_sweep(sweep, path):
+    """
+    Сохраняет сетку в CSV: для одной оси - два столбца, для двух - таблица,
+    где строки - значения первой переменной, столбцы - второй
+    """
+    (row_name, row_values), *rest = sweep.axes
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        if not rest:
+            file.write(f"{row_name},{sweep.target}\n")
+        else:
+            column_name, column_values = rest[0]
+            file.write(f"{sweep.target}: {row_name} \\ {column_name},"
+                       + ",".join(f"{value:.15g}" for value in column_values) + "\n")
+        np.savetxt(file, np.column_stack([row_values, sweep.result]),
+                   delimiter=",", fmt="%.15g")
@@ -0,0 +1,38 @@
+import csv
+import batch
+
+
+def run(tmp_path, rows):
+    source, output = tmp_path / "in.csv", tmp_path / "out.csv"
+    with open(source, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows([["U", "I", "R"]] + rows)
+    counts = batch.run_batch("Закон Ома", str(source), str(output), workers=1)
+    with open(output, newline="", encoding="utf-8") as f:
+        result = list(csv.reader(f))[1:]
+    with open(tmp_path / "out.errors.csv", newline="", encoding="utf-8") as f:
+        errors = list(csv.reader(f))[1:]
+    return counts, result, errors
+
+
+def test_numeric_and_unit_rows(tmp_path):
+    counts, result, errors = run(tmp_path, [
+        ["10", "", "5"],
+        ["", "2", "3"],
+        ["5 кВ", "", "1000"],
+        ["1", "2"],
+        ["g", "", "1"],
+        ["1", "", ""],
+    ])
+    assert counts == (6, 2)
+    assert result[:4] == [["10", "2.0", "5"], ["6.0", "2", "3"], ["5 кВ", "5.0", "1000"],
+                          ["1", "2", "0.5"]]
+    assert errors == [["6", "Некорректное значение для U: В не переводится в g"],
+                      ["7", "Заполните все поля кроме одного (которое нужно вычислить)"]]
+
+
+def test_invalid_numeric_rows(tmp_path):
+    # отрицательное сопротивление вне ограничений формулы
+    counts, result, errors = run(tmp_path, [["-1", "1", ""], ["1", "1", ""]])
+    assert counts == (2, 1)
+    assert result == [["-1", "1", ""], ["1", "1", "1.0"]]
+    assert errors == [["2", "Не удалось вычислить результат"]]
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from calculator import Calculator
+from constants import constant_value
+from formula_engine import get_engine
+
+
+@pytest.fixture
+def calculator():
+    return Calculator()
+
+
+@pytest.mark.parametrize("formula_name, known, target", [
+    # Q₂ > Q₁: КПД -19900 %
+    ("КПД тепловой машины", {"Q₁": 1.0, "Q₂": 200.0}, "η"),
+    # сопротивление и масса не могут быть отрицательными
+    ("Закон Ома", {"U": -1.0, "I": 1.0}, "R"),
+    ("Удельная теплота", {"Q": 100.0, "c": 4200.0, "ΔT": -10.0}, "m"),
+])
+def test_result_outside_target_domain(calculator, formula_name, known, target):
+    assert calculator.solve_formula(formula_name, known, target) is None
+    columns = {name: [value, abs(value)] for name, value in known.items()}
+    result, valid = calculator.solve_batch(formula_name, target, **columns)
+    assert not valid[0]
+    assert np.isnan(result[0])
+
+
+def test_result_inside_target_domain(calculator):
+    assert calculator.solve_formula("КПД тепловой машины", {"Q₁": 100.0, "Q₂": 60.0}, "η") \
+        == pytest.approx(40.0)
+    result, valid = calculator.solve_batch("Закон Ома", "R", U=[2.0, -2.0], I=[1.0, -1.0])
+    assert valid.all()
+    assert result == pytest.approx([2.0, 2.0])
+
+
+@pytest.mark.parametrize("formula_name, known, target, expected", [
+    # ограничения domain относятся к введенным значениям, не к ответу
+    ("Кинетическая энергия", {"m": 2.0, "v": 0.0}, "Eₖ", 0.0),
+    ("Энергия конденсатора", {"C": 1e-6, "U": 0.0}, "W", 0.0),
+    # охлаждение и отдаваемая мощность
+    ("Удельная теплота", {"c": 4200.0, "m": 1.0, "ΔT": -10.0}, "Q", -42000.0),
+    ("Мощность тока", {"U": -2.0, "I": 3.0}, "P", -6.0),
+    ("Потенциальная энергия", {"Eₚ": 0.0, "g": 9.81, "h": 5.0}, "m", 0.0),
+    ("Потенциальная энергия", {"Eₚ": 0.0, "m": 2.0, "h": 5.0}, "g", 0.0),
+])
+def test_result_on_domain_boundary(calculator, formula_name, known, target, expected):
+    assert calculator.solve_formula(formula_name, known, target) == pytest.approx(expected)
+    columns = {name: [value] for name, value in known.items()}
+    result, valid = calculator.solve_batch(formula_name, target, **columns)
+    assert valid.all()
+    assert result == pytest.approx([expected])
+
+
+def test_calculate_returns_values_in_formula_units(calculator):
+    formula_data = {"Закон Ома": get_engine().definitions["Закон Ома"]}
+    calculation_result = calculator.calculate(formula_data, {"U": "5 кВ", "I": "", "R": "100 Ом"})
+    assert calculation_result["success"]
+    assert calculation_result["values"] == {"U": 5000.0, "R": 100.0}
+    assert calculation_result["result"] == pytest.approx(50.0)
+
+    calculation_result = calculator.calculate(formula_data, {"U": "10", "I": "мА", "R": "1 кОм"})
+    assert calculation_result["values"] == {"U": 10.0, "R": 1000.0}
+    assert calculation_result["result"] == pytest.approx(0.01)
+    assert calculation_result["display_result"] == pytest.approx(10.0)
+
+
+def test_calculate_returns_constant_values(calculator):
+    formula_data = {"Потенциальная энергия": get_engine().definitions["Потенциальная энергия"]}
+    calculation_result = calculator.calculate(formula_data, {"Eₚ": "", "m": "2", "g": "g", "h": "10 м"})
+    assert calculation_result["success"]
+    # в историю попадает значение постоянной, а не ее обозначение
+    assert calculation_result["values"] == {"m": 2.0, "g": constant_value("g", {"unit": "м/с²"}), "h": 10.0}
+    assert calculation_result["result"] == pytest.approx(20 * calculation_result["values"]["g"])
+
+
+@pytest.mark.parametrize("formula_name, known, target", [
+    # решение не единственное
+    ("Закон Ома", {"U": 0.0, "I": 0.0}, "R"),
+    ("Второй закон Ньютона", {"F": 0.0, "a": 0.0}, "m"),
+    ("Потенциальная энергия", {"Eₚ": 0.0, "g": 9.81, "h": 0.0}, "m"),
+    # решения нет
+    ("Формула тонкой линзы", {"F": 0.5, "f": 0.5}, "d"),
+    ("КПД тепловой машины", {"η": 100.0, "Q₂": 10.0}, "Q₁"),
+])
+def test_no_numeric_root_after_division_by_zero(calculator, formula_name, known, target):
+    assert calculator.solve_formula(formula_name, known, target) is None
+    result, valid = calculator.solve_batch(formula_name, target, **known)
+    assert not valid.any()
+    assert np.isnan(result).all()
+    # численное решение само тоже не находит корня
+    solver = get_engine().get_solver(formula_name, target).fallback
+    assert solver.func(known) is None
+    assert np.isnan(solver.vectorized()[0]({name: np.array([value]) for name, value in known.items()})).all()
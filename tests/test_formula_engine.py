@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+import formula_engine
+from formula_engine import MATH_NAMESPACE, FormulaEngine, NumericSolver
+
+
+def variables(*names):
+    return {name: {"unit": "-", "description": name} for name in names}
+
+
+@pytest.fixture
+def engine():
+    engine = FormulaEngine()
+    engine.add_formula("квадрат", {"formula": "y = x + x^2", "variables": variables("x", "y"),
+                                   "result_domain": {"x": ">= 0"}})
+    engine.add_formula("касание", {"formula": "y = x^2 - 6*x + 9", "variables": variables("x", "y")})
+    return engine
+
+
+def test_numeric_slope_is_derivative_of_residual(engine):
+    solver = engine.get_solver("квадрат", "x")
+    assert isinstance(solver, NumericSolver)
+    slope = solver.compile(MATH_NAMESPACE, vector=False)[1]
+    # невязка y - x - x², производная по x: -(1 + 2x)
+    assert slope({"y": 6.0}, 2.0) == pytest.approx(-5.0)
+    assert slope({"y": 6.0}, 0.5) != 0
+
+
+def test_touching_root_found_by_newton(engine):
+    # смены знака нет, корень находит только метод Ньютона
+    assert engine.solve("касание", {"y": 0.0}, "x") == pytest.approx(3.0, abs=1e-3)
+
+
+def test_identity_has_no_unique_root(engine):
+    engine.add_formula("тождество", {"formula": "y = x*a - x*a + b", "variables": variables("x", "y", "a", "b")})
+    known = {"y": 1.0, "a": 2.0, "b": 1.0}
+    assert engine.solve("тождество", known, "x") is None
+    compute = engine.get_solver("тождество", "x").vectorized()[0]
+    assert np.isnan(compute({name: np.array([value]) for name, value in known.items()})).all()
+
+
+def test_root_beyond_scan_range_is_rejected(engine):
+    # невязка 1/x убывает до бесконечности, корня нет
+    engine.add_formula("асимптота", {"formula": "y = 1/x + x*0", "variables": variables("x", "y")})
+    solver = engine.get_solver("асимптота", "x")
+    assert isinstance(solver, NumericSolver)
+    assert solver.func({"y": 0.0}) is None
+    assert np.isnan(solver.vectorized()[0]({"y": np.array([0.0])})).all()
+
+
+def test_small_root_is_accurate(engine):
+    # абсолютная невязка ftol не должна принимать грубое приближение
+    compute = engine.get_solver("квадрат", "x").vectorized()[0]
+    assert compute({"y": np.array([1e-9])}) == pytest.approx([1e-9 - 1e-18], rel=1e-12)
+    assert engine.solve("квадрат", {"y": 1e12}, "x") == pytest.approx(999999.5000001249, rel=1e-12)
+
+
+def test_vector_fallback_is_limited(engine, monkeypatch):
+    # дробная степень отрицательного числа дает nan, корень находит численное решение
+    engine.add_formula("куб", {"formula": "y = x^3", "variables": variables("x", "y"),
+                               "domain": {"y": "> -100"}})
+    solver = engine.get_solver("куб", "x")
+    assert not isinstance(solver, NumericSolver)
+    monkeypatch.setattr(formula_engine, "FALLBACK_ROWS", 3)
+    y = np.array([-8.0, -1000.0, -27.0, 8.0, -1.0, -64.0])
+    with np.errstate(all="ignore"):
+        result = solver.vectorized()[0]({"y": y})
+    # строка вне ограничений (-1000) не решается, после трех строк остальные - nan
+    assert result[[0, 2, 3, 4]] == pytest.approx([-2.0, -3.0, 2.0, -1.0])
+    assert np.isnan(result[[1, 5]]).all()
@@ -0,0 +1,134 @@
+import sqlite3
+import pytest
+from classes import historyDB
+from classes.historyDB import HistoryDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = HistoryDB(str(tmp_path / "history.db"), write_behind=True, flush_interval=0.05)
+    yield db
+    db.close()
+
+
+def test_writer_retries_when_database_is_busy(db, monkeypatch):
+    insert_records = historyDB.insert_records
+    failures = []
+
+    def busy_once(conn, records, formula_ids):
+        if not failures:
+            failures.append(records)
+            raise sqlite3.OperationalError("database is locked")
+        insert_records(conn, records, formula_ids)
+
+    monkeypatch.setattr(historyDB, "insert_records", busy_once)
+    db.add_calculation("Закон Ома", {"U": 10.0, "R": 5.0}, 2.0, "I")
+    history = db.get_history()
+    assert failures
+    assert [(row[1], row[2], row[3]) for row in history] == [("Закон Ома", {"U": 10.0, "R": 5.0}, 2.0)]
+
+
+def test_writer_keeps_batch_until_database_is_available(db, monkeypatch):
+    insert_records = historyDB.insert_records
+    available = []
+
+    def unavailable(conn, records, formula_ids):
+        if not available:
+            raise sqlite3.OperationalError("disk I/O error")
+        insert_records(conn, records, formula_ids)
+
+    monkeypatch.setattr(historyDB, "insert_records", unavailable)
+    monkeypatch.setattr(historyDB, "RETRY_DELAY", 0.0)
+    db.add_calculation("Закон Ома", {"U": 10.0, "R": 5.0}, 2.0, "I")
+    assert db.get_history() == []
+    assert isinstance(db.writer.last_error, sqlite3.OperationalError)
+
+    available.append(True)
+    assert len(db.get_history()) == 1
+
+
+def test_migrated_legacy_records_get_target(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE history (id INTEGER PRIMARY KEY AUTOINCREMENT, formula_name TEXT,
+                    inputs TEXT, result TEXT, timestamp TEXT)''')
+    conn.executemany('INSERT INTO history (formula_name, inputs, result, timestamp) VALUES (?, ?, ?, ?)', [
+        # результат записан в поле искомой с округлением
+        ("Закон Ома", '{"I": "2.000000", "U": "2", "R": "1"}', "2.0", "2024-01-01 10:00:00"),
+        ("Закон Ома", '{"I": "", "U": "10", "R": "5"}', "2.0", "2024-01-01 10:01:00"),
+        # неоднозначно: значение результата введено и в другое поле так же
+        ("Закон Ома", '{"I": "2.0", "U": "2.0", "R": "1"}', "2.0", "2024-01-01 10:02:00"),
+    ])
+    conn.commit()
+    conn.close()
+
+    db = HistoryDB(path)
+    targets = [row[0] for row in db.conn.execute('SELECT target FROM history ORDER BY id')]
+    db.close()
+    assert targets == ["I", "I", None]
+
+
+def test_new_database_uses_incremental_vacuum(db, tmp_path):
+    assert db.conn.execute('PRAGMA auto_vacuum').fetchone()[0] == historyDB.INCREMENTAL_VACUUM
+    assert db.conn.execute('PRAGMA journal_mode').fetchone()[0] == "wal"
+
+    # старая база без постепенной очистки переводится в нее при обслуживании
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE old (id INTEGER)')
+    conn.close()
+    old = HistoryDB(path)
+    assert old.conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+    old.run_maintenance()
+    assert old.conn.execute('PRAGMA auto_vacuum').fetchone()[0] == historyDB.INCREMENTAL_VACUUM
+    old.close()
+
+
+def test_retention_survives_restart(tmp_path):
+    path = str(tmp_path / "history.db")
+    db = HistoryDB(path, retention_days=90)
+    assert db.retention_days == 90
+    db.set_retention(None)
+    db.close()
+    # выбранный срок важнее значения по умолчанию
+    db = HistoryDB(path, retention_days=90)
+    assert db.retention_days is None
+    db.set_retention(30)
+    db.close()
+    db = HistoryDB(path, retention_days=90)
+    assert db.retention_days == 30
+    db.close()
+
+
+@pytest.fixture
+def search_db(tmp_path):
+    db = HistoryDB(str(tmp_path / "search.db"))
+    # самая старая запись - лучшее совпадение (42 во всех полях), за ней 2500 обычных
+    records = [("Закон Ома", "I", [("U", 42.0), ("R", 42.0)], 42.0, 1_000_000)]
+    records += [("Закон Ома", "I", [("U", 42.0), ("R", float(n + 1000))], 1.0, 2_000_000 + n)
+                for n in range(2500)]
+    records += [("Импульс", "p", [("m", 1.0), ("v", 2.0)], 2.0, 3_000_000)]
+    with db.conn:
+        historyDB.insert_records(db.conn, records, db.formula_ids)
+    yield db
+    db.close()
+
+
+def test_search_ranks_and_counts_all_matches(search_db):
+    assert search_db.search_facets("42") == {"Электричество": 2501}
+    rows = search_db.search_history("42", limit=5)
+    assert rows[0][2] == {"U": 42.0, "R": 42.0}
+
+
+def test_search_pages_cover_all_matches(search_db):
+    ids, after = [], None
+    while True:
+        rows, after = search_db.search_page("42", limit=700, after=after)
+        if not rows:
+            break
+        ids.extend(row[0] for row in rows)
+    assert len(ids) == len(set(ids)) == 2501
+
+    rows, after = search_db.search_page(category="Механика", limit=1)
+    assert [row[1] for row in rows] == ["Импульс"]
+    assert search_db.search_page(category="Механика", limit=1, after=after)[0] == []
@@ -0,0 +1,22 @@
+from classes import historyDB
+from classes.historyDB import HistoryDB
+from classes.historyModel import HistoryTableModel
+
+
+def test_search_results_are_paged(tmp_path):
+    db = HistoryDB(str(tmp_path / "history.db"))
+    records = [("Закон Ома", "I", [("U", 10.0), ("R", float(n + 1))], 10.0 / (n + 1), 1_000_000 + n)
+               for n in range(25)]
+    with db.conn:
+        historyDB.insert_records(db.conn, records, db.formula_ids)
+    model = HistoryTableModel(db, page_size=10)
+    model.set_search("Ома")
+    assert model.rowCount() == 10
+    while model.canFetchMore():
+        model.fetchMore()
+    assert model.rowCount() == 25
+    assert len({row[0] for row in model.rows}) == 25
+
+    model.set_search("")
+    assert model.rowCount() == 10
+    db.close()
@@ -0,0 +1,51 @@
+import pytest
+from formula_engine import FormulaEngine
+from planner import SolvePlanner
+
+
+@pytest.fixture(scope="module")
+def planner():
+    return SolvePlanner()
+
+
+def test_potential_energy_symbol_is_indexed(planner):
+    # Eₚ раньше не попадал в индекс обозначений
+    assert planner.resolve("Eₚ") == [("Eₚ", planner.resolve("Eₖ")[0][1])]
+    assert planner.solve({"Eₚ": "5", "m": "1"}, "v").value == pytest.approx(10 ** 0.5)
+    result = planner.solve({"Eₚ": "19.6", "m": "1", "g": "9.8"}, "h")
+    assert result.value == pytest.approx(2.0)
+
+
+def test_momentum_from_height(planner):
+    # Eₖ и Eₚ - разные величины, связаны только законом сохранения энергии
+    result = planner.solve({"m": "2", "h": "10 м", "g": "9.81"}, "p")
+    assert [step[0] for step in result.steps] == [
+        "Потенциальная энергия", "Закон сохранения энергии", "Кинетическая энергия", "Импульс"]
+    assert result.value == pytest.approx(2 * (2 * 9.81 * 10) ** 0.5)
+    assert planner.solve({"m": "2", "h": "5", "g": "9.81"}, "v").value == pytest.approx((2 * 9.81 * 5) ** 0.5)
+
+
+def test_symbol_shared_by_two_formulas():
+    formulas = {
+        "первая": {"formula": "x = 2*y", "variables": {"x": {"unit": "м", "description": "x",
+                                                            "quantity": "длина"},
+                                                      "y": {"unit": "м", "description": "y"}}},
+        "вторая": {"formula": "z = 3*w", "variables": {"z": {"unit": "м", "description": "z",
+                                                            "quantity": "длина"},
+                                                      "w": {"unit": "м", "description": "w"}}},
+    }
+    categories = {"раздел": formulas}
+    planner = SolvePlanner(categories, FormulaEngine(categories))
+    # z - та же величина, что и x, но под своим обозначением
+    assert planner.resolve("z") == planner.resolve("x")
+    result = planner.solve({"y": "1"}, "w")
+    assert result.value == pytest.approx(2 / 3)
+    assert [step[0] for step in result.steps] == ["первая", "вторая"]
+
+
+def test_buoyant_force_is_not_newton_force(planner):
+    with pytest.raises(ValueError, match="Нет цепочки формул"):
+        planner.solve({"ρ": "1000", "g": "9.81", "V": "1", "m": "10"}, "a")
+    # одинаковое обозначение F: выбирается формула, по которой есть цепочка
+    assert planner.solve({"ρ": "1000", "g": "9.81", "V": "1"}, "F").value == pytest.approx(9810)
+    assert planner.solve({"F": "10", "m": "2"}, "a").value == pytest.approx(5)
@@ -0,0 +1,67 @@
+import pytest
+from calculator import Calculator
+from classes import resultCache
+from classes.resultCache import MISSING, ResultCache
+from formula_engine import get_engine
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" теперь самая старая запись
+    cache.put("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(resultCache.time, "monotonic", lambda: now[0])
+    cache = ResultCache(ttl=10)
+    cache.put("a", 1)
+    now[0] = 109.0
+    assert cache.get("a") == 1
+    now[0] = 110.0
+    assert cache.get("a", None) is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_hit_and_miss_counters():
+    cache = ResultCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute("key", lambda: calls.append(1) or 42) == 42
+    assert calls == [1]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 1, 1)
+    cache.clear()
+    assert cache.get("key") is MISSING
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        ResultCache(maxsize=0)
+
+
+def test_key_normalisation():
+    key = ResultCache.make_key("Закон Ома", "I", {"U": 0, "R": 5})
+    # порядок переменных, тип числа и знак нуля ключ не меняют
+    assert ResultCache.make_key("Закон Ома", "I", {"R": 5.0, "U": -0.0}) == key
+    assert ResultCache.make_key("Закон Ома", "U", {"R": 5.0, "I": 0.0}) != key
+
+
+def test_calculator_caches_parsed_values():
+    cache = ResultCache()
+    calculator = Calculator(cache=cache)
+    formula_data = {"Закон Ома": get_engine().definitions["Закон Ома"]}
+    first = calculator.calculate(formula_data, {"U": "5 кВ", "I": "", "R": "100"})
+    # те же значения в других единицах и записи берутся из кэша
+    second = calculator.calculate(formula_data, {"U": "5000,0", "I": " ", "R": "0,1 кОм"})
+    assert first["result"] == second["result"] == pytest.approx(50.0)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
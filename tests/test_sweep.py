@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import sweep
+import uncertainty
+from classes.calcExecutor import JobCancelled
+from sweep import run_sweep
+from uncertainty import run_uncertainty
+
+
+class Job:
+    """Заменитель CalculationJob: запоминает прогресс, отменяется после cancel_after частей"""
+
+    def __init__(self, cancel_after=None):
+        self.cancel_after = cancel_after
+        self.progress = []
+
+    def check(self):
+        if self.cancel_after is not None and len(self.progress) >= self.cancel_after:
+            raise JobCancelled()
+
+    def report_progress(self, done, total):
+        self.progress.append((done, total))
+
+
+def test_sweep_is_solved_in_chunks(monkeypatch):
+    input_values = {"U": "0..10:50", "I": "1..2:40", "R": ""}
+    expected = run_sweep("Закон Ома", input_values).result
+    monkeypatch.setattr(sweep, "CHUNK_POINTS", 400)
+    job = Job()
+    result = run_sweep("Закон Ома", input_values, job=job).result
+    np.testing.assert_array_equal(result, expected)
+    # по 10 строк первой оси за часть
+    assert job.progress == [(10, 50), (20, 50), (30, 50), (40, 50), (50, 50)]
+
+
+def test_sweep_cancelled_between_chunks(monkeypatch):
+    monkeypatch.setattr(sweep, "CHUNK_POINTS", 10)
+    job = Job(cancel_after=2)
+    with pytest.raises(JobCancelled):
+        run_sweep("Закон Ома", {"U": "0..10:100", "I": "2", "R": ""}, job=job)
+    assert job.progress == [(10, 100), (20, 100)]
+
+
+def test_monte_carlo_is_solved_in_chunks(monkeypatch):
+    input_values = {"U": "10 ± 1", "I": "2 ± 0,1", "R": ""}
+    expected = run_uncertainty("Закон Ома", input_values, samples=1000, seed=3)
+    monkeypatch.setattr(uncertainty, "CHUNK_POINTS", 300)
+    job = Job()
+    estimate = run_uncertainty("Закон Ома", input_values, samples=1000, seed=3, job=job)
+    assert estimate.mean == pytest.approx(expected.mean, rel=1e-12)
+    assert estimate.std == pytest.approx(expected.std, rel=1e-12)
+    assert job.progress == [(300, 1000), (600, 1000), (900, 1000), (1000, 1000)]
+
+    job = Job(cancel_after=1)
+    with pytest.raises(JobCancelled):
+        run_uncertainty("Закон Ома", input_values, samples=1000, seed=3, job=job)
+    assert job.progress == [(300, 1000)]
@@ -0,0 +1,19 @@
+import pytest
+from uncertainty import MONTE_CARLO, LINEAR, run_uncertainty
+
+
+def test_history_values_are_numbers_in_formula_units():
+    estimate = run_uncertainty("Закон Ома", {"U": "10 ± 0,1 кВ", "I": "2", "R": "кОм"},
+                               method=LINEAR)
+    assert estimate.unit == "кОм"
+    assert estimate.values == {"U": 10000.0, "I": 2.0}
+    assert estimate.result == pytest.approx(5000.0)
+    assert estimate.mean == pytest.approx(5.0)
+
+
+def test_samples_outside_target_domain_are_invalid():
+    estimate = run_uncertainty("Закон Ома", {"U": "0 ± 1", "I": "0 ± 1", "R": ""},
+                               method=MONTE_CARLO, samples=10000, seed=1)
+    assert estimate.values == {"U": 0.0, "I": 0.0}
+    assert 0 < estimate.valid < estimate.samples
+    assert all(value > 0 for value in estimate.percentiles.values())
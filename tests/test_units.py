@@ -0,0 +1,66 @@
+import pytest
+from constants import constant_value, find_constant
+from units import conversion, convert, get_unit, parse_value
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("5 кОм", 5000.0),
+    ("5 kΩ", 5000.0),
+    ("2 MΩ", 2e6),
+    ("2 МΩ", 2e6),
+    ("470 mΩ", 0.47),
+    ("3 Ω", 3.0),
+    ("3 Ohm", 3.0),
+])
+def test_resistance_prefixes(text, expected):
+    assert parse_value(text, {"unit": "Ом", "description": "сопротивление"}) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text, unit, expected", [
+    ("220 mV", "В", 0.22),
+    ("5 кН", "Н", 5000.0),
+    ("3 см", "м", 0.03),
+    ("36 км/ч", "м/с", 10.0),
+    ("10 мкФ", "Ф", 1e-5),
+    ("2 г", "кг", 0.002),
+])
+def test_prefixes_and_compound_units(text, unit, expected):
+    assert parse_value(text, {"unit": unit, "description": ""}) == pytest.approx(expected)
+
+
+def test_plain_symbols_win_over_prefixes():
+    # м - метр, а не милли-; h и min - часы и минуты
+    assert get_unit("м").factor == 1.0
+    assert convert(2, "h", "с") == pytest.approx(7200)
+    assert convert(1, "min", "с") == pytest.approx(60)
+
+
+def test_temperature_difference_and_absolute_value():
+    assert convert(0, "°C", "К") == pytest.approx(273.15)
+    assert convert(300, "К", "°C") == pytest.approx(26.85)
+    # изменение температуры переводится без сдвига шкалы
+    assert convert(10, "К", "°C", difference=True) == pytest.approx(10)
+    assert parse_value("10 К", {"unit": "°C", "description": "изменение температуры"}) == pytest.approx(10)
+    assert parse_value("300 К", {"unit": "°C", "description": "температура"}) == pytest.approx(26.85)
+
+
+@pytest.mark.parametrize("unit, target_unit", [("В", "g"), ("кг", "м"), ("Дж", "Вт")])
+def test_incompatible_dimensions(unit, target_unit):
+    with pytest.raises(ValueError, match="не переводится"):
+        conversion(unit, target_unit)
+    with pytest.raises(ValueError, match="не переводится"):
+        parse_value(f"1 {unit}", {"unit": target_unit, "description": ""})
+
+
+def test_unknown_unit():
+    with pytest.raises(ValueError, match="неизвестная единица"):
+        get_unit("фунт")
+
+
+def test_constants():
+    assert find_constant("k_B") is find_constant("kB")
+    assert find_constant("Постоянная Планка") is find_constant("h")
+    assert find_constant("нет такой") is None
+    # значение в единицах переменной, при другой размерности h - не постоянная Планка
+    assert constant_value("c", {"unit": "км/с"}) == pytest.approx(find_constant("c").value / 1000)
+    assert constant_value("h", {"unit": "с"}) is None
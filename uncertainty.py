@@ -0,0 +1,286 @@
+import math
+import re
+from statistics import NormalDist
+import numpy as np
+from calculator import Calculator
+from constants import constant_value
+from formula_engine import get_engine
+from sweep import CHUNK_POINTS, is_range
+from units import NUMBER, conversion, convert, is_difference, parse_value, split_quantity
+
+# методы оценки неопределенности
+MONTE_CARLO, LINEAR = "monte_carlo", "linear"
+
+# размер выборки метода Монте-Карло, если он не указан
+DEFAULT_SAMPLES = 100_000
+
+# процентили результата (медиана, ±1σ и 95% интервал для нормального распределения)
+PERCENTILES = (2.5, 16.0, 50.0, 84.0, 97.5)
+
+# значение ± погрешность, погрешность можно задать в процентах: "100 ± 2 Ом", "100 ± 2% Ом"
+PLUS_MINUS = re.compile(rf"^\s*({NUMBER})\s*(?:±|\+/?-)\s*({NUMBER})(%)?\s*(.*?)\s*$")
+# распределение с параметрами через ";" (или "," при десятичной точке): "U(98; 102) Ом"
+DISTRIBUTION = re.compile(r"^\s*(\w+)\s*\((.*)\)\s*(.*?)\s*$")
+
+# обозначения распределений -> (вид, число параметров)
+DISTRIBUTIONS = {
+    "N": ("normal", 2), "norm": ("normal", 2), "normal": ("normal", 2),
+    "U": ("uniform", 2), "uniform": ("uniform", 2),
+    "tri": ("triangular", 3), "triangular": ("triangular", 3),
+}
+
+
+class Distribution:
+    """
+    Распределение входной величины: normal (среднее, σ), uniform (от, до),
+    triangular (от, мода, до). Параметры - в единицах переменной формулы
+    """
+
+    __slots__ = ("kind", "params")
+
+    def __init__(self, kind, params):
+        self.kind = kind
+        self.params = params
+
+    @property
+    def mean(self):
+        if self.kind == "normal":
+            return self.params[0]
+        return sum(self.params) / len(self.params)
+
+    @property
+    def std(self):
+        if self.kind == "normal":
+            return self.params[1]
+        if self.kind == "uniform":
+            low, high = self.params
+            return (high - low) / math.sqrt(12)
+        low, mode, high = self.params
+        return math.sqrt((low * low + mode * mode + high * high
+                          - low * mode - low * high - mode * high) / 18)
+
+    def sample(self, rng, size):
+        if self.kind == "normal":
+            return rng.normal(*self.params, size)
+        if self.kind == "uniform":
+            return rng.uniform(*self.params, size)
+        low, mode, high = self.params
+        if low == high:
+            return np.full(size, low)
+        return rng.triangular(low, mode, high, size)
+
+
+def is_uncertain(text):
+    """Задана ли в поле погрешность или распределение"""
+    if "±" in text or "+-" in text or "+/-" in text:
+        return True
+    match = DISTRIBUTION.match(text)
+    return match is not None and match.group(1) in DISTRIBUTIONS
+
+
+def parse_distribution(text, var_info):
+    """
+    Распределение из поля ввода в единицах переменной var_info:
+    "100 ± 2 Ом" и "100 ± 2% Ом" - нормальное (σ = 2 или 2% от значения),
+    "N(100; 2)", "U(98; 102) Ом", "tri(98; 100; 102)". Если текст без
+    погрешности, возвращает None
+    """
+    if not is_uncertain(text):
+        return None
+    match = PLUS_MINUS.match(text)
+    if match is not None:
+        value, sigma, percent, unit = match.groups()
+        value, sigma = float(value.replace(",", ".")), float(sigma.replace(",", "."))
+        if percent:
+            sigma = abs(value) * sigma / 100
+        kind, params = "normal", [value, sigma]
+    else:
+        match = DISTRIBUTION.match(text)
+        if match is None:
+            raise ValueError("погрешность задается как 100 ± 2 или N(100; 2)")
+        name, arguments, unit = match.groups()
+        kind, count = DISTRIBUTIONS[name]
+        # при десятичной запятой параметры разделяются точкой с запятой
+        separator = ";" if ";" in arguments else ","
+        try:
+            params = [float(part.strip().replace(",", ".")) for part in arguments.split(separator)]
+        except ValueError:
+            raise ValueError(f"некорректные параметры распределения: {arguments}") from None
+        if len(params) != count:
+            raise ValueError(f"у распределения {name} должно быть параметров: {count}")
+
+    if kind == "normal" and params[1] < 0:
+        raise ValueError("погрешность не может быть отрицательной")
+    if kind != "normal" and params != sorted(params):
+        raise ValueError("границы распределения должны идти по возрастанию")
+    if unit:
+        scale, shift = conversion(unit, var_info["unit"], is_difference(var_info))
+        if kind == "normal":
+            # σ - разность значений, сдвиг шкалы (°C -> К) к ней не применяется
+            params = [params[0] * scale + shift, params[1] * scale]
+        else:
+            params = [param * scale + shift for param in params]
+    return Distribution(kind, params)
+
+
+class UncertaintyResult:
+    """Оценка искомой величины: среднее, стандартное отклонение и процентили"""
+
+    def __init__(self, formula_name, target, unit, method, mean, std, percentiles,
+                 samples=None, valid=None, contributions=None, values=None, result=None):
+        self.formula_name = formula_name
+        self.target = target
+        self.unit = unit  # единица результата (выбранная в поле искомой или единица формулы)
+        self.method = method
+        self.mean = mean
+        self.std = std
+        self.percentiles = percentiles  # {процентиль: значение}
+        self.samples = samples  # размер выборки (Монте-Карло)
+        self.valid = valid  # сколько точек выборки в области определения
+        self.contributions = contributions  # вклад входов в дисперсию (линейная оценка)
+        # для истории: средние значения входов и результата в единицах формулы
+        self.values = values
+        self.result = result
+
+    @property
+    def median(self):
+        return self.percentiles[50.0]
+
+    @property
+    def interval(self):
+        """95% интервал"""
+        return self.percentiles[2.5], self.percentiles[97.5]
+
+
+def run_uncertainty(formula_name, input_values, method=MONTE_CARLO, samples=DEFAULT_SAMPLES,
+                    calculator=None, seed=None, job=None):
+    """
+    Расчет с погрешностями входных величин. input_values - текст полей ввода:
+    одно пустое поле (искомая переменная, можно с единицей результата), часть
+    полей с погрешностью ("100 ± 2 Ом") или распределением, остальные - числа.
+    Монте-Карло: выборка по каждому входу и один векторный проход по формуле;
+    линейная оценка: σ² = Σ (∂y/∂xᵢ · σᵢ)² по аналитическим производным.
+    job - задача CalculationExecutor (прогресс и отмена) или None
+    """
+    variables = get_engine().definitions[formula_name]["variables"]
+    fixed = {}
+    distributions = {}
+    missing = []
+    unit = None
+    for var_name, text in input_values.items():
+        var_info = variables[var_name]
+        text = text.strip()
+        constant = constant_value(text, var_info) if text else None
+        if constant is not None:
+            fixed[var_name] = constant
+            continue
+        if is_range(text):
+            raise ValueError("Диапазон и погрешность нельзя задавать одновременно")
+        try:
+            distribution = parse_distribution(text, var_info)
+        except ValueError as e:
+            raise ValueError(f"Некорректная погрешность для {var_name}: {e}") from None
+        if distribution is not None:
+            distributions[var_name] = distribution
+            continue
+        number, unit_text = split_quantity(text)
+        if not number:
+            if unit_text:
+                try:
+                    conversion(var_info["unit"], unit_text, is_difference(var_info))
+                except ValueError as e:
+                    raise ValueError(f"Некорректное значение для {var_name}: {e}") from None
+                unit = unit_text
+            missing.append(var_name)
+            continue
+        try:
+            fixed[var_name] = parse_value(text, var_info)
+        except ValueError as e:
+            error = f"Некорректное значение для {var_name}"
+            raise ValueError(f"{error}: {e}" if unit_text else error) from None
+
+    if len(missing) != 1:
+        raise ValueError("Заполните все поля кроме одного (которое нужно вычислить)")
+    if not distributions:
+        raise ValueError("Задайте погрешность хотя бы для одной величины")
+    target = missing[0]
+    target_info = variables[target]
+
+    if method == LINEAR:
+        result = linear_estimate(formula_name, target, fixed, distributions)
+    elif method == MONTE_CARLO:
+        result = monte_carlo(formula_name, target, fixed, distributions, samples,
+                             calculator or Calculator(), seed, job)
+    else:
+        raise ValueError(f"Неизвестный метод оценки погрешности: {method}")
+    mean, std, percentiles, valid, contributions = result
+    values = dict(fixed)
+    values.update((var_name, distribution.mean) for var_name, distribution in distributions.items())
+    result = mean
+
+    if unit is not None:
+        difference = is_difference(target_info)
+        mean = convert(mean, target_info["unit"], unit, difference)
+        std = abs(convert(std, target_info["unit"], unit, True))
+        percentiles = {q: convert(value, target_info["unit"], unit, difference)
+                       for q, value in percentiles.items()}
+    return UncertaintyResult(formula_name, target, unit or target_info["unit"], method,
+                             mean, std, percentiles, samples if method == MONTE_CARLO else None,
+                             valid, contributions, values, result)
+
+
+def monte_carlo(formula_name, target, fixed, distributions, samples, calculator, seed, job=None):
+    """Выборка по каждому входу и векторное решение формулы по CHUNK_POINTS точек"""
+    if samples < 2:
+        raise ValueError("В выборке должно быть не меньше двух точек")
+    rng = np.random.default_rng(seed)
+    inputs = {var_name: distribution.sample(rng, samples)
+              for var_name, distribution in distributions.items()}
+    values = []
+    for start in range(0, samples, CHUNK_POINTS):
+        if job is not None:
+            job.check()
+        stop = min(start + CHUNK_POINTS, samples)
+        columns = dict(fixed)
+        columns.update((var_name, column[start:stop]) for var_name, column in inputs.items())
+        result, valid = calculator.solve_batch(formula_name, target, **columns)
+        values.append(result[valid])
+        if job is not None:
+            job.report_progress(stop, samples)
+    values = np.concatenate(values)
+    if len(values) < 2:
+        raise ValueError("Не удалось вычислить результат: выборка вне области определения формулы")
+    percentiles = dict(zip(PERCENTILES, np.percentile(values, PERCENTILES).tolist()))
+    return float(values.mean()), float(values.std(ddof=1)), percentiles, len(values), None
+
+
+def linear_estimate(formula_name, target, fixed, distributions):
+    """
+    Линейное распространение погрешностей в точке средних значений.
+    Процентили - по нормальному распределению результата
+    """
+    engine = get_engine()
+    known = dict(fixed)
+    known.update((var_name, distribution.mean) for var_name, distribution in distributions.items())
+    try:
+        mean = engine.solve(formula_name, known, target)
+    except (ArithmeticError, ValueError):
+        mean = None
+    if mean is None:
+        raise ValueError("Не удалось вычислить результат")
+    solver = engine.get_solver(formula_name, target)
+    try:
+        partials = engine.get_gradient(formula_name, target)({**known, target: mean})
+    except (ArithmeticError, ValueError):
+        raise ValueError(f"Производная {target} не определена в этой точке") from None
+    terms = {var_name: (partial * distributions[var_name].std) ** 2
+             for var_name, partial in zip(solver.inputs, partials) if var_name in distributions}
+    variance = sum(terms.values())
+    if isinstance(variance, complex) or not math.isfinite(variance):
+        raise ValueError(f"Производная {target} не определена в этой точке")
+    std = math.sqrt(variance)
+    contributions = {var_name: term / variance if variance else 0.0 for var_name, term in terms.items()}
+    normal = NormalDist()
+    percentiles = {q: mean + std * normal.inv_cdf(q / 100) for q in PERCENTILES}
+    percentiles[50.0] = mean
+    return mean, std, percentiles, None, contributions
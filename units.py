@@ -0,0 +1,249 @@
+import math
+import re
+from functools import lru_cache
+from const.constans import PHYSICS_UNITS
+
+# основные единицы СИ (по величине из справочника) - порядок измерений размерности
+BASE_QUANTITIES = ("длина", "масса", "время", "сила тока", "температура",
+                   "количество вещества", "сила света")
+
+# единицы, которых нет в справочнике, в том же виде "обозначение: определение"
+EXTRA_UNITS = {
+    "г": "0.001 кг",
+    "л": "0.001 м³",
+    "мин": "60 с",
+    "ч": "3600 с",
+    "ср": "1",
+    "рад": "1",
+    "°": f"{math.pi / 180!r}",
+    "%": "0.01",
+    "-": "1",
+    "эВ": "1.602176634e-19 Дж",
+    "атм": "101325 Па",
+    "бар": "100000 Па",
+}
+
+# латинские обозначения
+ALIASES = {
+    "m": "м", "kg": "кг", "g": "г", "s": "с", "N": "Н", "J": "Дж", "W": "Вт", "Pa": "Па",
+    "A": "А", "V": "В", "Ohm": "Ом", "Ω": "Ом", "C": "Кл", "F": "Ф", "H": "Гн", "T": "Тл",
+    "K": "К", "mol": "моль", "cd": "кд", "lm": "лм", "lx": "лк", "cal": "кал", "L": "л",
+    "l": "л", "min": "мин", "h": "ч", "rad": "рад", "eV": "эВ", "atm": "атм", "bar": "бар",
+}
+
+PREFIXES = {"Г": 1e9, "М": 1e6, "к": 1e3, "д": 1e-1, "с": 1e-2, "м": 1e-3,
+            "мк": 1e-6, "н": 1e-9, "п": 1e-12}
+LATIN_PREFIXES = {"G": 1e9, "M": 1e6, "k": 1e3, "d": 1e-1, "c": 1e-2, "m": 1e-3,
+                  "µ": 1e-6, "μ": 1e-6, "u": 1e-6, "n": 1e-9, "p": 1e-12}
+
+# к этим единицам приставки не добавляются
+NO_PREFIX = {"кг", "мин", "ч", "°", "°C", "%", "-", "атм", "дптр"}
+
+NUMBER = r"[-+]?(?:\d+(?:[.,]\d*)?|[.,]\d+)(?:[eE][-+]?\d+)?"
+QUANTITY = re.compile(rf"^\s*({NUMBER})?\s*(.*?)\s*$")
+DEFINITION = re.compile(rf"^\s*({NUMBER})?\s*(.*?)(?:\s+-\s+({NUMBER}))?\s*$")
+TOKEN = re.compile(r"\s*(?:(\()|(\))|([·⋅*/])|(\^[-+]?\d+|[⁻⁺]?[⁰¹²³⁴⁵⁶⁷⁸⁹]+)|([^\s()·⋅*/^⁻⁺⁰¹²³⁴⁵⁶⁷⁸⁹]+))")
+SUPERSCRIPTS = str.maketrans("⁻⁺⁰¹²³⁴⁵⁶⁷⁸⁹", "-+0123456789")
+
+DIMENSIONLESS = (0,) * len(BASE_QUANTITIES)
+
+
+class Unit:
+    """Единица измерения: значение в СИ = значение * factor + offset"""
+
+    __slots__ = ("factor", "dims", "offset")
+
+    def __init__(self, factor, dims=DIMENSIONLESS, offset=0.0):
+        self.factor = factor
+        self.dims = dims
+        self.offset = offset
+
+    def __mul__(self, other):
+        return Unit(self.factor * other.factor,
+                    tuple(a + b for a, b in zip(self.dims, other.dims)))
+
+    def __truediv__(self, other):
+        return Unit(self.factor / other.factor,
+                    tuple(a - b for a, b in zip(self.dims, other.dims)))
+
+    def __pow__(self, power):
+        return Unit(self.factor ** power, tuple(a * power for a in self.dims))
+
+
+def parse_unit(text, table):
+    """Разбор составной единицы вида "Дж/(кг·°C)", "м/с²", "кг·м^-1" по таблице"""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"неизвестная единица измерения: {text}")
+        tokens.append(match)
+        position = match.end()
+    if not tokens:
+        raise ValueError("не указана единица измерения")
+
+    index = 0
+
+    def term():
+        nonlocal index
+        if index >= len(tokens):
+            raise ValueError(f"неполная единица измерения: {text}")
+        match = tokens[index]
+        index += 1
+        if match.group(1):
+            unit = product()
+            if index >= len(tokens) or not tokens[index].group(2):
+                raise ValueError(f"не закрыта скобка: {text}")
+            index += 1
+        elif match.group(5):
+            name = match.group(5)
+            unit = table.get(name)
+            if unit is None:
+                if name == "1":
+                    unit = Unit(1.0)
+                else:
+                    raise ValueError(f"неизвестная единица измерения: {name}")
+        else:
+            raise ValueError(f"некорректная единица измерения: {text}")
+        if index < len(tokens) and tokens[index].group(4):
+            power = int(tokens[index].group(4).lstrip("^").translate(SUPERSCRIPTS))
+            index += 1
+            unit = unit ** power
+        return unit
+
+    def product():
+        nonlocal index
+        unit = term()
+        while index < len(tokens) and tokens[index].group(3):
+            operator = tokens[index].group(3)
+            index += 1
+            unit = unit / term() if operator == "/" else unit * term()
+        return unit
+
+    unit = product()
+    if index != len(tokens):
+        raise ValueError(f"некорректная единица измерения: {text}")
+    # сдвиг шкалы (°C) имеет смысл только у одиночной единицы
+    if len(tokens) == 1:
+        return table[tokens[0].group(5)] if tokens[0].group(5) in table else unit
+    return unit
+
+
+def parse_definition(definition, table):
+    """Определение единицы через уже известные: "кг·м/с²", "4.184 Дж", "К - 273.15" """
+    number, unit_text, shift = DEFINITION.match(definition).groups()
+    unit = parse_unit(unit_text, table) if unit_text else Unit(1.0)
+    factor = float(number) if number else 1.0
+    offset = unit.offset
+    if shift:
+        offset += float(shift) * unit.factor
+    return Unit(factor * unit.factor, unit.dims, offset)
+
+
+def build_table():
+    """
+    Плоская таблица "обозначение -> единица" со всеми приставками СИ.
+    Строится один раз при импорте из справочника PHYSICS_UNITS
+    """
+    definitions = {}
+    for units in PHYSICS_UNITS.values():
+        for info in units.values():
+            definitions[info["symbol"]] = info
+    definitions.update({symbol: {"definition": definition}
+                        for symbol, definition in EXTRA_UNITS.items()})
+
+    table = {}
+    pending = dict(definitions)
+    while pending:
+        resolved = False
+        for symbol, info in list(pending.items()):
+            quantity = info.get("quantity")
+            if info["definition"].startswith("Основная единица") and quantity in BASE_QUANTITIES:
+                dims = tuple(int(name == quantity) for name in BASE_QUANTITIES)
+                table[symbol] = Unit(1.0, dims)
+            else:
+                try:
+                    table[symbol] = parse_definition(info["definition"], table)
+                except ValueError:
+                    # определение ссылается на единицу, которая еще не разобрана
+                    continue
+            del pending[symbol]
+            resolved = True
+        if not resolved:
+            raise ValueError(f"не удалось разобрать единицы: {', '.join(pending)}")
+
+    for alias, symbol in ALIASES.items():
+        table[alias] = table[symbol]
+
+    # сначала единицы с приставками, поверх - сами обозначения (м - метр, а не милли-)
+    lookup = {}
+    for symbol, unit in table.items():
+        if symbol in NO_PREFIX or not symbol.isalpha():
+            continue
+        if symbol.isascii():
+            prefixes = LATIN_PREFIXES
+        elif symbol in ALIASES:
+            # Ω пишут и с латинскими (kΩ), и с русскими приставками (кΩ)
+            prefixes = {**PREFIXES, **LATIN_PREFIXES}
+        else:
+            prefixes = PREFIXES
+        for prefix, factor in prefixes.items():
+            lookup[prefix + symbol] = Unit(unit.factor * factor, unit.dims)
+    lookup.update(table)
+    return lookup
+
+
+UNITS = build_table()
+
+
+def split_quantity(text):
+    """Делит ввод "5 кН" на число и единицу, любая из частей может быть пустой"""
+    number, unit = QUANTITY.match(text).groups()
+    return (number or "").replace(",", "."), unit
+
+
+@lru_cache(maxsize=1024)
+def get_unit(text):
+    return parse_unit(text, UNITS)
+
+
+@lru_cache(maxsize=1024)
+def conversion(unit, target_unit, difference=False):
+    """
+    Коэффициенты перевода: значение в target_unit = значение * scale + shift.
+    difference - переводится разность (изменение температуры), сдвиг шкалы не нужен
+    """
+    source, target = get_unit(unit), get_unit(target_unit)
+    if source.dims != target.dims:
+        raise ValueError(f"{unit} не переводится в {target_unit}")
+    scale = source.factor / target.factor
+    shift = 0.0 if difference else (source.offset - target.offset) / target.factor
+    return scale, shift
+
+
+def convert(value, unit, target_unit, difference=False):
+    """Перевод числа или массива numpy из одной единицы в другую"""
+    if unit == target_unit:
+        return value
+    scale, shift = conversion(unit, target_unit, difference)
+    return value * scale + shift
+
+
+def is_difference(var_info):
+    return var_info.get("description", "").startswith("изменение")
+
+
+def parse_value(text, var_info):
+    """
+    Значение поля ввода в единицах переменной формулы: "5 кН", "220 mV", "3 см".
+    Число без единицы считается уже заданным в единицах переменной
+    """
+    number, unit = split_quantity(text)
+    if not number:
+        raise ValueError("не указано число")
+    value = float(number)
+    if unit:
+        value = convert(value, unit, var_info["unit"], is_difference(var_info))
+    return value